@@ -1,4 +1,4 @@
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
 from django.conf import settings
 
 class CookieJWTAuthentication(JWTAuthentication):
@@ -10,4 +10,8 @@ class CookieJWTAuthentication(JWTAuthentication):
         return self.get_user(validated_token), validated_token
 
     def get_raw_token_from_cookies(self, request):
-        return request.COOKIES.get(settings.SIMPLE_JWT['AUTH_COOKIE'])
\ No newline at end of file
+        return request.COOKIES.get(settings.SIMPLE_JWT['AUTH_COOKIE'])
+
+
+class CookieJWTStatelessAuthentication(CookieJWTAuthentication, JWTStatelessUserAuthentication):
+    """Cookie JWT auth that builds the user from the token claims without a query."""
@@ -0,0 +1,206 @@
+import logging
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from backend.utils import delete_rows
+
+logger = logging.getLogger(__name__)
+
+DELETION_PROGRESS_TIMEOUT = 60 * 60 * 24
+
+
+def _progress_key(user_id):
+    return f"accounts:deletion:{user_id}"
+
+
+def get_deletion_progress(user_id):
+    """Return progress of a pending account deletion, or None if none is known."""
+    return cache.get(_progress_key(user_id))
+
+
+def _save_progress(progress):
+    cache.set(_progress_key(progress["user_id"]), progress, DELETION_PROGRESS_TIMEOUT)
+
+
+def delete_in_chunks(queryset, chunk_size, fields=(), on_chunk=None):
+    """
+    Delete the rows of `queryset` in primary-key order, `chunk_size` at a time.
+
+    Each chunk commits on its own so locks are held briefly. `on_chunk` receives
+    the `fields` values of the chunk and runs in the same transaction, before
+    the rows go, so it can keep counters consistent. Signals are not sent.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.order_by("pk").values_list("pk", *fields)[:chunk_size])
+            if not rows:
+                return deleted
+            if on_chunk is not None:
+                on_chunk([row[1:] for row in rows])
+            delete_rows(queryset.model, [row[0] for row in rows])
+        deleted += len(rows)
+        yield deleted
+
+
+def _refresh_posts(rows):
+    """Recount the posts that lost ratings or comments and re-rank them."""
+    from posts.models import Post
+    from popularity.leaderboard import refresh_post_rating
+    from popularity.scheduler import mark_authors_dirty
+
+    post_ids = {post_id for post_id, in rows}
+
+    def refresh():
+        posts = Post.objects.filter(pk__in=post_ids)
+        posts.recompute_counters()
+        mark_authors_dirty(set(posts.values_list("author_id", flat=True)))
+        for post_id in post_ids:
+            refresh_post_rating(post_id)
+
+    transaction.on_commit(refresh)
+
+
+def _unrank_posts(rows):
+    from popularity.leaderboard import POST_RATING
+
+    post_ids = [post_id for post_id, in rows]
+    transaction.on_commit(lambda: [POST_RATING.remove(post_id) for post_id in post_ids])
+
+
+def _delete_replies(rows):
+    """Take the replies under these comments with them; they cannot outlive their parent."""
+    from comments.models import Comment, subtree_filter
+
+    nodes = [(thread_id, path) for thread_id, path, *_ in rows]
+    replies = Comment.objects.filter(subtree_filter(nodes)).values_list("pk", flat=True)
+    # Slices keep each DELETE well under the database's parameter limit
+    while delete_rows(Comment, replies[:settings.ACCOUNT_DELETION_CHUNK_SIZE]):
+        pass
+
+
+def _release_comments(rows):
+    """Drop the user's comments with their replies and recount the threads and posts they fed."""
+    from comments.models import Comment
+
+    _delete_replies(rows)
+    thread_ids = {thread_id for thread_id, _, _ in rows}
+    transaction.on_commit(lambda: Comment.objects.filter(pk__in=thread_ids).recount_replies())
+    _refresh_posts([(post_id,) for _, _, post_id in rows])
+
+
+def _release_followed(rows):
+    """The deleted user stops following these users."""
+    from profiles.models import Profile
+    from popularity.leaderboard import FOLLOWERS
+
+    followed_ids = [followed_id for followed_id, in rows]
+    Profile.objects.filter(user_id__in=followed_ids).update(
+        follower_count=Greatest(F("follower_count") - 1, 0)
+    )
+    FOLLOWERS.increment_many_on_commit({followed_id: -1 for followed_id in followed_ids})
+
+
+def _release_followers(rows):
+    """These users lose the deleted user from the accounts they follow."""
+    from followers.cache import following_cache_key
+    from followers.suggestions import mark_neighbourhood_changed
+    from posts.timeline import invalidate_timelines
+    from profiles.models import Profile
+
+    follower_ids = [follower_id for follower_id, in rows]
+    Profile.objects.filter(user_id__in=follower_ids).update(
+        following_count=Greatest(F("following_count") - 1, 0)
+    )
+
+    def refresh():
+        cache.delete_many([following_cache_key(follower_id) for follower_id in follower_ids])
+        invalidate_timelines(follower_ids)
+        mark_neighbourhood_changed(*follower_ids)
+
+    transaction.on_commit(refresh)
+
+
+def _deletion_steps(user_id):
+    """(label, queryset, fields, on_chunk) in dependency order, children first."""
+    from comments.models import Comment
+    from followers.models import Follow, FollowSuggestion
+    from notifications.models import Notification
+    from posts.models import Post
+    from ratings.models import Rating
+
+    return [
+        ("post_ratings", Rating.objects.filter(post__author_id=user_id), (), None),
+        (
+            "post_comments",
+            Comment.objects.filter(post__author_id=user_id),
+            ("thread_id", "path"),
+            _delete_replies,
+        ),
+        ("ratings", Rating.objects.filter(user_id=user_id), ("post_id",), _refresh_posts),
+        (
+            "comments",
+            Comment.objects.filter(author_id=user_id),
+            ("thread_id", "path", "post_id"),
+            _release_comments,
+        ),
+        ("posts", Post.objects.filter(author_id=user_id), ("pk",), _unrank_posts),
+        ("following", Follow.objects.filter(follower_id=user_id), ("followed_id",), _release_followed),
+        ("followers", Follow.objects.filter(followed_id=user_id), ("follower_id",), _release_followers),
+        (
+            "suggestions",
+            FollowSuggestion.objects.filter(Q(user_id=user_id) | Q(suggested_id=user_id)),
+            (),
+            None,
+        ),
+        ("notifications", Notification.objects.filter(user_id=user_id), (), None),
+    ]
+
+
+@shared_task
+def delete_user_account(user_id, chunk_size=None):
+    """
+    Remove a soft-disabled account and everything it owns.
+
+    Dependent rows are raw-deleted in chunks, children before parents, and
+    the counters they fed are adjusted chunk by chunk. Re-running the task
+    after a failure picks up whatever rows are left.
+    """
+    from backend.cache import bump_generation
+
+    User = get_user_model()
+    chunk_size = chunk_size or settings.ACCOUNT_DELETION_CHUNK_SIZE
+    if not User.objects.filter(pk=user_id, deletion_requested_at__isnull=False).exists():
+        return f"No pending deletion for user {user_id}"
+
+    progress = get_deletion_progress(user_id) or {
+        "user_id": user_id,
+        "started_at": timezone.now().isoformat(),
+        "deleted": {},
+    }
+    progress.update(status="running", step=None)
+    _save_progress(progress)
+
+    for label, queryset, fields, on_chunk in _deletion_steps(user_id):
+        progress["step"] = label
+        already = progress["deleted"].get(label, 0)
+        for deleted in delete_in_chunks(queryset, chunk_size, fields, on_chunk):
+            progress["deleted"][label] = already + deleted
+            _save_progress(progress)
+
+    with transaction.atomic():
+        # Only small one-to-one and bookkeeping rows are left for the cascade
+        User.objects.filter(pk=user_id).delete()
+    bump_generation("posts")
+    bump_generation("profiles")
+
+    progress.update(status="completed", step=None, finished_at=timezone.now().isoformat())
+    _save_progress(progress)
+    total = sum(progress["deleted"].values())
+    logger.info(f"Deleted user {user_id} and {total} dependent rows")
+    return f"Deleted user {user_id} and {total} dependent rows"
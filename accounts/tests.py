@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
@@ -12,6 +12,13 @@ from django.core import mail
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django_otp.plugins.otp_totp.models import TOTPDevice
+from django.core.cache import cache
+from django.db import connection
+from accounts.tasks import delete_user_account, get_deletion_progress
+from comments.models import Comment
+from followers.models import Follow
+from posts.models import Post
+from ratings.models import Rating
 
 User = get_user_model()
 
@@ -137,7 +144,9 @@ class AccountsTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["message"], "Your account has been successfully deleted.")
         self.assertEqual(response.data["type"], "success")
-        self.assertFalse(User.objects.filter(email=user.email).exists())
+        user.refresh_from_db()
+        self.assertFalse(user.is_active)
+        self.assertIsNotNone(user.deletion_requested_at)
 
     def test_token_refresh(self):
         user = self.create_user(is_active=True)
@@ -403,7 +412,8 @@ class AccountsViewsTestCase(TestCase):
         self.client.force_authenticate(user=user)
         response = self.client.post(self.delete_account_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertFalse(User.objects.filter(email=user.email).exists())
+        user.refresh_from_db()
+        self.assertIsNotNone(user.deletion_requested_at)
 
     def test_logout_view(self):
         user = self.create_user()
@@ -437,3 +447,89 @@ class AccountsViewsTestCase(TestCase):
         data = {'refresh': 'invalid_token'}
         response = self.client.post(self.token_refresh_url, data)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AccountDeletionTests(TestCase):
+    """Tests for soft-disabling an account and purging it in the background."""
+
+    def setUp(self):
+        cache.clear()
+        self.users = []
+        for i in range(3):
+            user = User.objects.create_user(email=f"leaving{i}@example.com", password="testpass123", is_active=True)
+            Profile.objects.create(user=user, profile_name=f"leaving{i}")
+            self.users.append(user)
+        self.leaving, self.friend, self.fan = self.users
+        own_post = Post.objects.create(author=self.leaving, title="Leaving post", content="Content", is_approved=True)
+        self.other_post = Post.objects.create(author=self.friend, title="Staying post", content="Content", is_approved=True)
+        Rating.objects.create(user=self.friend, post=own_post, value=5)
+        Comment.objects.create(post=own_post, author=self.friend, content="Bye")
+        Rating.objects.create(user=self.leaving, post=self.other_post, value=1)
+        Rating.objects.create(user=self.fan, post=self.other_post, value=5)
+        Comment.objects.create(post=self.other_post, author=self.leaving, content="Hi")
+        Follow.objects.create(follower=self.leaving, followed=self.friend)
+        Follow.objects.create(follower=self.fan, followed=self.leaving)
+
+    @patch("accounts.views.delete_user_account.delay")
+    def test_request_disables_account_and_schedules_purge(self, mock_delay):
+        client = APIClient()
+        client.force_authenticate(user=self.leaving)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.delete(reverse("delete_account"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.leaving.refresh_from_db()
+        self.assertFalse(self.leaving.is_active)
+        self.assertFalse(self.leaving.has_usable_password())
+        self.assertIsNotNone(self.leaving.deletion_requested_at)
+        mock_delay.assert_called_once_with(self.leaving.pk)
+
+    def test_task_ignores_accounts_not_marked_for_deletion(self):
+        self.assertEqual(delete_user_account(self.leaving.pk), f"No pending deletion for user {self.leaving.pk}")
+        self.assertTrue(User.objects.filter(pk=self.leaving.pk).exists())
+
+    def test_task_purges_in_chunks_and_repairs_counters(self):
+        User.objects.filter(pk=self.leaving.pk).update(is_active=False, deletion_requested_at="2024-01-01T00:00:00Z")
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_user_account(self.leaving.pk, chunk_size=1)
+
+        self.assertFalse(User.objects.filter(pk=self.leaving.pk).exists())
+        self.assertFalse(Post.objects.filter(author_id=self.leaving.pk).exists())
+        self.assertFalse(Follow.objects.filter(follower_id=self.leaving.pk).exists())
+        self.other_post.refresh_from_db()
+        self.assertEqual((self.other_post.total_ratings, self.other_post.average_rating), (1, 5.0))
+        self.assertEqual(self.other_post.comments_count, 0)
+        self.assertEqual(Profile.objects.get(user=self.friend).follower_count, 0)
+        self.assertEqual(Profile.objects.get(user=self.fan).following_count, 0)
+
+        progress = get_deletion_progress(self.leaving.pk)
+        self.assertEqual(progress["status"], "completed")
+        self.assertEqual(progress["deleted"]["ratings"], 1)
+        self.assertEqual(progress["deleted"]["followers"], 1)
+
+    @override_settings(ACCOUNT_DELETION_CHUNK_SIZE=2)
+    def test_task_removes_large_reply_subtrees_in_slices(self):
+        thread = Comment.objects.create(post=self.other_post, author=self.leaving, content="Root")
+        for i in range(5):
+            Comment.objects.create(post=self.other_post, author=self.fan, content=f"Answer {i}", parent=thread)
+        User.objects.filter(pk=self.leaving.pk).update(is_active=False, deletion_requested_at="2024-01-01T00:00:00Z")
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_user_account(self.leaving.pk)
+
+        connection.check_constraints()
+        self.assertFalse(Comment.objects.filter(post=self.other_post).exists())
+
+    def test_task_removes_replies_under_purged_comments(self):
+        thread = Comment.objects.create(post=self.other_post, author=self.friend, content="Root")
+        reply = Comment.objects.create(post=self.other_post, author=self.leaving, content="Reply", parent=thread)
+        Comment.objects.create(post=self.other_post, author=self.fan, content="Answer", parent=reply)
+        Comment.objects.filter(pk=thread.pk).update(reply_count=2)
+        User.objects.filter(pk=self.leaving.pk).update(is_active=False, deletion_requested_at="2024-01-01T00:00:00Z")
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_user_account(self.leaving.pk, chunk_size=1)
+
+        connection.check_constraints()
+        self.assertEqual(list(Comment.objects.filter(post=self.other_post)), [thread])
+        thread.refresh_from_db()
+        self.assertEqual(thread.reply_count, 0)
+        self.other_post.refresh_from_db()
+        self.assertEqual(self.other_post.comments_count, 1)
@@ -11,6 +11,7 @@ from .views import (
     SetupTwoFactorView,
     TwoFactorVerifyView,
     AccountDeletionView,
+    AccountDeletionProgressView,
     CustomTokenRefreshView,
     
 )
@@ -54,5 +55,6 @@ urlpatterns = [
     
     # Account deletion    
     path("delete-account/", AccountDeletionView.as_view(), name="delete_account"),
+    path("delete-account/<int:user_id>/progress/", AccountDeletionProgressView.as_view(), name="delete_account_progress"),
 
 ]
@@ -20,8 +20,9 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView, TokenError
 
 from .serializers import UserRegistrationSerializer, LoginSerializer, UserSerializer
+from .tasks import delete_user_account, get_deletion_progress
 from .tokens import account_activation_token
-from backend.permissions import IsOwnerOrAdmin
+from backend.permissions import IsAdminOrSuperUser, IsOwnerOrAdmin
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -119,7 +120,7 @@ class ActivateAccountView(APIView):
         try:
             data = signer.unsign_object(signed_token, max_age=14400)  # 4 hours
             uid = force_str(urlsafe_base64_decode(data['uid']))
-            user = get_object_or_404(User, pk=uid)
+            user = get_object_or_404(User, pk=uid, deletion_requested_at__isnull=True)
 
             if account_activation_token.check_token(user, data['token']):
                 with transaction.atomic():
@@ -150,7 +151,7 @@ class ResendVerificationEmailView(APIView):
         if not email:
             return Response({"message": "Email is required.", "type": "error"}, status=status.HTTP_400_BAD_REQUEST)
 
-        user = User.objects.filter(email=email).first()
+        user = User.objects.filter(email=email, deletion_requested_at__isnull=True).first()
         if not user:
             return Response({"message": "User not found.", "type": "error"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -386,13 +387,26 @@ class AccountDeletionView(generics.DestroyAPIView):
         return self.request.user
 
     def destroy(self, request, *args, **kwargs):
+        # Disable the account now; its content is purged in the background
         user = self.get_object()
-        user.delete()
+        with transaction.atomic():
+            user.is_active = False
+            user.deletion_requested_at = timezone.now()
+            user.set_unusable_password()
+            user.save(update_fields=["is_active", "deletion_requested_at", "password"])
+            transaction.on_commit(lambda: delete_user_account.delay(user.pk))
         return Response({
             "message": "Your account has been successfully deleted.",
             "type": "success",
         }, status=status.HTTP_200_OK)
 
+class AccountDeletionProgressView(APIView):
+    """Report how far the background purge of a deleted account has got."""
+    permission_classes = [IsAdminOrSuperUser]
+
+    def get(self, request, user_id):
+        return Response({"progress": get_deletion_progress(user_id)})
+
 class CurrentUserView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
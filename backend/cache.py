@@ -0,0 +1,111 @@
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from rest_framework import status
+from rest_framework.response import Response
+
+ANONYMOUS = "anonymous"
+AUTHOR = "author"
+MODERATOR = "moderator"
+
+
+def _generation_key(namespace):
+    return f"cache_generation:{namespace}"
+
+
+def get_generation(namespace):
+    """
+    Return the current generation of a cache namespace.
+
+    Generations are seeded from the clock rather than 1, so a counter that
+    is evicted and recreated never reuses a value that older entries were
+    stored under.
+    """
+    key = _generation_key(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(namespace):
+    """Invalidate every entry cached under `namespace`."""
+    key = _generation_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def bump_generation_on_commit(*namespaces):
+    """Bump generations once the surrounding transaction commits.
+
+    Bumping earlier would let a concurrent reader cache pre-commit rows
+    under the new generation.
+    """
+    def bump():
+        for namespace in namespaces:
+            bump_generation(namespace)
+    transaction.on_commit(bump)
+
+
+def visibility_class(request):
+    """Classify the viewer by what a list endpoint may show them."""
+    user = request.user
+    if not user.is_authenticated:
+        return ANONYMOUS
+    if user.has_permission_to(request, "manage_content"):
+        return MODERATOR
+    return AUTHOR
+
+
+def build_list_cache_key(request, namespace):
+    """
+    Build a cache key for a list response.
+
+    The key combines the namespace generation, the viewer's visibility
+    class and the normalized query string. Authenticated responses carry
+    per-viewer fields (`is_owner`, `is_following`, own unapproved rows), so
+    they are also scoped to the user id and to the `viewer:<id>` generation,
+    which is bumped when the viewer's own follow graph changes; anonymous
+    responses are shared.
+    """
+    viewer = visibility_class(request)
+    if viewer == ANONYMOUS:
+        user_scope = "0"
+    else:
+        user_scope = f"{request.user.pk}.{get_generation(f'viewer:{request.user.pk}')}"
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    digest = hashlib.md5(f"{request.path}?{query}".encode()).hexdigest()
+    return f"list_cache:{namespace}:{get_generation(namespace)}:{viewer}:{user_scope}:{digest}"
+
+
+def cache_list_response(namespace, timeout):
+    """
+    Cache the data of a DRF `list` response under a versioned key.
+
+    Writes that affect the listing call `bump_generation(namespace)`, which
+    makes every previously cached page unreachable. Responses are marked
+    private so shared caches and the site-wide cache middleware skip them.
+    """
+    def decorator(list_method):
+        @wraps(list_method)
+        def wrapper(view, request, *args, **kwargs):
+            key = build_list_cache_key(request, namespace)
+            data = cache.get(key)
+            if data is None:
+                response = list_method(view, request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    cache.set(key, response.data, timeout)
+            else:
+                response = Response(data)
+            patch_cache_control(response, private=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,133 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a fixed set of index-backed orderings.
+
+    Each page is fetched with a `WHERE (a, b, id) < (...)` style filter built
+    from the last row of the previous page, so the database never counts the
+    result set or scans past an OFFSET. The position is handed to clients as
+    an opaque, URL-safe cursor token.
+
+    Subclasses declare `orderings`, a mapping of the public ordering value to
+    the tuple of model fields used as the key. The last field must be unique
+    (normally `id`) so that the key is a total order.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    orderings = {"-created_at": ("-created_at", "-id")}
+    default_ordering = "-created_at"
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        self.fields = self.orderings[self.ordering]
+
+        queryset = queryset.order_by(*self.fields)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_filter(position))
+
+        results = list(queryset[: self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if ordering not in self.orderings:
+            raise ValidationError({
+                self.ordering_query_param: f"Cursor pagination supports: {', '.join(self.orderings)}."
+            })
+        return ordering
+
+    def get_seek_filter(self, position):
+        """Build the lexicographic `key > position` filter for the current ordering."""
+        seek = Q()
+        for index, field in enumerate(self.fields):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition = Q(**{f"{name}__{lookup}": position[index]})
+            for previous_field, value in zip(self.fields[:index], position):
+                condition &= Q(**{previous_field.lstrip("-"): value})
+            seek |= condition
+        return seek
+
+    def get_position(self, instance):
+        """Return the key of `instance` as JSON-serializable values."""
+        values = []
+        for field in self.fields:
+            value = getattr(instance, field.lstrip("-"))
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return values
+
+    def encode_cursor(self, position):
+        payload = json.dumps({"o": self.ordering, "p": position}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        return self.decode_token(request.query_params.get(self.cursor_query_param))
+
+    def decode_token(self, token):
+        """Return the position encoded in a cursor token, or None for no token."""
+        if not token:
+            return None
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if payload["o"] != self.ordering or len(payload["p"]) != len(self.fields):
+                raise NotFound(self.invalid_cursor_message)
+            return [
+                self.model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(self.fields, payload["p"])
+            ]
+        except (TypeError, ValueError, KeyError, binascii.Error, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.get_position(self.page[-1])))
+
@@ -168,11 +168,115 @@ CELERY_TASK_TIME_LIMIT = 30 * 60
 CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_ALWAYS_EAGER = False
 
+# Seconds between drains of the dirty popularity sets (see popularity.scheduler)
+POPULARITY_FLUSH_INTERVAL = config("POPULARITY_FLUSH_INTERVAL", default=30, cast=int)
+# Users per grouped recompute query and rows per bulk_update statement
+POPULARITY_BATCH_SIZE = config("POPULARITY_BATCH_SIZE", default=5000, cast=int)
+POPULARITY_BULK_CHUNK_SIZE = config("POPULARITY_BULK_CHUNK_SIZE", default=500, cast=int)
+
+# Seconds between full rebuilds of the followers leaderboard, which applies
+# follow deltas and so cannot repair a delta lost to an earlier rebuild
+FOLLOWER_LEADERBOARD_REBUILD_INTERVAL = config("FOLLOWER_LEADERBOARD_REBUILD_INTERVAL", default=3600, cast=int)
+# Home timelines: posts kept per follower, and the follower count above
+# which an author's posts are merged at read time instead of pushed
+TIMELINE_MAX_LENGTH = config("TIMELINE_MAX_LENGTH", default=500, cast=int)
+TIMELINE_FANOUT_LIMIT = config("TIMELINE_FANOUT_LIMIT", default=10000, cast=int)
+
+# Follow suggestions: candidates kept per user, candidates ranked per user,
+# users recomputed per batch, and seconds between incremental refreshes
+FOLLOW_SUGGESTIONS_PER_USER = config("FOLLOW_SUGGESTIONS_PER_USER", default=20, cast=int)
+FOLLOW_SUGGESTIONS_CANDIDATES_PER_USER = config("FOLLOW_SUGGESTIONS_CANDIDATES_PER_USER", default=200, cast=int)
+FOLLOW_SUGGESTIONS_BATCH_SIZE = config("FOLLOW_SUGGESTIONS_BATCH_SIZE", default=500, cast=int)
+FOLLOW_SUGGESTIONS_REFRESH_INTERVAL = config("FOLLOW_SUGGESTIONS_REFRESH_INTERVAL", default=300, cast=int)
+
+# Buffered notifications: rows per bulk insert, batches per flush, seconds
+# between flushes, seconds a flush may hold its lock, attempts before an
+# event is dead-lettered, and whether a process-local queue (no Redis, so
+# no worker can see it) is flushed by the producing process after commit
+NOTIFICATION_BATCH_SIZE = config("NOTIFICATION_BATCH_SIZE", default=500, cast=int)
+NOTIFICATION_MAX_BATCHES_PER_FLUSH = config("NOTIFICATION_MAX_BATCHES_PER_FLUSH", default=100, cast=int)
+NOTIFICATION_FLUSH_INTERVAL = config("NOTIFICATION_FLUSH_INTERVAL", default=5, cast=int)
+NOTIFICATION_FLUSH_LOCK_TIMEOUT = config("NOTIFICATION_FLUSH_LOCK_TIMEOUT", default=300, cast=int)
+NOTIFICATION_MAX_ATTEMPTS = config("NOTIFICATION_MAX_ATTEMPTS", default=5, cast=int)
+NOTIFICATION_FLUSH_INLINE = config("NOTIFICATION_FLUSH_INLINE", default=True, cast=bool)
+
+# Grouped notifications: seconds an unread group stays open for new events,
+# actor names kept on the row, and actor ids remembered to avoid counting a
+# repeat actor twice
+NOTIFICATION_GROUP_WINDOW = config("NOTIFICATION_GROUP_WINDOW", default=6 * 60 * 60, cast=int)
+NOTIFICATION_GROUP_MAX_ACTORS = config("NOTIFICATION_GROUP_MAX_ACTORS", default=3, cast=int)
+NOTIFICATION_GROUP_MAX_ACTOR_IDS = config("NOTIFICATION_GROUP_MAX_ACTOR_IDS", default=200, cast=int)
+
+# Push delivery: pub/sub broker behind /api/notifications/stream/ and the
+# seconds between keep-alive comments on idle streams
+NOTIFICATION_BROKER = config(
+    "NOTIFICATION_BROKER",
+    default="notifications.delivery.LocalBroker" if DEBUG else "notifications.delivery.RedisBroker",
+)
+NOTIFICATION_BROKER_URL = config("NOTIFICATION_BROKER_URL", default="redis://127.0.0.1:6379/1")
+NOTIFICATION_STREAM_HEARTBEAT = config("NOTIFICATION_STREAM_HEARTBEAT", default=15, cast=int)
+
+# Notification retention: days kept after last activity, per type with a
+# default, ids scanned per delete batch, and an optional archive directory
+# for gzip-compressed JSONL copies of the deleted rows
+NOTIFICATION_RETENTION_DAYS = {
+    "default": {
+        "read": config("NOTIFICATION_READ_TTL_DAYS", default=30, cast=int),
+        "unread": config("NOTIFICATION_UNREAD_TTL_DAYS", default=180, cast=int),
+    },
+    "Rating": {"read": 14, "unread": 90},
+}
+NOTIFICATION_RETENTION_BATCH_SIZE = config("NOTIFICATION_RETENTION_BATCH_SIZE", default=1000, cast=int)
+NOTIFICATION_ARCHIVE_DIR = config("NOTIFICATION_ARCHIVE_DIR", default="")
+
+# Deepest reply level accepted under a top-level comment. Each level adds
+# ten characters to the 255-character materialized path, so keep it below 25
+COMMENT_MAX_DEPTH = config("COMMENT_MAX_DEPTH", default=5, cast=int)
+
+# Replies nested under each top-level comment in a listing; longer threads
+# link to /api/comments/<id>/replies/ for the rest
+COMMENT_REPLIES_PER_THREAD = config("COMMENT_REPLIES_PER_THREAD", default=20, cast=int)
+
+# Rows removed per transaction when a deleted account is purged
+ACCOUNT_DELETION_CHUNK_SIZE = config("ACCOUNT_DELETION_CHUNK_SIZE", default=1000, cast=int)
+
 CELERY_BEAT_SCHEDULE = {
     "update-popularity-scores": {
         "task": "popularity.tasks.update_all_popularity_scores",
         "schedule": crontab(hour=0, minute=0),
     },
+    "flush-dirty-popularity": {
+        "task": "popularity.tasks.flush_dirty_popularity",
+        "schedule": POPULARITY_FLUSH_INTERVAL,
+    },
+    "rebuild-missing-leaderboards": {
+        "task": "popularity.tasks.rebuild_missing_leaderboards",
+        "schedule": 300.0,
+    },
+    "rebuild-follower-leaderboard": {
+        "task": "popularity.tasks.rebuild_follower_leaderboard",
+        "schedule": FOLLOWER_LEADERBOARD_REBUILD_INTERVAL,
+    },
+    "reconcile-post-rating-stats": {
+        "task": "ratings.tasks.reconcile_post_rating_stats",
+        "schedule": crontab(minute=30),
+    },
+    "flush-notifications": {
+        "task": "notifications.tasks.flush_notifications_task",
+        "schedule": NOTIFICATION_FLUSH_INTERVAL,
+    },
+    "purge-expired-notifications": {
+        "task": "notifications.tasks.purge_expired_notifications_task",
+        "schedule": crontab(hour=4, minute=0),
+    },
+    "refresh-follow-suggestions": {
+        "task": "followers.tasks.refresh_follow_suggestions",
+        "schedule": FOLLOW_SUGGESTIONS_REFRESH_INTERVAL,
+    },
+    "rebuild-follow-suggestions": {
+        "task": "followers.tasks.rebuild_follow_suggestions",
+        "schedule": crontab(hour=3, minute=0),
+    },
 }
 
 # Cache Configuration (Redis for production)
@@ -207,6 +311,7 @@ REST_FRAMEWORK = {
         "anon": "100/day",
         "user": "1000/day",
         "auth": "5/minute",
+        "notification_count": "120/minute",
     },
     "DEFAULT_PARSER_CLASSES": [
         "rest_framework.parsers.JSONParser",
@@ -0,0 +1,434 @@
+"""
+Redis data structures with in-process fallbacks.
+
+When the default cache is django-redis the structures talk to Redis
+directly, so they are shared by every web and worker process. Otherwise
+(local development and tests) they live in process memory.
+"""
+import bisect
+import json
+import threading
+from collections import deque
+
+from django.conf import settings
+
+_local_lock = threading.Lock()
+_local_sets = {}
+_local_sorted_sets = {}
+_local_queues = {}
+
+
+def get_redis():
+    """Return the raw Redis client behind the default cache, or None."""
+    if "django_redis" not in settings.CACHES["default"]["BACKEND"]:
+        return None
+    from django_redis import get_redis_connection
+    return get_redis_connection("default")
+
+
+def reset_local_structures():
+    """Clear the in-process fallbacks. Used by tests."""
+    with _local_lock:
+        _local_sets.clear()
+        _local_sorted_sets.clear()
+        _local_queues.clear()
+
+
+class DirtySet:
+    """A set of integer ids that producers mark and a single consumer drains."""
+
+    def __init__(self, name):
+        self.key = f"dirty:{name}"
+
+    def add(self, *members):
+        if not members:
+            return
+        client = get_redis()
+        if client is not None:
+            client.sadd(self.key, *members)
+            return
+        with _local_lock:
+            _local_sets.setdefault(self.key, set()).update(int(member) for member in members)
+
+    def drain(self):
+        """Atomically remove and return every member."""
+        client = get_redis()
+        if client is not None:
+            pipe = client.pipeline(transaction=True)
+            pipe.smembers(self.key)
+            pipe.delete(self.key)
+            members, _ = pipe.execute()
+            return {int(member) for member in members}
+        with _local_lock:
+            return _local_sets.pop(self.key, set())
+
+    def size(self):
+        client = get_redis()
+        if client is not None:
+            return client.scard(self.key)
+        with _local_lock:
+            return len(_local_sets.get(self.key, ()))
+
+
+_RESERVE_SCRIPT = """
+local items = {}
+for i = 1, tonumber(ARGV[1]) do
+    local item = redis.call('LMOVE', KEYS[1], KEYS[2], 'LEFT', 'RIGHT')
+    if not item then
+        break
+    end
+    items[i] = item
+end
+return items
+"""
+
+_REQUEUE_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[2], 0, -1)
+for i = #items, 1, -1 do
+    redis.call('LPUSH', KEYS[1], items[i])
+end
+redis.call('DEL', KEYS[2])
+return #items
+"""
+
+
+class Queue:
+    """
+    A FIFO of JSON-serializable items that producers push and one consumer
+    reserves in batches.
+
+    Reserved items sit on a processing list until the consumer acknowledges
+    them, so a consumer that dies mid-batch leaves them to be requeued
+    instead of losing them. Items that cannot be processed can be moved to
+    a dead-letter list for inspection.
+    """
+
+    def __init__(self, name):
+        self.key = f"queue:{name}"
+        self.processing_key = f"{self.key}:processing"
+        self.dead_key = f"{self.key}:dead"
+
+    @property
+    def shared(self):
+        """Whether other processes see the queue, i.e. it lives in Redis."""
+        return get_redis() is not None
+
+    def push(self, *items):
+        self._push(self.key, items)
+
+    def dead_letter(self, *items):
+        self._push(self.dead_key, items)
+
+    def _push(self, key, items):
+        if not items:
+            return
+        encoded = [json.dumps(item) for item in items]
+        client = get_redis()
+        if client is not None:
+            client.rpush(key, *encoded)
+            return
+        with _local_lock:
+            _local_queues.setdefault(key, deque()).extend(encoded)
+
+    def reserve(self, size):
+        """Atomically move up to `size` items from the head to the processing list and return them."""
+        client = get_redis()
+        if client is not None:
+            encoded = client.eval(_RESERVE_SCRIPT, 2, self.key, self.processing_key, size)
+        else:
+            with _local_lock:
+                entries = _local_queues.get(self.key, deque())
+                encoded = [entries.popleft() for _ in range(min(size, len(entries)))]
+                _local_queues.setdefault(self.processing_key, deque()).extend(encoded)
+        return [json.loads(item) for item in encoded]
+
+    def ack(self, *items):
+        """Drop reserved items from the processing list once they are handled."""
+        if not items:
+            return
+        encoded = [json.dumps(item) for item in items]
+        client = get_redis()
+        if client is not None:
+            pipe = client.pipeline(transaction=True)
+            for item in encoded:
+                pipe.lrem(self.processing_key, 1, item)
+            pipe.execute()
+            return
+        with _local_lock:
+            processing = _local_queues.get(self.processing_key, deque())
+            for item in encoded:
+                try:
+                    processing.remove(item)
+                except ValueError:
+                    pass
+
+    def requeue_unacked(self):
+        """
+        Put every reserved but unacknowledged item back at the head, in order.
+        Only safe while no consumer is working; returns the number requeued.
+        """
+        client = get_redis()
+        if client is not None:
+            return client.eval(_REQUEUE_SCRIPT, 2, self.key, self.processing_key)
+        with _local_lock:
+            processing = _local_queues.pop(self.processing_key, deque())
+            _local_queues.setdefault(self.key, deque()).extendleft(reversed(processing))
+            return len(processing)
+
+    def size(self):
+        return self._size(self.key)
+
+    def dead_size(self):
+        return self._size(self.dead_key)
+
+    def _size(self, key):
+        client = get_redis()
+        if client is not None:
+            return client.llen(key)
+        with _local_lock:
+            return len(_local_queues.get(key, ()))
+
+
+_ADD_TO_EXISTING_SCRIPT = """
+local updated = 0
+local max_size = tonumber(ARGV[3])
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('ZADD', key, ARGV[2], ARGV[1])
+        if max_size > 0 then
+            redis.call('ZREMRANGEBYRANK', key, 0, -max_size - 1)
+        end
+        updated = updated + 1
+    end
+end
+return updated
+"""
+
+
+class _LocalSortedSet:
+    """In-process stand-in for a Redis sorted set, ordered by score descending."""
+
+    def __init__(self):
+        self.scores = {}
+        self.order = []
+
+    def add(self, member, score):
+        self.remove(member)
+        self.scores[member] = score
+        bisect.insort(self.order, (-score, member))
+
+    def remove(self, member):
+        score = self.scores.pop(member, None)
+        if score is not None:
+            del self.order[bisect.bisect_left(self.order, (-score, member))]
+
+
+class SortedSet:
+    """
+    Integer members ranked by a float score, highest first.
+
+    Ranks are zero-based as in Redis. Ties are ordered by member; Redis and
+    the in-process fallback may break them differently.
+    """
+
+    def __init__(self, name):
+        self.key = f"zset:{name}"
+
+    def add(self, member, score):
+        self.add_many({member: score})
+
+    def add_many(self, scores):
+        """Set the score of every member in the `{member: score}` mapping."""
+        if not scores:
+            return
+        client = get_redis()
+        if client is not None:
+            client.zadd(self.key, scores)
+            return
+        with _local_lock:
+            entries = _local_sorted_sets.setdefault(self.key, _LocalSortedSet())
+            for member, score in scores.items():
+                entries.add(int(member), float(score))
+
+    def increment(self, member, delta):
+        self.increment_many({member: delta})
+
+    def increment_many(self, deltas):
+        """Add each delta in the `{member: delta}` mapping to its member's score."""
+        client = get_redis()
+        if client is not None:
+            pipe = client.pipeline(transaction=False)
+            for member, delta in deltas.items():
+                pipe.zincrby(self.key, delta, member)
+            pipe.execute()
+            return
+        with _local_lock:
+            entries = _local_sorted_sets.setdefault(self.key, _LocalSortedSet())
+            for member, delta in deltas.items():
+                entries.add(int(member), entries.scores.get(int(member), 0.0) + delta)
+
+    def remove(self, member):
+        client = get_redis()
+        if client is not None:
+            client.zrem(self.key, member)
+            return
+        with _local_lock:
+            entries = _local_sorted_sets.get(self.key)
+            if entries is not None:
+                entries.remove(int(member))
+
+    def exists(self):
+        client = get_redis()
+        if client is not None:
+            return bool(client.exists(self.key))
+        with _local_lock:
+            return self.key in _local_sorted_sets
+
+    def size(self):
+        client = get_redis()
+        if client is not None:
+            return client.zcard(self.key)
+        with _local_lock:
+            entries = _local_sorted_sets.get(self.key)
+            return len(entries.order) if entries is not None else 0
+
+    def score(self, member):
+        client = get_redis()
+        if client is not None:
+            return client.zscore(self.key, member)
+        with _local_lock:
+            entries = _local_sorted_sets.get(self.key)
+            return entries.scores.get(int(member)) if entries is not None else None
+
+    def rank(self, member):
+        """Zero-based rank of `member`, or None when it is not ranked."""
+        client = get_redis()
+        if client is not None:
+            return client.zrevrank(self.key, member)
+        with _local_lock:
+            entries = _local_sorted_sets.get(self.key)
+            if entries is None or int(member) not in entries.scores:
+                return None
+            return bisect.bisect_left(entries.order, (-entries.scores[int(member)], int(member)))
+
+    def range(self, start, stop):
+        """Return `(member, score)` pairs for ranks `start` to `stop` inclusive."""
+        client = get_redis()
+        if client is not None:
+            return [
+                (int(member), score)
+                for member, score in client.zrevrange(self.key, start, stop, withscores=True)
+            ]
+        with _local_lock:
+            entries = _local_sorted_sets.get(self.key)
+            if entries is None:
+                return []
+            return [(member, -score) for score, member in entries.order[start:stop + 1]]
+
+    def members_below(self, max_score, limit, max_member=None):
+        """
+        Return up to `limit` `(member, score)` pairs below `max_score`, ordered
+        by score then member, highest first. Members tied at `max_score` are
+        included when they are below `max_member`, so `(score, member)` of the
+        last pair returned is a cursor for the next call.
+        """
+        client = get_redis()
+        if client is not None:
+            rows = {}
+            if max_score is not None and max_member is not None:
+                rows.update(
+                    (int(member), score)
+                    for member, score in client.zrangebyscore(self.key, max_score, max_score, withscores=True)
+                    if int(member) < max_member
+                )
+            upper = "+inf" if max_score is None else f"({max_score!r}"
+            below = client.zrevrangebyscore(self.key, upper, "-inf", start=0, num=limit, withscores=True)
+            rows.update((int(member), score) for member, score in below)
+            if len(below) == limit:
+                # Redis orders equal scores by member string, not number, so
+                # take every member tied at the cut and let the sort decide
+                boundary = below[-1][1]
+                rows.update(
+                    (int(member), score)
+                    for member, score in client.zrangebyscore(self.key, boundary, boundary, withscores=True)
+                )
+            pairs = rows.items()
+        else:
+            with _local_lock:
+                entries = _local_sorted_sets.get(self.key)
+                pairs = [(member, -score) for score, member in entries.order] if entries is not None else []
+            if max_score is not None:
+                pairs = [
+                    (member, score) for member, score in pairs
+                    if score < max_score or (score == max_score and max_member is not None and member < max_member)
+                ]
+        return sorted(pairs, key=lambda pair: (pair[1], pair[0]), reverse=True)[:limit]
+
+    def delete(self):
+        client = get_redis()
+        if client is not None:
+            client.delete(self.key)
+            return
+        with _local_lock:
+            _local_sorted_sets.pop(self.key, None)
+
+    @classmethod
+    def add_to_existing(cls, names, member, score, max_size=0):
+        """
+        Add `member` to each named set that already exists, then trim it to
+        its `max_size` best members (0 means unbounded). Missing sets are
+        left alone so a lazily rebuilt set is never partially filled.
+        Returns the number of sets updated.
+        """
+        keys = [cls(name).key for name in names]
+        if not keys:
+            return 0
+        client = get_redis()
+        if client is not None:
+            return client.eval(_ADD_TO_EXISTING_SCRIPT, len(keys), *keys, member, score, max_size)
+        updated = 0
+        with _local_lock:
+            for key in keys:
+                entries = _local_sorted_sets.get(key)
+                if entries is None:
+                    continue
+                entries.add(int(member), float(score))
+                for _, dropped in entries.order[max_size:] if max_size else ():
+                    entries.remove(dropped)
+                updated += 1
+        return updated
+
+    def replace(self, pairs, chunk_size=1000):
+        """
+        Atomically replace the contents with `(member, score)` pairs.
+
+        Redis builds a temporary key in pipelined chunks and renames it over
+        the live one, so readers never see a half-built set. On both
+        backends an empty rebuild leaves no set behind.
+        """
+        client = get_redis()
+        if client is not None:
+            temp_key = f"{self.key}:rebuild"
+            client.delete(temp_key)
+            chunk = {}
+            for member, score in pairs:
+                chunk[member] = score
+                if len(chunk) >= chunk_size:
+                    client.zadd(temp_key, chunk)
+                    chunk = {}
+            if chunk:
+                client.zadd(temp_key, chunk)
+            if client.exists(temp_key):
+                client.rename(temp_key, self.key)
+            else:
+                client.delete(self.key)
+            return
+        entries = _LocalSortedSet()
+        for member, score in pairs:
+            entries.add(int(member), float(score))
+        with _local_lock:
+            # Like Redis, which has no empty sorted sets, an empty rebuild leaves no set
+            if entries.order:
+                _local_sorted_sets[self.key] = entries
+            else:
+                _local_sorted_sets.pop(self.key, None)
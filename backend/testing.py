@@ -0,0 +1,14 @@
+"""Fixtures shared by the app test suites."""
+from django.contrib.auth import get_user_model
+from profiles.models import Profile
+
+
+class UserFixturesMixin:
+    """Test case mixin for creating active users with their profiles."""
+
+    @staticmethod
+    def _create_user(email, profile_name):
+        """Create an active user together with their profile."""
+        user = get_user_model().objects.create_user(email=email, password="testpass123", is_active=True)
+        Profile.objects.create(user=user, profile_name=profile_name)
+        return user
@@ -14,6 +14,7 @@ urlpatterns = [
     path("api/", include("ratings.urls")),
     path("api/followers/", include("followers.urls")),
     path("api/", include("notifications.urls")),
+    path("api/popularity/", include("popularity.urls")),
 ]
 
 if settings.DEBUG:
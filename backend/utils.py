@@ -1,5 +1,6 @@
 from django.core.exceptions import ValidationError
 from django.core.files.images import get_image_dimensions
+from django.db import connections, router
 
 
 def validate_image(image):
@@ -25,3 +26,23 @@ def validate_image(image):
             )
 
     return image
+
+
+def delete_rows(model, pks):
+    """
+    Delete rows of `model` by primary key with one DELETE statement.
+
+    No signals are sent and no cascades are collected, so callers keep
+    counters and dependent rows consistent themselves. Returns the number
+    of rows deleted.
+    """
+    pks = list(pks)
+    if not pks:
+        return 0
+    connection = connections[router.db_for_write(model)]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    placeholders = ", ".join(["%s"] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", pks)
+        return cursor.rowcount
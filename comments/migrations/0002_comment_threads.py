@@ -0,0 +1,88 @@
+# Generated by Django 5.1.2 on 2026-10-17 07:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+PATH_SEGMENT = 10
+
+
+def backfill_threads(apps, schema_editor):
+    """Existing comments are all top level: each is the root of its own thread."""
+    Comment = apps.get_model("comments", "Comment")
+    batch = []
+    for comment in Comment.objects.only("pk").iterator(chunk_size=1000):
+        comment.thread_id = comment.pk
+        comment.path = f"{comment.pk:0{PATH_SEGMENT}d}"
+        batch.append(comment)
+        if len(batch) == 1000:
+            Comment.objects.bulk_update(batch, ["thread", "path"])
+            batch = []
+    if batch:
+        Comment.objects.bulk_update(batch, ["thread", "path"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("comments", "0001_initial"),
+        ("posts", "0003_post_rating_sum"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="depth",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="replies",
+                to="comments.comment",
+            ),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="path",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=255
+            ),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="reply_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="thread",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="comments.comment",
+            ),
+        ),
+        migrations.RunPython(backfill_threads, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["post", "depth", "-created_at"],
+                name="comments_co_post_id_34bc87_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["thread", "path"], name="comments_co_thread__d14d60_idx"
+            ),
+        ),
+    ]
@@ -1,18 +1,96 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from posts.models import Post
 
+# Width of one zero-padded id in a materialized path
+PATH_SEGMENT = 10
+
+
+def subtree_filter(nodes):
+    """A Q matching the given `(thread_id, path)` comments and everything below them."""
+    query = Q(pk__in=[])
+    for thread_id, path in nodes:
+        query |= Q(thread_id=thread_id, path__startswith=path)
+    return query
+
+
+class CommentQuerySet(models.QuerySet):
+    def roots(self):
+        return self.filter(depth=0)
+
+    def for_list(self, post_id):
+        """Approved top-level comments of a post, with what the serializers read joined in."""
+        return self.roots().filter(post_id=post_id, is_approved=True).select_related("author__profile")
+
+    def replies_to(self, thread_ids):
+        """Replies of the given threads in tree order, one index range per thread."""
+        return self.filter(thread_id__in=thread_ids, depth__gt=0).order_by("thread_id", "path")
+
+    def recount_replies(self) -> int:
+        """Recompute `reply_count` of the threads in the queryset with one UPDATE."""
+        replies = (
+            Comment.objects.filter(thread=OuterRef("pk"), depth__gt=0, is_approved=True)
+            .order_by()
+            .values("thread")
+        )
+        return self.update(
+            reply_count=Coalesce(Subquery(replies.annotate(total=Count("id")).values("total")), 0)
+        )
+
+
 class Comment(models.Model):
+    """
+    A comment or a reply.
+
+    Replies keep a materialized `path` of zero-padded ids from the thread's
+    root down to themselves, so ordering a thread by path yields it in tree
+    order and a whole thread is one range of the (thread, path) index.
+    Root comments carry the number of approved replies in their thread.
+    """
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="comments")
     content = models.TextField(help_text="Content of the comment.")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_approved = models.BooleanField(default=True)
+    parent = models.ForeignKey(
+        "self", null=True, blank=True, on_delete=models.CASCADE, related_name="replies"
+    )
+    thread = models.ForeignKey(
+        "self", null=True, blank=True, editable=False, on_delete=models.CASCADE, related_name="+"
+    )
+    path = models.CharField(max_length=255, blank=True, default="", editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["post", "-created_at"])]
+        indexes = [
+            models.Index(fields=["post", "-created_at"]),
+            models.Index(fields=["post", "depth", "-created_at"]),
+            models.Index(fields=["thread", "path"]),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.profile.profile_name} on {self.post.title}"
+
+    def save(self, *args, **kwargs):
+        creating = self._state.adding
+        if creating and self.parent_id:
+            self.depth = self.parent.depth + 1
+        super().save(*args, **kwargs)
+        if creating:
+            # The path ends with the row's own id, known only after the insert
+            prefix = self.parent.path if self.parent_id else ""
+            self.path = f"{prefix}{self.pk:0{PATH_SEGMENT}d}"
+            self.thread_id = self.parent.thread_id if self.parent_id else self.pk
+            Comment.objects.filter(pk=self.pk).update(path=self.path, thread_id=self.thread_id)
+
+    @classmethod
+    def adjust_reply_count(cls, thread_id: int, delta: int) -> None:
+        """Atomically shift the denormalized reply counter of a thread."""
+        cls.objects.filter(pk=thread_id).update(reply_count=Greatest(models.F("reply_count") + delta, 0))
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Comment
 
@@ -7,7 +8,10 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = ["id", "post", "author", "author_image", "content", "created_at", "updated_at", "is_approved"]
+        fields = [
+            "id", "post", "parent", "depth", "reply_count", "author", "author_image",
+            "content", "created_at", "updated_at", "is_approved",
+        ]
         read_only_fields = ["id", "author", "created_at", "updated_at", "is_approved", "post"]
 
     def get_author_image(self, obj):
@@ -21,3 +25,45 @@ class CommentSerializer(serializers.ModelSerializer):
         if not value.is_approved:
             raise serializers.ValidationError("Cannot comment on an unapproved post.")
         return value
+
+    def validate_parent(self, value):
+        if self.instance is not None:
+            if value != self.instance.parent:
+                raise serializers.ValidationError("Replies cannot be moved.")
+            return value
+        if value is None:
+            return value
+        view = self.context.get("view")
+        post_id = view.kwargs.get("post_id") if view is not None else None
+        if post_id is not None and value.post_id != int(post_id):
+            raise serializers.ValidationError("Cannot reply to a comment on another post.")
+        if not value.is_approved:
+            raise serializers.ValidationError("Cannot reply to an unapproved comment.")
+        if value.depth >= settings.COMMENT_MAX_DEPTH:
+            raise serializers.ValidationError("Maximum reply depth reached.")
+        return value
+
+
+class CommentThreadSerializer(CommentSerializer):
+    """
+    A comment with its replies nested, read from `context["replies"]` (see
+    comments.threads). `replies_next` links to the rest of a thread that was
+    cut short, and is null otherwise.
+    """
+    replies = serializers.SerializerMethodField()
+    replies_next = serializers.SerializerMethodField()
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ["replies", "replies_next"]
+
+    def get_replies(self, obj):
+        children = self.context.get("replies", {}).get(obj.pk, [])
+        return CommentThreadSerializer(children, many=True, context=self.context).data
+
+    def get_replies_next(self, obj):
+        from .views import ReplyPagination
+
+        last_reply = self.context.get("truncated_threads", {}).get(obj.pk)
+        if last_reply is None:
+            return None
+        return ReplyPagination().link_after(self.context.get("request"), obj.pk, last_reply)
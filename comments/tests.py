@@ -1,7 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from backend.testing import UserFixturesMixin
 from .models import Comment
 from posts.models import Post
 
@@ -128,4 +133,136 @@ class CommentTests(APITestCase):
         moderate_url = reverse("comment-moderate", kwargs={"pk": self.comment1.id})
         response = self.client.patch(moderate_url, {"action": "approve"})
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
-        self.client.force_authenticate(user=None)
\ No newline at end of file
+        self.client.force_authenticate(user=None)
+
+class CommentCounterTests(UserFixturesMixin, APITestCase):
+    """Tests for the denormalized comments_count on Post."""
+
+    def setUp(self):
+        self.user = self._create_user("author@example.com", "author")
+        self.admin = User.objects.create_superuser(email="admin@example.com", password="adminpass123")
+        self.post = Post.objects.create(author=self.user, title="Counted Post", content="Content", is_approved=True)
+        self.comment_url = reverse("comment-list", kwargs={"post_id": self.post.id})
+
+    def _comments_count(self):
+        self.post.refresh_from_db()
+        return self.post.comments_count
+
+    def test_create_and_delete_update_counter(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(self.comment_url, {"content": "Counted"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._comments_count(), 1)
+        response = self.client.delete(reverse("comment-detail", kwargs={"pk": response.data["id"]}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self._comments_count(), 0)
+
+    def test_moderation_updates_counter_once(self):
+        comment = Comment.objects.create(post=self.post, author=self.user, content="Moderated")
+        Post.adjust_comments_count(self.post.id, 1)
+        self.client.force_authenticate(user=self.admin)
+        moderate_url = reverse("comment-moderate", kwargs={"pk": comment.id})
+        self.client.patch(moderate_url, {"action": "disapprove"})
+        self.client.patch(moderate_url, {"action": "disapprove"})
+        self.assertEqual(self._comments_count(), 0)
+        self.client.patch(moderate_url, {"action": "approve"})
+        self.assertEqual(self._comments_count(), 1)
+
+
+class CommentThreadTests(UserFixturesMixin, APITestCase):
+    """Tests for reply threads and their denormalized counters."""
+
+    def setUp(self):
+        self.user = self._create_user("threads@example.com", "threads")
+        self.post = Post.objects.create(author=self.user, title="Threaded Post", content="Content", is_approved=True)
+        self.comment_url = reverse("comment-list", kwargs={"post_id": self.post.id})
+        self.client.force_authenticate(user=self.user)
+        cache.clear()
+
+    def _reply(self, parent, content="Reply"):
+        return self.client.post(self.comment_url, {"content": content, "parent": parent.pk if parent else ""})
+
+    def _chain(self, root, length):
+        parent = root
+        for i in range(length):
+            parent = Comment.objects.create(post=self.post, author=self.user, content=f"Level {i}", parent=parent)
+        return parent
+
+    def test_reply_extends_parent_path_and_thread_count(self):
+        root = Comment.objects.create(post=self.post, author=self.user, content="Root")
+        response = self._reply(root)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        reply = Comment.objects.get(pk=response.data["id"])
+        self.assertEqual((reply.thread_id, reply.depth), (root.pk, 1))
+        self.assertEqual(reply.path, f"{root.pk:010d}{reply.pk:010d}")
+        root.refresh_from_db()
+        self.assertEqual((root.thread_id, root.reply_count), (root.pk, 1))
+
+    def test_list_nests_threads_without_extra_queries_per_level(self):
+        shallow = Comment.objects.create(post=self.post, author=self.user, content="Shallow")
+        first = Comment.objects.create(post=self.post, author=self.user, content="First", parent=shallow)
+        second = Comment.objects.create(post=self.post, author=self.user, content="Second", parent=shallow)
+        Comment.objects.create(post=self.post, author=self.user, content="Nested", parent=first)
+
+        with CaptureQueriesContext(connection) as shallow_queries:
+            response = self.client.get(self.comment_url)
+        replies = response.data["results"][0]["replies"]
+        self.assertEqual([reply["id"] for reply in replies], [first.pk, second.pk])
+        self.assertEqual(replies[0]["replies"][0]["content"], "Nested")
+
+        deep = Comment.objects.create(post=self.post, author=self.user, content="Deep")
+        self._chain(deep, 5)
+        cache.clear()
+        with CaptureQueriesContext(connection) as deep_queries:
+            response = self.client.get(self.comment_url)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(len(deep_queries), len(shallow_queries))
+
+    @override_settings(COMMENT_REPLIES_PER_THREAD=2)
+    def test_long_threads_are_cut_and_continue_at_the_replies_endpoint(self):
+        root = Comment.objects.create(post=self.post, author=self.user, content="Root")
+        first = Comment.objects.create(post=self.post, author=self.user, content="First", parent=root)
+        nested = Comment.objects.create(post=self.post, author=self.user, content="Nested", parent=first)
+        second = Comment.objects.create(post=self.post, author=self.user, content="Second", parent=root)
+        hidden = Comment.objects.create(post=self.post, author=self.user, content="Hidden", parent=root, is_approved=False)
+        Comment.objects.create(post=self.post, author=self.user, content="Under hidden", parent=hidden)
+        short = Comment.objects.create(post=self.post, author=self.user, content="Short")
+        Comment.objects.create(post=self.post, author=self.user, content="Only", parent=short)
+
+        results = self.client.get(self.comment_url).data["results"]
+        threads = {thread["id"]: thread for thread in results}
+        self.assertEqual([reply["id"] for reply in threads[root.pk]["replies"]], [first.pk])
+        self.assertEqual(threads[root.pk]["replies"][0]["replies"][0]["id"], nested.pk)
+        self.assertIsNone(threads[short.pk]["replies_next"])
+
+        response = self.client.get(threads[root.pk]["replies_next"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([reply["id"] for reply in response.data["results"]], [second.pk])
+        self.assertIsNone(response.data["next"])
+
+    @override_settings(COMMENT_MAX_DEPTH=2)
+    def test_replies_are_limited_in_depth(self):
+        root = Comment.objects.create(post=self.post, author=self.user, content="Root")
+        leaf = self._chain(root, 2)
+        response = self._reply(leaf)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("parent", response.data)
+
+    def test_cannot_reply_across_posts(self):
+        other_post = Post.objects.create(author=self.user, title="Elsewhere", content="Content", is_approved=True)
+        foreign = Comment.objects.create(post=other_post, author=self.user, content="Elsewhere")
+        response = self._reply(foreign)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deleting_a_reply_removes_its_subtree_from_the_counters(self):
+        root = Comment.objects.create(post=self.post, author=self.user, content="Root")
+        reply = Comment.objects.get(pk=self._reply(root).data["id"])
+        self._reply(reply)
+        self._reply(root)
+        response = self.client.delete(reverse("comment-detail", kwargs={"pk": reply.pk}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        root.refresh_from_db()
+        self.post.refresh_from_db()
+        self.assertEqual(root.reply_count, 1)
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(Comment.objects.filter(thread=root).count(), 2)
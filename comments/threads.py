@@ -0,0 +1,54 @@
+"""
+Reply threads.
+
+A page of top-level comments is expanded with one query for the replies of
+all its threads, read in (thread, path) order straight off the index and
+nested in memory, so the number of queries does not grow with the number
+or depth of replies. Each thread contributes at most
+`COMMENT_REPLIES_PER_THREAD` replies; a longer thread carries a link to
+the replies endpoint, which continues it after the last reply shown.
+"""
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comment
+
+
+def serialize_threads(roots, context):
+    """Serialize top-level comments with their reply threads nested."""
+    from .serializers import CommentThreadSerializer
+
+    replies, truncated = load_replies(roots)
+    context = {**context, "replies": replies, "truncated_threads": truncated}
+    return CommentThreadSerializer(roots, many=True, context=context).data
+
+
+def load_replies(roots, limit=None):
+    """
+    Return `({parent_id: [replies]}, {thread_id: last_reply})` for the approved
+    replies under `roots`, in tree order and at most `limit` per thread. The
+    second mapping holds the last reply loaded of each thread that has more.
+    """
+    limit = limit or settings.COMMENT_REPLIES_PER_THREAD
+    children, truncated = {}, {}
+    thread_ids = [root.pk for root in roots]
+    if not thread_ids:
+        return children, truncated
+    replies = (
+        Comment.objects.replies_to(thread_ids)
+        .filter(is_approved=True)
+        .annotate(position=Window(RowNumber(), partition_by=F("thread_id"), order_by=F("path").asc()))
+        # One reply past the limit tells whether the thread goes on
+        .filter(position__lte=limit + 1)
+        .select_related("author__profile")
+    )
+    previous = None
+    for reply in replies:
+        if reply.position > limit:
+            truncated[reply.thread_id] = previous
+            continue
+        # Replies under an unapproved comment are never looked up, so they stay hidden
+        children.setdefault(reply.parent_id, []).append(reply)
+        previous = reply
+    return children, truncated
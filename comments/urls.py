@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import CommentList, CommentDetail, ModerateComment
+from .views import CommentList, CommentDetail, CommentReplies, ModerateComment
 
 urlpatterns = [
     path("posts/<int:post_id>/comments/", CommentList.as_view(), name="comment-list"),
     path("comments/<int:pk>/", CommentDetail.as_view(), name="comment-detail"),
+    path("comments/<int:pk>/replies/", CommentReplies.as_view(), name="comment-replies"),
     path("comments/<int:pk>/moderate/", ModerateComment.as_view(), name="comment-moderate"),
 ]
\ No newline at end of file
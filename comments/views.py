@@ -1,19 +1,68 @@
+from django.db import transaction
 from rest_framework import generics, status
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from posts.models import Post
-from .models import Comment
+from .models import Comment, subtree_filter
 from .serializers import CommentSerializer
+from .threads import serialize_threads
+from backend.pagination import KeysetPagination
 from backend.permissions import IsOwnerOrAdmin, IsAdminOrSuperUser
 
-class CommentPagination(PageNumberPagination):
+class CommentPagination(KeysetPagination):
+    """Keyset pagination over the top-level comments of a post, newest first."""
     page_size = 10
-    page_size_query_param = "page_size"
-    max_page_size = 100
+    orderings = {"-created_at": ("-created_at", "-id")}
+    default_ordering = "-created_at"
+    url = None
+
+    def paginate_first_page(self, queryset, request, url):
+        """
+        Return the first page of `queryset` for embedding in another response.
+        The next link continues at `url`, the comment listing itself.
+        """
+        self.request = request
+        self.model = queryset.model
+        self.ordering = self.default_ordering
+        self.fields = self.orderings[self.ordering]
+        self.url = url
+
+        results = list(queryset.order_by(*self.fields)[: self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if self.url is None:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return replace_query_param(self.url, self.cursor_query_param, self.encode_cursor(self.get_position(self.page[-1])))
+
+class ReplyPagination(KeysetPagination):
+    """Keyset pagination over the replies under a comment, in tree order."""
+    page_size = 20
+    orderings = {"path": ("path",)}
+    default_ordering = "path"
+
+    def link_after(self, request, comment_id, reply):
+        """Link to the replies under `comment_id` that follow `reply`."""
+        self.model = Comment
+        self.ordering = self.default_ordering
+        self.fields = self.orderings[self.ordering]
+        url = reverse("comment-replies", kwargs={"pk": comment_id})
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.get_position(reply)))
 
 class CommentList(generics.ListCreateAPIView):
+    """
+    Top-level comments of a post, newest first, each with its reply thread
+    nested in tree order. Replies of the whole page are loaded with one query.
+    """
     serializer_class = CommentSerializer
     pagination_class = CommentPagination
 
@@ -23,31 +72,77 @@ class CommentList(generics.ListCreateAPIView):
         return [AllowAny()]
 
     def get_queryset(self):
-        return Comment.objects.filter(
-            post_id=self.kwargs["post_id"],
-            is_approved=True
-        ).select_related("author__profile")
+        return Comment.objects.for_list(self.kwargs["post_id"])
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        return self.get_paginated_response(serialize_threads(page, self.get_serializer_context()))
 
+    @transaction.atomic
     def perform_create(self, serializer):
         post = get_object_or_404(Post, pk=self.kwargs["post_id"])
-        serializer.save(author=self.request.user, post=post)
+        comment = serializer.save(author=self.request.user, post=post)
+        if comment.is_approved:
+            Post.adjust_comments_count(post.pk, 1)
+            if comment.depth:
+                Comment.adjust_reply_count(comment.thread_id, 1)
+
+class CommentReplies(generics.ListAPIView):
+    """
+    Approved replies under a comment as a flat list in tree order, each with
+    its `parent` and `depth`. Continues threads cut short in comment listings.
+    """
+    serializer_class = CommentSerializer
+    pagination_class = ReplyPagination
+    permission_classes = [AllowAny]
+
+    def get_queryset(self):
+        comment = get_object_or_404(Comment, pk=self.kwargs["pk"], is_approved=True)
+        subtree = Comment.objects.filter(subtree_filter([(comment.thread_id, comment.path)]))
+        # Replies under an unapproved comment stay hidden, as in the nested listing
+        hidden = subtree.filter(is_approved=False).values_list("thread_id", "path")
+        return (
+            subtree.filter(is_approved=True)
+            .exclude(pk=comment.pk)
+            .exclude(subtree_filter(hidden))
+            .select_related("author__profile")
+        )
 
 class CommentDetail(generics.RetrieveUpdateDestroyAPIView):
     queryset = Comment.objects.select_related("author__profile", "post")
     serializer_class = CommentSerializer
     permission_classes = [IsOwnerOrAdmin]
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        # Replies go with the comment, so count every approved row of the subtree
+        removed = Comment.objects.filter(
+            subtree_filter([(instance.thread_id, instance.path)]), is_approved=True
+        ).count()
+        instance.delete()
+        if removed:
+            Post.adjust_comments_count(instance.post_id, -removed)
+            if instance.depth:
+                Comment.adjust_reply_count(instance.thread_id, -removed)
+
 
 class ModerateComment(generics.UpdateAPIView):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [IsAdminOrSuperUser]
 
+    @transaction.atomic
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         action = request.data.get("action")
         if action in ["approve", "disapprove"]:
-            instance.is_approved = (action == "approve")
-            instance.save()
+            instance = Comment.objects.select_for_update().get(pk=instance.pk)
+            is_approved = (action == "approve")
+            if instance.is_approved != is_approved:
+                instance.is_approved = is_approved
+                instance.save(update_fields=["is_approved", "updated_at"])
+                Post.adjust_comments_count(instance.post_id, 1 if is_approved else -1)
+                if instance.depth:
+                    Comment.adjust_reply_count(instance.thread_id, 1 if is_approved else -1)
             return Response({"status": f"Comment {action}d successfully"})
         return Response({"error": "Invalid action provided"}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
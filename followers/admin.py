@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Follow
+from .models import Follow, FollowSuggestion
 
 
 @admin.register(Follow)
@@ -12,3 +12,13 @@ class FollowAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         return super().get_queryset(request).select_related("follower", "followed")
+
+
+@admin.register(FollowSuggestion)
+class FollowSuggestionAdmin(admin.ModelAdmin):
+    list_display = ["user", "suggested", "score", "mutual_count", "created_at"]
+    readonly_fields = ["created_at"]
+    raw_id_fields = ["user", "suggested"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("user", "suggested")
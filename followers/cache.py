@@ -0,0 +1,51 @@
+"""
+Per-user cache of the ids a user follows.
+
+The set is loaded lazily from `Follow` on first use and dropped after
+follow/unfollow commits, so "does the viewer follow X" checks for a whole
+page of results cost at most one cache read.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+FOLLOWING_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def following_cache_key(user_id):
+    return f"user_{user_id}_follower_list"
+
+
+def get_following_ids(user_id):
+    """Return the frozenset of user ids that `user_id` follows."""
+    from .models import Follow
+
+    key = following_cache_key(user_id)
+    following_ids = cache.get(key)
+    if following_ids is None:
+        following_ids = frozenset(
+            Follow.objects.filter(follower_id=user_id).values_list("followed_id", flat=True)
+        )
+        cache.set(key, following_ids, FOLLOWING_CACHE_TIMEOUT)
+    return following_ids
+
+
+def is_following(user_id, target_id):
+    return target_id in get_following_ids(user_id)
+
+
+def get_viewer_following_ids(context):
+    """
+    Return the requesting user's following set, memoized in the serializer
+    context so a `many=True` serializer reads the cache once per page.
+    """
+    request = context.get("request")
+    if request is None or not request.user.is_authenticated:
+        return frozenset()
+    if "following_ids" not in context:
+        context["following_ids"] = get_following_ids(request.user.id)
+    return context["following_ids"]
+
+
+def invalidate_following_cache_on_commit(user_id):
+    """Drop a user's cached following set once the surrounding transaction commits."""
+    transaction.on_commit(lambda: cache.delete(following_cache_key(user_id)))
@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from profiles.models import Profile
+from popularity.leaderboard import FOLLOWERS
+
+
+class Command(BaseCommand):
+    """Repair drift in the denormalized follower/following counters."""
+
+    help = "Recompute follower_count and following_count for all profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of user IDs to recompute per grouped query.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        max_id = get_user_model().objects.aggregate(max_id=Max("id"))["max_id"] or 0
+        repaired = 0
+        for start in range(0, max_id, batch_size):
+            drifted = Profile.repair_follow_counts(start, start + batch_size)
+            FOLLOWERS.update_many({profile.user_id: profile.follower_count for profile in drifted})
+            repaired += len(drifted)
+        self.stdout.write(self.style.SUCCESS(f"Repaired follow counters for {repaired} profiles."))
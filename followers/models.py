@@ -21,3 +21,25 @@ class Follow(models.Model):
 
     def __str__(self):
         return f"{self.follower.profile.profile_name} follows {self.followed.profile.profile_name}"
+
+
+class FollowSuggestion(models.Model):
+    """A precomputed friends-of-friends suggestion for a user."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name="follow_suggestions", on_delete=models.CASCADE
+    )
+    suggested = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name="+", on_delete=models.CASCADE
+    )
+    score = models.FloatField(default=0.0)
+    mutual_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("user", "suggested")
+        indexes = [
+            models.Index(fields=["user", "-score"]),
+        ]
+
+    def __str__(self):
+        return f"Suggest {self.suggested_id} to {self.user_id} ({self.score:.2f})"
@@ -1,5 +1,7 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Follow
+from profiles.models import Profile
+from .models import Follow, FollowSuggestion
 
 class FollowSerializer(serializers.ModelSerializer):
     class Meta:
@@ -8,8 +10,38 @@ class FollowSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'follower', 'created_at']
 
     def create(self, validated_data):
-        return super().create(validated_data)
+        # The post_save counter update runs in the same transaction as the INSERT
+        with transaction.atomic():
+            Profile.lock_follows_of(validated_data['follower'].id)
+            return super().create(validated_data)
 
 
-    def update(self, instance, validated_data):        
-        return super().update(instance, validated_data)
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            return super().update(instance, validated_data)
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    """Validate a batch follow/unfollow request."""
+    MAX_TARGETS = 100
+
+    action = serializers.ChoiceField(choices=["follow", "unfollow"])
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_TARGETS,
+    )
+
+    def validate_user_ids(self, value):
+        # Keep the caller's order while dropping duplicates
+        return list(dict.fromkeys(value))
+
+
+class FollowSuggestionSerializer(serializers.ModelSerializer):
+    user_id = serializers.IntegerField(source='suggested_id', read_only=True)
+    profile_name = serializers.CharField(source='suggested.profile.profile_name', read_only=True)
+
+    class Meta:
+        model = FollowSuggestion
+        fields = ['user_id', 'profile_name', 'score', 'mutual_count']
+        read_only_fields = fields
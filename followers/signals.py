@@ -1,33 +1,36 @@
+import logging
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
+from .cache import invalidate_following_cache_on_commit
 from .models import Follow
+from .suggestions import mark_neighbourhood_changed
 from profiles.models import Profile
+from backend.cache import bump_generation_on_commit
+from popularity.leaderboard import FOLLOWERS
+from popularity.scheduler import mark_author_dirty
+from posts.timeline import invalidate_timelines
 
-def invalidate_follower_cache(user_id):
-    cache_key = f"user_{user_id}_follower_list"
-    cache.delete(cache_key)
-    print(f"Cache invalidated for user_id: {user_id}")
+logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=Follow)
 def handle_new_follow(sender, instance, created, **kwargs):
     if created:
-        print(f"New follow created: {instance.follower.id} -> {instance.followed.id}")
-        invalidate_follower_cache(instance.followed.id)
-        invalidate_follower_cache(instance.follower.id)
-
-        # Update follower count
-        Profile.objects.filter(user=instance.followed).update(
-            follower_count=Follow.objects.filter(followed=instance.followed).count()
-        )
+        logger.debug(f"New follow created: {instance.follower_id} -> {instance.followed_id}")
+        invalidate_following_cache_on_commit(instance.follower_id)
+        # Callers write the Follow inside transaction.atomic(), so this joins it
+        Profile.adjust_follow_counts(instance.follower_id, instance.followed_id, 1)
+        invalidate_timelines([instance.follower_id])
+        FOLLOWERS.increment_on_commit(instance.followed_id, 1)
+        mark_author_dirty(instance.followed_id)
+        mark_neighbourhood_changed(instance.follower_id)
+        bump_generation_on_commit("profiles", f"viewer:{instance.follower_id}")
 
 @receiver(post_delete, sender=Follow)
 def handle_unfollow(sender, instance, **kwargs):
-    print(f"Follow deleted: {instance.follower.id} -> {instance.followed.id}")
-    invalidate_follower_cache(instance.followed.id)
-    invalidate_follower_cache(instance.follower.id)
-
-    # Update follower count
-    Profile.objects.filter(user=instance.followed).update(
-        follower_count=Follow.objects.filter(followed=instance.followed).count()
-    )
\ No newline at end of file
+    logger.debug(f"Follow deleted: {instance.follower_id} -> {instance.followed_id}")
+    invalidate_following_cache_on_commit(instance.follower_id)
+    Profile.adjust_follow_counts(instance.follower_id, instance.followed_id, -1)
+    invalidate_timelines([instance.follower_id])
+    FOLLOWERS.increment_on_commit(instance.followed_id, -1)
+    mark_neighbourhood_changed(instance.follower_id)
+    bump_generation_on_commit("profiles", f"viewer:{instance.follower_id}")
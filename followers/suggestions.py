@@ -0,0 +1,116 @@
+"""
+Friends-of-friends follow suggestions.
+
+For a batch of users, one grouped query over two hops of `Follow` counts
+how many of the people each user follows also follow a candidate, and
+keeps only each user's best candidates by that count. The count is
+weighted by the candidate's engagement score and the top-K candidates
+per user are stored in `FollowSuggestion`.
+
+Follow changes only mark the follower as changed, once they commit. The refresh job then
+expands that to everyone whose two-hop neighbourhood moved (the follower
+and the follower's own followers) and recomputes just those users.
+"""
+import heapq
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Window
+from django.db.models.functions import RowNumber
+
+from backend.structures import DirtySet
+from popularity.models import PopularityMetrics
+from .models import Follow, FollowSuggestion
+
+CHANGED_FOLLOWERS = DirtySet("follow_suggestions:changed")
+
+
+def mark_neighbourhood_changed(*user_ids):
+    """Record, once the transaction commits, that these users followed or unfollowed someone."""
+    if user_ids:
+        transaction.on_commit(lambda: CHANGED_FOLLOWERS.add(*user_ids))
+
+
+def drain_changed_users():
+    """Drain changed followers and return every user whose suggestions are stale."""
+    changed = [int(user_id) for user_id in CHANGED_FOLLOWERS.drain()]
+    if not changed:
+        return set()
+    return affected_users(changed)
+
+
+def affected_users(changed_ids):
+    """Users whose two-hop neighbourhood includes a changed follower."""
+    affected = set(changed_ids)
+    affected.update(
+        Follow.objects.filter(followed_id__in=changed_ids).values_list("follower_id", flat=True)
+    )
+    return affected
+
+
+def compute_suggestions(user_ids, limit=None):
+    """Return `{user_id: [(score, candidate_id, mutual_count), ...]}` for `user_ids`."""
+    limit = limit or settings.FOLLOW_SUGGESTIONS_PER_USER
+    user_ids = list(user_ids)
+
+    # Only the best candidates by mutual count leave the database, so a user
+    # who follows hubs does not pull their whole two-hop neighbourhood.
+    ranked = (
+        Follow.objects.filter(follower__followers__follower_id__in=user_ids)
+        .annotate(user_id=F("follower__followers__follower_id"))
+        .filter(
+            ~Q(followed_id=F("user_id")),
+            ~Exists(Follow.objects.filter(follower_id=OuterRef("user_id"), followed_id=OuterRef("followed_id"))),
+        )
+        .order_by()
+        .values("user_id", "followed_id")
+        .annotate(mutual=Count("id"))
+        .annotate(rank=Window(RowNumber(), partition_by=F("user_id"), order_by=[F("mutual").desc(), F("followed_id")]))
+    )
+    # Filtering on the window in the ORM would group by it, so cap in an outer select
+    sql, params = ranked.query.sql_with_params()
+    qn = connection.ops.quote_name
+    candidates = defaultdict(list)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {qn('user_id')}, {qn('followed_id')}, {qn('mutual')} FROM ({sql}) ranked "
+            f"WHERE {qn('rank')} <= %s",
+            (*params, settings.FOLLOW_SUGGESTIONS_CANDIDATES_PER_USER),
+        )
+        for user_id, candidate_id, mutual in cursor.fetchall():
+            candidates[user_id].append((candidate_id, mutual))
+
+    engagement = dict(
+        PopularityMetrics.objects.filter(
+            user_id__in={candidate_id for rows in candidates.values() for candidate_id, _ in rows}
+        ).values_list("user_id", "engagement_score")
+    )
+    return {
+        user_id: heapq.nlargest(
+            limit,
+            (
+                (mutual * (1 + math.log1p(max(engagement.get(candidate_id, 0.0), 0.0))), candidate_id, mutual)
+                for candidate_id, mutual in rows
+            ),
+        )
+        for user_id, rows in candidates.items()
+    }
+
+
+def store_suggestions(user_ids, limit=None):
+    """Recompute and replace the stored suggestions of `user_ids`."""
+    user_ids = list(user_ids)
+    ranked = compute_suggestions(user_ids, limit)
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id__in=user_ids).delete()
+        FollowSuggestion.objects.bulk_create(
+            [
+                FollowSuggestion(user_id=user_id, suggested_id=candidate_id, score=score, mutual_count=mutual)
+                for user_id, rows in ranked.items()
+                for score, candidate_id, mutual in rows
+            ],
+            batch_size=1000,
+        )
+    return sum(len(rows) for rows in ranked.values())
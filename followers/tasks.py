@@ -1,7 +1,11 @@
+import logging
 from celery import shared_task
+from django.conf import settings
 from followers.models import Follow
 from notifications.models import Notification
 
+logger = logging.getLogger(__name__)
+
 @shared_task
 def send_notification_task(user_id, notification_type, message):
     """Create a notification asynchronously."""
@@ -13,3 +17,47 @@ def send_notification_task(user_id, notification_type, message):
 def remove_follows_for_user(user_id):
     Follow.objects.filter(follower_id=user_id).delete()
     Follow.objects.filter(followed_id=user_id).delete()
+
+@shared_task
+def process_bulk_follow(follower_id, followed_ids):
+    """Notify every newly followed user and schedule their popularity refresh in one job."""
+    from profiles.models import Profile
+    from notifications.buffer import enqueue_notifications
+    from popularity.scheduler import mark_authors_dirty
+
+    profile_name = Profile.objects.filter(user_id=follower_id).values_list('profile_name', flat=True).first()
+    enqueue_notifications(
+        {
+            "user_id": followed_id,
+            "notification_type": 'Follow',
+            "message": f"{profile_name} started following you.",
+        }
+        for followed_id in followed_ids
+    )
+    mark_authors_dirty(followed_ids)
+    return f"Processed {len(followed_ids)} follows by user {follower_id}"
+
+@shared_task
+def refresh_follow_suggestions():
+    """Recompute suggestions for users whose follow neighbourhood changed."""
+    from .suggestions import drain_changed_users, store_suggestions
+
+    user_ids = sorted(drain_changed_users())
+    batch_size = settings.FOLLOW_SUGGESTIONS_BATCH_SIZE
+    stored = 0
+    for start in range(0, len(user_ids), batch_size):
+        stored += store_suggestions(user_ids[start:start + batch_size])
+    logger.info(f"Refreshed follow suggestions for {len(user_ids)} users ({stored} rows)")
+    return f"Refreshed follow suggestions for {len(user_ids)} users"
+
+@shared_task
+def rebuild_follow_suggestions():
+    """Recompute suggestions for every user, one batch of users at a time."""
+    from popularity.engine import iter_user_id_batches
+    from .suggestions import store_suggestions
+
+    users = 0
+    for user_ids in iter_user_id_batches(settings.FOLLOW_SUGGESTIONS_BATCH_SIZE):
+        store_suggestions(user_ids)
+        users += len(user_ids)
+    return f"Rebuilt follow suggestions for {users} users"
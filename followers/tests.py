@@ -5,9 +5,22 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from unittest.mock import patch
 from django.db import IntegrityError 
-from .models import Follow
+from .models import Follow, FollowSuggestion
 from profiles.models import Profile
-from .serializers import FollowSerializer
+from .serializers import BulkFollowSerializer, FollowSerializer
+from notifications.models import Notification
+from profiles.serializers import ProfileSerializer
+from rest_framework.test import APIRequestFactory
+from .cache import get_following_ids, is_following
+from .suggestions import compute_suggestions
+from .tasks import rebuild_follow_suggestions, refresh_follow_suggestions
+from backend.structures import reset_local_structures
+from popularity.models import PopularityMetrics
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 User = get_user_model()
 
 class FollowTests(APITestCase):
@@ -93,22 +106,20 @@ class FollowTests(APITestCase):
         self.user2.refresh_from_db()
         self.assertEqual(self.user2.profile.follower_count, 0)
 
-    @patch('followers.signals.invalidate_follower_cache')
-    def test_cache_invalidation_on_follow(self, mock_invalidate_follower_cache):
-        """Test that the cache is invalidated when a user is followed."""
+    @patch('followers.signals.invalidate_following_cache_on_commit')
+    def test_cache_invalidation_on_follow(self, mock_invalidate_following_cache):
+        """Test that the follower's following set is dropped when a user is followed."""
         response = self.client.post(self.follow_unfollow_url, {'followed': self.user2.id})
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        mock_invalidate_follower_cache.assert_any_call(self.user2.id)
-        mock_invalidate_follower_cache.assert_any_call(self.user1.id)
+        mock_invalidate_following_cache.assert_called_once_with(self.user1.id)
 
-    @patch('followers.signals.invalidate_follower_cache')
-    def test_cache_invalidation_on_unfollow(self, mock_invalidate_follower_cache):
-        """Test that the cache is invalidated when a user is unfollowed."""
+    @patch('followers.signals.invalidate_following_cache_on_commit')
+    def test_cache_invalidation_on_unfollow(self, mock_invalidate_following_cache):
+        """Test that the follower's following set is dropped when a user is unfollowed."""
         Follow.objects.create(follower=self.user1, followed=self.user2)
         response = self.client.delete(self.follow_unfollow_url, {'followed': self.user2.id})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        mock_invalidate_follower_cache.assert_any_call(self.user2.id)
-        mock_invalidate_follower_cache.assert_any_call(self.user1.id)
+        mock_invalidate_following_cache.assert_called_with(self.user1.id)
 
     def test_follow_unauthenticated_user(self):
         """Test that an unauthenticated user cannot follow someone."""
@@ -226,4 +237,242 @@ class FollowTaskTests(TestCase):
         serializer = FollowSerializer(follow, data={'followed': user7.id}, partial=True)
         self.assertTrue(serializer.is_valid())
         updated_follow = serializer.update(follow, serializer.validated_data)
-        self.assertEqual(updated_follow.followed, user7)
\ No newline at end of file
+        self.assertEqual(updated_follow.followed, user7)
+
+class FollowCounterTests(TestCase):
+    """Tests for the F()-based follower/following counters."""
+
+    def setUp(self):
+        cache.clear()
+        self.users = []
+        for i in range(3):
+            user = User.objects.create_user(email=f"counter{i}@example.com", password="testpass123", is_active=True)
+            Profile.objects.create(user=user, profile_name=f"counter{i}")
+            self.users.append(user)
+
+    def _counts(self, user):
+        profile = Profile.objects.get(user=user)
+        return profile.follower_count, profile.following_count
+
+    def test_follow_and_unfollow_adjust_both_sides(self):
+        Follow.objects.create(follower=self.users[0], followed=self.users[1])
+        Follow.objects.create(follower=self.users[2], followed=self.users[1])
+        self.assertEqual(self._counts(self.users[1]), (2, 0))
+        self.assertEqual(self._counts(self.users[0]), (0, 1))
+        Follow.objects.filter(follower=self.users[0]).delete()
+        self.assertEqual(self._counts(self.users[1]), (1, 0))
+        self.assertEqual(self._counts(self.users[0]), (0, 0))
+
+    def test_follow_does_not_count_existing_followers(self):
+        Follow.objects.create(follower=self.users[0], followed=self.users[1])
+        with CaptureQueriesContext(connection) as ctx:
+            Follow.objects.create(follower=self.users[2], followed=self.users[1])
+        self.assertFalse(any("COUNT(" in query["sql"] for query in ctx.captured_queries))
+
+    def test_serializer_writes_follow_and_counters_together(self):
+        serializer = FollowSerializer(data={"followed": self.users[1].id})
+        serializer.is_valid(raise_exception=True)
+        with patch.object(Profile, "adjust_follow_counts", side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                serializer.save(follower=self.users[0])
+        self.assertFalse(Follow.objects.exists())
+
+    def test_repair_command_fixes_drift(self):
+        Follow.objects.create(follower=self.users[0], followed=self.users[1])
+        Profile.objects.filter(user=self.users[1]).update(follower_count=7)
+        Profile.objects.filter(user=self.users[0]).update(following_count=0)
+        out = StringIO()
+        call_command("repair_follow_counts", "--batch-size", "2", stdout=out)
+        self.assertIn("Repaired follow counters for 2 profiles.", out.getvalue())
+        self.assertEqual(self._counts(self.users[1]), (1, 0))
+        self.assertEqual(self._counts(self.users[0]), (0, 1))
+
+
+class BulkFollowTests(APITestCase):
+    """Tests for the batch follow/unfollow endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        reset_local_structures()
+        patcher = patch("followers.views.process_bulk_follow.delay")
+        self.mock_job = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.users = []
+        for i in range(4):
+            user = User.objects.create_user(email=f"bulk{i}@example.com", password="testpass123", is_active=True)
+            Profile.objects.create(user=user, profile_name=f"bulk{i}")
+            self.users.append(user)
+        self.me = self.users[0]
+        self.url = reverse("bulk-follow")
+        self.client.force_authenticate(user=self.me)
+
+    def _statuses(self, response):
+        return {row["user_id"]: row["status"] for row in response.data["results"]}
+
+    def test_bulk_follow_reports_per_target_results(self):
+        Follow.objects.create(follower=self.me, followed=self.users[1])
+        targets = [self.users[1].id, self.users[2].id, self.users[3].id, self.me.id, 9999]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {"action": "follow", "user_ids": targets}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._statuses(response), {
+            self.users[1].id: "already_following",
+            self.users[2].id: "followed",
+            self.users[3].id: "followed",
+            self.me.id: "self",
+            9999: "not_found",
+        })
+        self.assertEqual(Profile.objects.get(user=self.me).following_count, 3)
+        self.assertEqual(Profile.objects.get(user=self.users[2]).follower_count, 1)
+        self.mock_job.assert_called_once_with(self.me.id, [self.users[2].id, self.users[3].id])
+
+    def test_bulk_follow_query_count_is_constant(self):
+        targets = [user.id for user in self.users[1:]]
+        # targets, follower lock, existing follows, insert, two counter updates,
+        # plus savepoint pair
+        with self.assertNumQueries(8):
+            self.client.post(self.url, {"action": "follow", "user_ids": targets}, format="json")
+
+    def test_bulk_unfollow(self):
+        for user in self.users[1:3]:
+            Follow.objects.create(follower=self.me, followed=user)
+        targets = [self.users[1].id, self.users[2].id, self.users[3].id]
+        response = self.client.post(self.url, {"action": "unfollow", "user_ids": targets}, format="json")
+        self.assertEqual(self._statuses(response), {
+            self.users[1].id: "unfollowed",
+            self.users[2].id: "unfollowed",
+            self.users[3].id: "not_following",
+        })
+        self.assertFalse(Follow.objects.filter(follower=self.me).exists())
+        self.assertEqual(Profile.objects.get(user=self.me).following_count, 0)
+        self.assertEqual(Profile.objects.get(user=self.users[1]).follower_count, 0)
+
+    def test_rejects_too_many_targets(self):
+        targets = list(range(1, BulkFollowSerializer.MAX_TARGETS + 2))
+        response = self.client.post(self.url, {"action": "follow", "user_ids": targets}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_job_creates_notifications(self):
+        from followers.tasks import process_bulk_follow
+        from notifications.buffer import flush_notifications
+        with self.captureOnCommitCallbacks(execute=True):
+            process_bulk_follow(self.me.id, [self.users[1].id, self.users[2].id])
+        flush_notifications()
+        self.assertEqual(Notification.objects.filter(notification_type="Follow").count(), 2)
+        self.assertEqual(
+            Notification.objects.get(user=self.users[1]).message, "bulk0 started following you."
+        )
+
+
+class FollowingCacheTests(TestCase):
+    """Tests for the cached following sets and is_following fields."""
+
+    def setUp(self):
+        cache.clear()
+        self.users = []
+        for i in range(5):
+            user = User.objects.create_user(email=f"graph{i}@example.com", password="testpass123", is_active=True)
+            Profile.objects.create(user=user, profile_name=f"graph{i}")
+            self.users.append(user)
+        self.viewer = self.users[0]
+        Follow.objects.create(follower=self.viewer, followed=self.users[1])
+
+    def test_following_set_is_loaded_once(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(is_following(self.viewer.id, self.users[1].id))
+        with self.assertNumQueries(0):
+            self.assertFalse(is_following(self.viewer.id, self.users[2].id))
+
+    def test_follow_and_unfollow_drop_loaded_set_after_commit(self):
+        get_following_ids(self.viewer.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.viewer, followed=self.users[2])
+            # Until the commit, readers keep the set they already loaded
+            self.assertEqual(get_following_ids(self.viewer.id), {self.users[1].id})
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.filter(follower=self.viewer, followed=self.users[1]).delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_following_ids(self.viewer.id), {self.users[2].id})
+
+    def test_profile_page_serializes_follow_state_without_queries(self):
+        users = User.objects.bulk_create([User(email=f"page{i}@example.com", is_active=True) for i in range(100)])
+        Profile.objects.bulk_create([Profile(user=user, profile_name=user.email) for user in users])
+        profiles = list(Profile.objects.all())
+        request = APIRequestFactory().get("/")
+        request.user = self.viewer
+        get_following_ids(self.viewer.id)
+        with self.assertNumQueries(0):
+            data = ProfileSerializer(profiles, many=True, context={"request": request}).data
+        followed = [row["profile_name"] for row in data if row["is_following"]]
+        self.assertEqual(followed, ["graph1"])
+
+
+class FollowSuggestionTests(APITestCase):
+    """Tests for precomputed friends-of-friends suggestions."""
+
+    def setUp(self):
+        cache.clear()
+        reset_local_structures()
+        self.users = []
+        for i in range(5):
+            user = User.objects.create_user(email=f"fof{i}@example.com", password="testpass123", is_active=True)
+            Profile.objects.create(user=user, profile_name=f"fof{i}")
+            self.users.append(user)
+        me, a, b, c, d = self.users
+        for follower, followed in [(me, a), (me, b), (a, c), (b, c), (a, d), (b, me)]:
+            Follow.objects.create(follower=follower, followed=followed)
+        reset_local_structures()
+
+    def test_candidates_rank_by_mutuals_and_skip_self_and_followed(self):
+        me, a, b, c, d = self.users
+        ranked = compute_suggestions([me.id])[me.id]
+        self.assertEqual([(candidate, mutual) for _, candidate, mutual in ranked], [(c.id, 2), (d.id, 1)])
+
+    def test_engagement_weights_candidates(self):
+        me, a, b, c, d = self.users
+        Follow.objects.create(follower=b, followed=d)
+        PopularityMetrics.objects.update_or_create(user=d, defaults={"engagement_score": 50.0})
+        ranked = compute_suggestions([me.id])[me.id]
+        self.assertEqual(ranked[0][1], d.id)
+
+    def test_rebuild_keeps_top_k(self):
+        me, a, b, c, d = self.users
+        with override_settings(FOLLOW_SUGGESTIONS_PER_USER=1):
+            rebuild_follow_suggestions()
+        self.assertEqual(list(FollowSuggestion.objects.filter(user=me).values_list("suggested_id", flat=True)), [c.id])
+
+    def test_candidates_are_capped_per_user_in_sql(self):
+        me, a, b, c, d = self.users
+        with override_settings(FOLLOW_SUGGESTIONS_CANDIDATES_PER_USER=1):
+            ranked = compute_suggestions([me.id, a.id, b.id])
+        self.assertEqual([(candidate, mutual) for _, candidate, mutual in ranked[me.id]], [(c.id, 2)])
+        self.assertTrue(all(len(rows) == 1 for rows in ranked.values()))
+
+    def test_follow_refreshes_the_follower_and_their_followers(self):
+        me, a, b, c, d = self.users
+        rebuild_follow_suggestions()
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=me, followed=c)
+            new = User.objects.create_user(email="fofnew@example.com", password="testpass123", is_active=True)
+            Profile.objects.create(user=new, profile_name="fofnew")
+            Follow.objects.create(follower=a, followed=new)
+            self.assertEqual(refresh_follow_suggestions(), "Refreshed follow suggestions for 0 users")
+
+        self.assertEqual(refresh_follow_suggestions(), "Refreshed follow suggestions for 3 users")
+        suggested = set(FollowSuggestion.objects.filter(user=me).values_list("suggested_id", flat=True))
+        self.assertEqual(suggested, {d.id, new.id})
+        self.assertEqual(refresh_follow_suggestions(), "Refreshed follow suggestions for 0 users")
+
+    def test_endpoint_lists_suggestions_and_hides_new_follows(self):
+        me, a, b, c, d = self.users
+        rebuild_follow_suggestions()
+        self.client.force_authenticate(user=me)
+        response = self.client.get(reverse("follow-suggestions"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["profile_name"] for row in response.data], ["fof3", "fof4"])
+        self.assertEqual(response.data[0]["mutual_count"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=me, followed=c)
+        response = self.client.get(reverse("follow-suggestions"))
+        self.assertEqual([row["profile_name"] for row in response.data], ["fof4"])
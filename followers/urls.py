@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import PopularFollowersView, FollowerDetailView
+from .views import BulkFollowView, FollowSuggestionsView, PopularFollowersView, FollowerDetailView
 
 urlpatterns = [
     path('follow/', FollowerDetailView.as_view(), name='follow-unfollow'),
+    path('bulk/', BulkFollowView.as_view(), name='bulk-follow'),
+    path('suggestions/', FollowSuggestionsView.as_view(), name='follow-suggestions'),
     path('<int:user_id>/', FollowerDetailView.as_view(), name='follower_detail'),
     path('<int:user_id>/popular-followers/', PopularFollowersView.as_view(), name='popular_followers'),
 ]
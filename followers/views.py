@@ -1,15 +1,23 @@
 from django.db import transaction
 from django.contrib.auth import get_user_model
 from django.http import Http404
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import never_cache
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .models import Follow
-from .serializers import FollowSerializer
+from .models import Follow, FollowSuggestion
+from .serializers import BulkFollowSerializer, FollowSerializer, FollowSuggestionSerializer
+from .suggestions import mark_neighbourhood_changed
+from .tasks import process_bulk_follow
 from profiles.models import Profile
 from profiles.serializers import ProfileSerializer
-from .signals import invalidate_follower_cache
+from .cache import get_following_ids, invalidate_following_cache_on_commit
+from backend.cache import bump_generation_on_commit
 from backend.permissions import IsOwnerOrAdmin
+from backend.utils import delete_rows
+from popularity.leaderboard import FOLLOWERS
+from posts.timeline import invalidate_timelines
 
 User = get_user_model()
 
@@ -18,8 +26,30 @@ class PopularFollowersView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        # Retrieve popular profiles based on follower count
-        return Profile.objects.order_by('-follower_count')[:10]
+        # Top ten by follower count, read from the leaderboard
+        user_ids = [user_id for _, user_id, _ in FOLLOWERS.top(10)]
+        profiles = Profile.objects.in_bulk(user_ids, field_name='user_id')
+        return [profiles[user_id] for user_id in user_ids if user_id in profiles]
+
+class FollowSuggestionsView(generics.ListAPIView):
+    """The caller's precomputed friends-of-friends suggestions, best first."""
+    serializer_class = FollowSuggestionSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    @method_decorator(never_cache)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        user = self.request.user
+        # Drop anyone followed since the last refresh without waiting for it
+        return (
+            FollowSuggestion.objects.filter(user=user)
+            .exclude(suggested_id__in=get_following_ids(user.id))
+            .select_related('suggested__profile')
+            .order_by('-score', 'suggested_id')
+        )
 
 class FollowerDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = FollowSerializer
@@ -39,9 +69,81 @@ class FollowerDetailView(generics.RetrieveUpdateDestroyAPIView):
             raise Http404("Follow relationship does not exist.")
 
     def delete(self, request, *args, **kwargs):
-        follow = self.get_object()
         with transaction.atomic():
+            Profile.lock_follows_of(request.user.id)
+            follow = self.get_object()
             follow.delete()
-            invalidate_follower_cache(follow.followed.id)
-            invalidate_follower_cache(follow.follower.id)
             return Response({"message": "Unfollowed successfully."}, status=status.HTTP_200_OK)
+
+class BulkFollowView(generics.GenericAPIView):
+    """Follow or unfollow many users in one request."""
+    serializer_class = BulkFollowSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = serializer.validated_data['user_ids']
+        if serializer.validated_data['action'] == 'follow':
+            statuses = self.follow(request.user, user_ids)
+        else:
+            statuses = self.unfollow(request.user, user_ids)
+        return Response({
+            "results": [{"user_id": user_id, "status": statuses[user_id]} for user_id in user_ids],
+        }, status=status.HTTP_200_OK)
+
+    def follow(self, user, user_ids):
+        statuses = {user_id: "not_found" for user_id in user_ids}
+        existing_users = set(User.objects.filter(id__in=user_ids, is_active=True).values_list('id', flat=True))
+        with transaction.atomic():
+            # Concurrent follow writes by this user wait here, so `already` is
+            # exact and every id in `new_ids` is inserted by this request
+            Profile.lock_follows_of(user.id)
+            already = set(
+                Follow.objects.filter(follower=user, followed_id__in=existing_users)
+                .values_list('followed_id', flat=True)
+            )
+            new_ids = [
+                user_id for user_id in user_ids
+                if user_id in existing_users and user_id not in already and user_id != user.id
+            ]
+            Follow.objects.bulk_create(
+                [Follow(follower=user, followed_id=user_id) for user_id in new_ids],
+                ignore_conflicts=True,
+            )
+            if new_ids:
+                Profile.bulk_adjust_follow_counts(user.id, new_ids, 1)
+                FOLLOWERS.increment_many_on_commit({user_id: 1 for user_id in new_ids})
+                invalidate_following_cache_on_commit(user.id)
+                bump_generation_on_commit("profiles", f"viewer:{user.id}")
+                transaction.on_commit(lambda: process_bulk_follow.delay(user.id, new_ids))
+                mark_neighbourhood_changed(user.id)
+        if new_ids:
+            invalidate_timelines([user.id])
+        statuses.update({user_id: "already_following" for user_id in already})
+        statuses.update({user_id: "followed" for user_id in new_ids})
+        if user.id in statuses:
+            statuses[user.id] = "self"
+        return statuses
+
+    def unfollow(self, user, user_ids):
+        statuses = {user_id: "not_following" for user_id in user_ids}
+        with transaction.atomic():
+            Profile.lock_follows_of(user.id)
+            rows = list(
+                Follow.objects.filter(follower=user, followed_id__in=user_ids).values_list('pk', 'followed_id')
+            )
+            removed_ids = [followed_id for _, followed_id in rows]
+            if removed_ids:
+                # Nothing references Follow, so skip per-row delete signals and
+                # maintain the counters for the whole batch below.
+                delete_rows(Follow, [pk for pk, _ in rows])
+                Profile.bulk_adjust_follow_counts(user.id, removed_ids, -1)
+                FOLLOWERS.increment_many_on_commit({user_id: -1 for user_id in removed_ids})
+                invalidate_following_cache_on_commit(user.id)
+                bump_generation_on_commit("profiles", f"viewer:{user.id}")
+                mark_neighbourhood_changed(user.id)
+        if removed_ids:
+            invalidate_timelines([user.id])
+        statuses.update({user_id: "unfollowed" for user_id in removed_ids})
+        return statuses
@@ -0,0 +1,260 @@
+"""
+Buffered notification writes.
+
+Producers push notifications onto a queue once their transaction commits
+instead of sending one Celery message per event. A periodic task drains
+the queue and inserts the notifications with `bulk_create`, so under a
+burst of follows, ratings or comments the number of writes grows with the
+batch size rather than with the number of events. When the queue lives in
+process memory no worker can see it, so the producing process flushes it
+itself after the commit.
+
+A batch stays reserved until its transaction commits. A failed batch is
+retried one item at a time so a single bad event cannot hold back the
+rest, and events that keep failing are dead-lettered.
+
+Grouped events (ratings and comments on a post) carry a `target_key`. The
+writer merges them into the recipient's unread notification for the same
+type and target created within `NOTIFICATION_GROUP_WINDOW` seconds, so a
+burst of ratings becomes "Alice and 41 others rated your post" on one row.
+"""
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from backend.structures import Queue
+from .counters import adjust_unread_counts
+from .delivery import publish_notifications
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_QUEUE = Queue("notifications")
+FLUSH_LOCK_KEY = "notifications:flush:lock"
+
+
+def enqueue_notifications(items):
+    """Buffer `{"user_id", "notification_type", "message"}` dicts once the transaction commits."""
+    items = list(items)
+    if items:
+        transaction.on_commit(lambda: _buffer(items))
+
+
+def _buffer(items):
+    NOTIFICATION_QUEUE.push(*items)
+    if settings.NOTIFICATION_FLUSH_INLINE and not NOTIFICATION_QUEUE.shared:
+        flush_notifications()
+
+
+def enqueue_notification(user_id, notification_type, message):
+    enqueue_notifications([
+        {"user_id": user_id, "notification_type": notification_type, "message": message}
+    ])
+
+
+def enqueue_grouped_notification(user_id, notification_type, target_key, actor_id, actor, template, **context):
+    """
+    Buffer an event that may be merged with others on the same target.
+
+    `template` contains an `{actors}` placeholder, filled with the actor
+    alone or with a summary such as "Alice and 41 others". Any other
+    placeholders are filled from `context` when the message is rendered,
+    so user-supplied text such as a post title is never parsed as a format
+    string.
+    """
+    enqueue_notifications([{
+        "user_id": user_id,
+        "notification_type": notification_type,
+        "message": template.format(actors=actor, **context),
+        "target_key": target_key,
+        "actor_id": actor_id,
+        "actor": actor,
+        "template": template,
+        "context": context,
+    }])
+
+
+def describe_actors(latest_actors, actor_count):
+    """Render "Alice", "Alice and Bob" or "Alice and 41 others"."""
+    if actor_count <= 1 or not latest_actors:
+        return latest_actors[0] if latest_actors else ""
+    if actor_count == 2 and len(latest_actors) > 1:
+        return f"{latest_actors[0]} and {latest_actors[1]}"
+    others = actor_count - 1
+    return f"{latest_actors[0]} and {others} other{'s' if others != 1 else ''}"
+
+
+def _merge_actor(notification, actor_id, actor, max_actors, max_actor_ids):
+    """
+    Put `actor` first among the latest actors, counting them only if new.
+
+    Actors are recognised by id among the group's last `max_actor_ids`
+    distinct actors, and `latest_actors` holds the names of the leading ids.
+    """
+    if actor_id in notification.actor_ids:
+        position = notification.actor_ids.index(actor_id)
+        del notification.actor_ids[position]
+        if position < len(notification.latest_actors):
+            del notification.latest_actors[position]
+    else:
+        notification.actor_count += 1
+    notification.actor_ids = [actor_id, *notification.actor_ids][:max_actor_ids]
+    notification.latest_actors = [actor, *notification.latest_actors][:max_actors]
+
+
+def _group_items(items):
+    """
+    Collapse grouped events of a batch into one unsaved notification per
+    `(user, type, target)`, merged into the matching open row when there is one.
+    Returns `(new, merged)` notification lists.
+    """
+    max_actors = settings.NOTIFICATION_GROUP_MAX_ACTORS
+    max_actor_ids = settings.NOTIFICATION_GROUP_MAX_ACTOR_IDS
+    groups = {}
+    for item in items:
+        groups.setdefault((item["user_id"], item["notification_type"], item["target_key"]), []).append(item)
+
+    open_rows = {}
+    candidates = Notification.objects.filter(
+        user_id__in={user_id for user_id, _, _ in groups},
+        target_key__in={target_key for _, _, target_key in groups},
+        is_read=False,
+        created_at__gte=timezone.now() - timedelta(seconds=settings.NOTIFICATION_GROUP_WINDOW),
+    ).order_by("created_at")
+    for notification in candidates:
+        # Later rows win, so events merge into the most recent open group
+        open_rows[(notification.user_id, notification.notification_type, notification.target_key)] = notification
+
+    new, merged = [], []
+    for (user_id, notification_type, target_key), events in groups.items():
+        notification = open_rows.get((user_id, notification_type, target_key))
+        if notification is None:
+            notification = Notification(
+                user_id=user_id,
+                notification_type=notification_type,
+                target_key=target_key,
+                actor_count=0,
+                latest_actors=[],
+                actor_ids=[],
+            )
+            new.append(notification)
+        else:
+            merged.append(notification)
+        for item in events:
+            _merge_actor(notification, item["actor_id"], item["actor"], max_actors, max_actor_ids)
+        notification.message = events[-1]["template"].format(
+            actors=describe_actors(notification.latest_actors, notification.actor_count),
+            **events[-1]["context"],
+        )
+    return new, merged
+
+
+def _create(notifications):
+    """Insert new notifications, dropping those whose recipient was deleted after the event was queued."""
+    if not notifications:
+        return notifications
+    # Foreign keys are checked at commit, too late to drop rows one by one
+    existing = set(
+        get_user_model().objects.filter(pk__in={n.user_id for n in notifications}).values_list("pk", flat=True)
+    )
+    notifications = [n for n in notifications if n.user_id in existing]
+    Notification.objects.bulk_create(notifications)
+    return notifications
+
+
+def _publish(notifications):
+    try:
+        publish_notifications(notifications)
+    except Exception:
+        # Clients still see the rows on their next list request
+        logger.warning("Could not push notifications to subscribers", exc_info=True)
+
+
+def _write_batch(items):
+    grouped = [item for item in items if item.get("target_key")]
+    new, merged = _group_items(grouped) if grouped else ([], [])
+    new.extend(
+        Notification(user_id=item["user_id"], notification_type=item["notification_type"], message=item["message"])
+        for item in items if not item.get("target_key")
+    )
+    if merged:
+        now = timezone.now()
+        for notification in merged:
+            notification.updated_at = now
+        Notification.objects.bulk_update(
+            merged, ["message", "actor_count", "latest_actors", "actor_ids", "updated_at"]
+        )
+    created = _create(new)
+    written = created + merged
+    # Merged rows were already unread, so only new rows raise the badge count
+    unread = Counter(notification.user_id for notification in created)
+    transaction.on_commit(lambda: (adjust_unread_counts(unread), _publish(written)))
+    return len(written)
+
+
+def _write_each(items):
+    """Write a failed batch one item at a time. Returns `(written, failed_items)`."""
+    written, failed = 0, []
+    for item in items:
+        try:
+            with transaction.atomic():
+                item_written = _write_batch([item])
+        except Exception:
+            logger.warning(f"Notification failed on attempt {item.get('attempts', 0) + 1}: {item}", exc_info=True)
+            failed.append(item)
+        else:
+            # Counted only once the row is committed
+            written += item_written
+            NOTIFICATION_QUEUE.ack(item)
+    return written, failed
+
+
+def _retry_later(items):
+    """Requeue failed items at the tail, or dead-letter those out of attempts, then drop the originals."""
+    for item in items:
+        attempts = item.get("attempts", 0) + 1
+        if attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            logger.error(f"Dead-lettering notification after {attempts} attempts: {item}")
+            NOTIFICATION_QUEUE.dead_letter({**item, "attempts": attempts})
+        else:
+            NOTIFICATION_QUEUE.push({**item, "attempts": attempts})
+    NOTIFICATION_QUEUE.ack(*items)
+
+
+def flush_notifications(batch_size=None, max_batches=None):
+    """Write queued notifications in batches until the queue is empty. Returns the count written."""
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    max_batches = max_batches or settings.NOTIFICATION_MAX_BATCHES_PER_FLUSH
+    if not cache.add(FLUSH_LOCK_KEY, True, settings.NOTIFICATION_FLUSH_LOCK_TIMEOUT):
+        return 0
+    written, failed = 0, []
+    try:
+        # Nobody else is flushing, so reserved items belong to a flush that died
+        NOTIFICATION_QUEUE.requeue_unacked()
+        for _ in range(max_batches):
+            items = NOTIFICATION_QUEUE.reserve(batch_size)
+            if not items:
+                break
+            try:
+                with transaction.atomic():
+                    batch_written = _write_batch(items)
+            except Exception:
+                logger.warning(f"Notification batch of {len(items)} failed, retrying item by item", exc_info=True)
+                batch_written, batch_failed = _write_each(items)
+                written += batch_written
+                failed.extend(batch_failed)
+            else:
+                # Counted only once the batch is committed
+                written += batch_written
+                NOTIFICATION_QUEUE.ack(*items)
+        # Failed items stay reserved until now so this flush tries each one once
+        _retry_later(failed)
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+    return written
@@ -0,0 +1,61 @@
+"""
+Per-user unread notification counters.
+
+The count lives in the cache and is adjusted in place by the notification
+writer and the mark-read/delete views. A missing counter is rebuilt with
+one COUNT over the `(user, is_read)` index and then kept up to date, so
+polling the badge count touches the database at most once per timeout.
+
+A write that commits while a counter is being rebuilt finds no counter to
+adjust, yet may be missing from the rebuilt count. Rebuilt counters
+therefore expire quickly (adjustments keep the expiry), bounding how long
+such a miss can show.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+UNREAD_COUNT_TIMEOUT = 60
+
+
+def unread_count_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def get_unread_count(user_id):
+    from .models import Notification
+
+    key = unread_count_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        # add() so a concurrent writer's increment is not overwritten
+        cache.add(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    """Shift a loaded counter by `delta`; a missing one is rebuilt on next read."""
+    if not delta:
+        return
+    key = unread_count_key(user_id)
+    try:
+        count = cache.incr(key, delta)
+    except ValueError:
+        return
+    if count < 0:
+        cache.delete(key)
+
+
+def adjust_unread_counts(deltas):
+    """Apply a `{user_id: delta}` mapping."""
+    for user_id, delta in deltas.items():
+        adjust_unread_count(user_id, delta)
+
+
+def adjust_unread_count_on_commit(user_id, delta):
+    transaction.on_commit(lambda: adjust_unread_count(user_id, delta))
+
+
+def forget_unread_counts(user_ids):
+    """Drop counters whose rows changed in bulk; they are rebuilt on next read."""
+    cache.delete_many([unread_count_key(user_id) for user_id in user_ids])
@@ -0,0 +1,135 @@
+"""
+Push delivery of notifications to connected clients.
+
+The buffered writer publishes each written notification to a per-user
+channel, and the SSE endpoint subscribes to the channel of the requesting
+user. The broker is chosen by `NOTIFICATION_BROKER`: Redis pub/sub shares
+events between the Celery workers that write notifications and the ASGI
+processes that hold connections; the in-process broker stands in for it
+in local development and tests.
+"""
+import asyncio
+import json
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def channel_name(user_id):
+    return f"notifications:user:{user_id}"
+
+
+class LocalSubscription:
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def deliver(self, payload):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, payload)
+
+    async def get(self, timeout):
+        """Wait up to `timeout` seconds for the next payload; None on timeout."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process pub/sub. Only reaches subscribers in the publishing process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+
+    def publish_many(self, messages):
+        """Publish `(user_id, payload)` pairs."""
+        with self.lock:
+            targets = [
+                (subscription, payload)
+                for user_id, payload in messages
+                for subscription in self.subscriptions.get(user_id, ())
+            ]
+        for subscription, payload in targets:
+            subscription.deliver(payload)
+
+    async def subscribe(self, user_id):
+        subscription = LocalSubscription(self, user_id)
+        with self.lock:
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscriptions.get(subscription.user_id, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self.subscriptions.pop(subscription.user_id, None)
+
+
+class RedisSubscription:
+    def __init__(self, client, pubsub):
+        self.client = client
+        self.pubsub = pubsub
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message["data"])
+
+    async def close(self):
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+class RedisBroker:
+    """Redis pub/sub, shared by every web and worker process."""
+
+    def __init__(self):
+        import redis
+
+        self.url = settings.NOTIFICATION_BROKER_URL
+        self.client = redis.Redis.from_url(self.url)
+
+    def publish_many(self, messages):
+        pipe = self.client.pipeline(transaction=False)
+        for user_id, payload in messages:
+            pipe.publish(channel_name(user_id), json.dumps(payload))
+        pipe.execute()
+
+    async def subscribe(self, user_id):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel_name(user_id))
+        return RedisSubscription(client, pubsub)
+
+
+@lru_cache(maxsize=None)
+def _load_broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    return _load_broker(settings.NOTIFICATION_BROKER)
+
+
+def publish_notifications(notifications):
+    """Push written notifications to their recipients' channels."""
+    from .serializers import NotificationSerializer
+
+    if not notifications:
+        return
+    get_broker().publish_many([
+        (notification.user_id, dict(NotificationSerializer(notification).data))
+        for notification in notifications
+    ])
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-17 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0002_notification_grouping"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="actor_ids",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
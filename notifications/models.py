@@ -1,7 +1,6 @@
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
-from django.contrib.auth import get_user_model
 
 class Notification(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notifications")
@@ -10,14 +9,17 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     read_at = models.DateTimeField(null=True, blank=True)
+    # Grouped notifications: events of one type on one target (e.g. "post:12")
+    # within a time window share a row that is updated in place
+    target_key = models.CharField(max_length=64, blank=True, default="")
+    actor_count = models.PositiveIntegerField(default=1)
+    latest_actors = models.JSONField(default=list, blank=True)
+    # Most recent distinct actor ids, newest first; `latest_actors` names the leading ones
+    actor_ids = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Notification for {self.user.profile.profile_name} - {self.notification_type}"
-   
-    def save(self, *args, **kwargs):
-        if not get_user_model().objects.filter(id=self.user_id).exists():
-            raise get_user_model().DoesNotExist("User does not exist")
-        super().save(*args, **kwargs)
 
     def mark_as_read(self):
         self.is_read = True
@@ -29,5 +31,7 @@ class Notification(models.Model):
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['user', 'is_read']),
             models.Index(fields=['user', 'notification_type', '-created_at']),
+            models.Index(fields=['user', 'target_key']),
+            models.Index(fields=['user', '-updated_at']),
         ]
-        ordering = ['-created_at']
+        ordering = ['-updated_at', '-id']
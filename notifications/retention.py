@@ -0,0 +1,126 @@
+"""
+Notification retention.
+
+Read and unread notifications expire after per-type TTLs measured from
+their last activity (`updated_at`). Expired rows are removed walking the
+table in fixed primary-key ranges, one short transaction per range, so
+no statement scans or locks more than `batch_size` ids. Rows can be
+written to a gzip-compressed JSONL archive before they are deleted.
+"""
+import gzip
+import json
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from backend.utils import delete_rows
+from .counters import forget_unread_counts
+from .models import Notification
+
+RETENTION_REPORT_KEY = "notifications:retention:last_run"
+ARCHIVE_FIELDS = [
+    "id", "user_id", "notification_type", "message", "is_read", "created_at",
+    "read_at", "target_key", "actor_count", "latest_actors", "updated_at",
+]
+
+
+def get_ttls(notification_type):
+    """Return `(read_days, unread_days)` for a notification type."""
+    policy = settings.NOTIFICATION_RETENTION_DAYS
+    ttls = {**policy["default"], **policy.get(notification_type, {})}
+    return ttls["read"], ttls["unread"]
+
+
+def expired_filter(now=None):
+    """A Q matching notifications past their type's read or unread TTL."""
+    now = now or timezone.now()
+
+    def older_than(read_days, unread_days):
+        return (
+            Q(is_read=True, updated_at__lt=now - timedelta(days=read_days))
+            | Q(is_read=False, updated_at__lt=now - timedelta(days=unread_days))
+        )
+
+    overridden = [name for name in settings.NOTIFICATION_RETENTION_DAYS if name != "default"]
+    expired = ~Q(notification_type__in=overridden) & older_than(*get_ttls("default"))
+    for notification_type in overridden:
+        expired |= Q(notification_type=notification_type) & older_than(*get_ttls(notification_type))
+    return expired
+
+
+def iter_id_ranges(batch_size):
+    """Yield `(start_after, end_id)` ranges of `batch_size` ids covering the table."""
+    bounds = Notification.objects.aggregate(first=Min("pk"), last=Max("pk"))
+    if bounds["first"] is None:
+        return
+    start_after = bounds["first"] - 1
+    while start_after < bounds["last"]:
+        yield start_after, start_after + batch_size
+        start_after += batch_size
+
+
+def _archive_path(archive_dir):
+    if not archive_dir:
+        return None
+    os.makedirs(archive_dir, exist_ok=True)
+    return os.path.join(archive_dir, f"notifications-{timezone.now():%Y%m%dT%H%M%S}.jsonl.gz")
+
+
+def purge_expired_notifications(batch_size=None, archive_dir=None):
+    """
+    Delete expired notifications range by range and return a report.
+
+    Rows are archived first when `archive_dir` (default
+    `NOTIFICATION_ARCHIVE_DIR`) is set.
+    """
+    batch_size = batch_size or settings.NOTIFICATION_RETENTION_BATCH_SIZE
+    if archive_dir is None:
+        archive_dir = settings.NOTIFICATION_ARCHIVE_DIR
+    archive_path = _archive_path(archive_dir)
+    expired = expired_filter()
+    deleted = Counter()
+    archive_file = gzip.open(archive_path, "at", encoding="utf-8") if archive_path else None
+    try:
+        for start_after, end_id in iter_id_ranges(batch_size):
+            with transaction.atomic():
+                rows = Notification.objects.filter(expired, pk__gt=start_after, pk__lte=end_id)
+                if archive_file is not None:
+                    batch = list(rows.values(*ARCHIVE_FIELDS))
+                    for row in batch:
+                        archive_file.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+                    removed = [(row["id"], row["notification_type"], row["is_read"], row["user_id"]) for row in batch]
+                else:
+                    removed = list(rows.values_list("id", "notification_type", "is_read", "user_id"))
+                if not removed:
+                    continue
+                delete_rows(Notification, [row[0] for row in removed])
+                unread_users = {user_id for _, _, is_read, user_id in removed if not is_read}
+                if unread_users:
+                    transaction.on_commit(lambda users=unread_users: forget_unread_counts(users))
+            deleted.update(notification_type for _, notification_type, _, _ in removed)
+    finally:
+        if archive_file is not None:
+            archive_file.close()
+
+    report = {
+        "finished_at": timezone.now().isoformat(),
+        "deleted": sum(deleted.values()),
+        "deleted_by_type": dict(deleted),
+        "archive": archive_path if deleted else None,
+    }
+    if archive_path and not deleted:
+        os.remove(archive_path)
+    cache.set(RETENTION_REPORT_KEY, report, None)
+    return report
+
+
+def get_retention_report():
+    """Return the report of the last retention run, or None."""
+    return cache.get(RETENTION_REPORT_KEY)
@@ -7,5 +7,27 @@ class NotificationSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Notification
-        fields = ["id", "notification_type", "message", "is_read", "created_at"]
-        read_only_fields = ["created_at"]
\ No newline at end of file
+        fields = [
+            "id", "notification_type", "message", "is_read", "created_at",
+            "target_key", "actor_count", "latest_actors", "updated_at",
+        ]
+        read_only_fields = ["created_at", "target_key", "actor_count", "latest_actors", "updated_at"]
+
+
+class NotificationBulkActionSerializer(serializers.Serializer):
+    """Validate a bulk mark-read or delete, targeted by ids, type, or both."""
+    MAX_IDS = 500
+
+    action = serializers.ChoiceField(choices=["mark_read", "delete"])
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_IDS,
+        required=False,
+    )
+    notification_type = serializers.CharField(max_length=50, required=False)
+
+    def validate(self, attrs):
+        if "ids" not in attrs and "notification_type" not in attrs:
+            raise serializers.ValidationError("Provide ids, notification_type, or both.")
+        return attrs
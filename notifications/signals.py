@@ -3,7 +3,7 @@ from django.dispatch import receiver
 from comments.models import Comment
 from ratings.models import Rating
 from followers.models import Follow
-from .tasks import send_notification_task
+from .buffer import enqueue_grouped_notification, enqueue_notification
 
 @receiver(post_save, sender=Follow)
 def create_follow_notification(sender, instance, created, **kwargs):
@@ -12,27 +12,35 @@ def create_follow_notification(sender, instance, created, **kwargs):
     """
     if created:
         message = f"{instance.follower.profile_name} started following you."
-        send_notification_task.delay(
-            user_id=instance.followed.id,
+        enqueue_notification(
+            user_id=instance.followed_id,
             notification_type="Follow",
             message=message
         )
 @receiver(post_save, sender=Rating)
 def notify_post_rating(sender, instance, created, **kwargs):
     """Notify authors of new ratings."""
-    if created and instance.post.author != instance.user:
-        send_notification_task.delay(
-            user_id=instance.post.author.id,
+    if created and instance.post.author_id != instance.user_id:
+        enqueue_grouped_notification(
+            user_id=instance.post.author_id,
             notification_type="Rating",
-            message=f"{instance.user.profile_name} rated your post '{instance.post.title}'"
+            target_key=f"post:{instance.post_id}",
+            actor_id=instance.user_id,
+            actor=instance.user.profile_name,
+            template="{actors} rated your post '{post_title}'",
+            post_title=instance.post.title,
         )
 
 @receiver(post_save, sender=Comment)
 def notify_post_comment(sender, instance, created, **kwargs):
     """Notify authors of new comments."""
-    if created and instance.post.author != instance.author:
-        send_notification_task.delay(
-            user_id=instance.post.author.id,
+    if created and instance.post.author_id != instance.author_id:
+        enqueue_grouped_notification(
+            user_id=instance.post.author_id,
             notification_type="Comment",
-            message=f"{instance.author.profile_name} commented on '{instance.post.title}'"
+            target_key=f"post:{instance.post_id}",
+            actor_id=instance.author_id,
+            actor=instance.author.profile_name,
+            template="{actors} commented on '{post_title}'",
+            post_title=instance.post.title,
         )
\ No newline at end of file
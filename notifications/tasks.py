@@ -1,10 +1,34 @@
+import logging
 from celery import shared_task
 from .models import Notification
 
+logger = logging.getLogger(__name__)
+
 
 @shared_task
 def send_notification_task(user_id, notification_type, message):
-    """Create a notification asynchronously."""
+    """Create a single notification. Kept for messages queued before buffered writes."""
     Notification.objects.create(
         user_id=user_id, notification_type=notification_type, message=message
     )
+
+
+@shared_task
+def flush_notifications_task():
+    """Drain the notification buffer with bulk inserts."""
+    from .buffer import flush_notifications
+
+    written = flush_notifications()
+    if written:
+        logger.info(f"Wrote {written} buffered notifications")
+    return f"Wrote {written} buffered notifications"
+
+
+@shared_task
+def purge_expired_notifications_task():
+    """Apply the notification retention policy."""
+    from .retention import purge_expired_notifications
+
+    report = purge_expired_notifications()
+    logger.info(f"Retention removed {report['deleted']} notifications: {report['deleted_by_type']}")
+    return f"Removed {report['deleted']} expired notifications"
@@ -1,6 +1,13 @@
-from django.utils import timezone
+import asyncio
+import gzip
+import json
+import tempfile
+import time
+from unittest import skipIf
 from unittest.mock import patch
-from django.test import TestCase, override_settings
+
+from django.utils import timezone
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.contrib.contenttypes.models import ContentType
@@ -11,9 +18,22 @@ from posts.models import Post
 from comments.models import Comment
 from followers.models import Follow
 from ratings.models import Rating
-from tags.models import ProfileTag
+from profiles.models import Profile
+try:
+    from tags.models import ProfileTag
+except ImportError:
+    ProfileTag = None
 from notifications.tasks import send_notification_task
 from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.tokens import AccessToken
+from backend.structures import reset_local_structures
+from .delivery import publish_notifications
+from .counters import UNREAD_COUNT_TIMEOUT, get_unread_count, unread_count_key
+from .retention import get_retention_report, purge_expired_notifications
+from .buffer import NOTIFICATION_QUEUE, enqueue_grouped_notification, enqueue_notification, flush_notifications
 
 User = get_user_model()
 
@@ -32,7 +52,7 @@ class NotificationTests(TestCase):
 
     def test_follow_notification(self):
         """Test follow notification"""
-        with patch('notifications.tasks.send_notification_task.delay') as mock_task:
+        with patch('notifications.signals.enqueue_notification') as mock_task:
             Follow.objects.create(follower=self.user2, followed=self.user1)
             mock_task.assert_called_once_with(
                 user_id=self.user1.id,
@@ -47,12 +67,16 @@ class NotificationTests(TestCase):
     def test_comment_notification(self):
         """Test comment notification"""
         post = Post.objects.create(author=self.user1, title="Test Post", content="Test Content")
-        with patch('notifications.tasks.send_notification_task.delay') as mock_task:
+        with patch('notifications.signals.enqueue_grouped_notification') as mock_task:
             Comment.objects.create(post=post, author=self.user2, content="Test Comment")
             mock_task.assert_called_once_with(
                 user_id=post.author.id,
                 notification_type="Comment",
-                message=f"{self.user2.profile_name} commented on your post '{post.title}'."
+                target_key=f"post:{post.id}",
+                actor_id=self.user2.id,
+                actor=self.user2.profile_name,
+                template="{actors} commented on '{post_title}'",
+                post_title=post.title,
             )
         send_notification_task(post.author.id, "Comment", f"{self.user2.profile_name} commented on your post '{post.title}'.")
         notifications = Notification.objects.filter(user=self.user1, notification_type="Comment")
@@ -63,12 +87,16 @@ class NotificationTests(TestCase):
         """Test rating notification"""
         Notification.objects.all().delete()
         post = Post.objects.create(author=self.user1, title="Test Post", content="Test Content")
-        with patch('notifications.tasks.send_notification_task.delay') as mock_task:
+        with patch('notifications.signals.enqueue_grouped_notification') as mock_task:
             Rating.objects.create(post=post, user=self.user2, value=5)
             mock_task.assert_called_once_with(
                 user_id=post.author.id,
                 notification_type="Rating",
-                message=f"{self.user2.profile_name} rated your post '{post.title}'."
+                target_key=f"post:{post.id}",
+                actor_id=self.user2.id,
+                actor=self.user2.profile_name,
+                template="{actors} rated your post '{post_title}'",
+                post_title=post.title,
             )
         send_notification_task(post.author.id, "Rating", f"{self.user2.profile_name} rated your post '{post.title}'.")
         notifications = Notification.objects.filter(user=self.user1, notification_type="Rating")
@@ -83,7 +111,8 @@ class NotificationTests(TestCase):
         url = reverse("notification-list")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['count'], 15)
+        self.assertNotIn('count', response.data)
+        self.assertIsNotNone(response.data['next'])
         self.assertEqual(len(response.data['results']), 10)
 
     def test_mark_notification_as_read(self):
@@ -95,11 +124,12 @@ class NotificationTests(TestCase):
         notification.refresh_from_db()
         self.assertTrue(notification.is_read)
 
+    @skipIf(ProfileTag is None, "tags app is not installed")
     def test_tag_notification(self):
         """Test tag notification"""
         post = Post.objects.create(author=self.user2, title="Test Post", content="Test Content")
         content_type = ContentType.objects.get_for_model(Post)
-        with patch('notifications.tasks.send_notification_task.delay') as mock_task:
+        with patch('notifications.signals.enqueue_notification') as mock_task:
             ProfileTag.objects.create(tagged_user=self.user1, tagger=self.user2, content_type=content_type, object_id=post.id)
             mock_task.assert_called_once_with(
                 user_id=self.user1.id,
@@ -117,10 +147,10 @@ class NotificationTests(TestCase):
         for i in range(25):
             Notification.objects.create(user=self.user1, notification_type="Test", message=f"Test Notification {i}")
         url = reverse("notification-list")
-        response = self.client.get(f"{url}?page=2")
+        response = self.client.get(self.client.get(url).data['next'])
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 10)
-        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(response.data['results'][0]['message'], "Test Notification 14")
 
     def test_notification_ordering(self):
         """Test notification ordering"""
@@ -160,18 +190,23 @@ class NotificationTests(TestCase):
     def test_celery_task_execution(self):
         """Test celery task execution"""
         post = Post.objects.create(author=self.user2, title="Test Post", content="Test Content")
-        with patch('notifications.tasks.send_notification_task.delay') as mock_task:
+        with patch('notifications.signals.enqueue_grouped_notification') as mock_task:
             Comment.objects.create(post=post, author=self.user1, content="Test Comment")
             mock_task.assert_called_once_with(
                 user_id=self.user2.id,
                 notification_type="Comment",
-                message=f"{self.user1.profile_name} commented on your post '{post.title}'."
+                target_key=f"post:{post.id}",
+                actor_id=self.user1.id,
+                actor=self.user1.profile_name,
+                template="{actors} commented on '{post_title}'",
+                post_title=post.title,
             )
 
     def test_notification_for_non_existent_user(self):
         """Test notification for non-existent user"""
-        with self.assertRaises(User.DoesNotExist):
+        with self.assertRaises(IntegrityError):
             Notification.objects.create(user_id=9999, notification_type="Test", message="This should fail")
+            connection.check_constraints(table_names=[Notification._meta.db_table])
 
     def test_delete_notification(self):
         """Test delete notification"""
@@ -188,3 +223,438 @@ class NotificationTests(TestCase):
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertTrue(Notification.objects.filter(pk=notification.pk).exists())
+
+
+@override_settings(NOTIFICATION_FLUSH_INLINE=False)
+class NotificationBufferTests(TestCase):
+    """Tests for the buffered notification writer."""
+
+    def setUp(self):
+        reset_local_structures()
+        self.user = User.objects.create_user(email="buffered@example.com", password="testpass123", is_active=True)
+
+    def test_events_are_buffered_until_commit_and_flushed_in_batches(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                enqueue_notification(self.user.id, "Rating", f"Rating {i}")
+            self.assertEqual(NOTIFICATION_QUEUE.size(), 0)
+        self.assertEqual(NOTIFICATION_QUEUE.size(), 5)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(flush_notifications(batch_size=2), 5)
+        inserts = [query for query in queries.captured_queries if query["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(NOTIFICATION_QUEUE.size(), 0)
+        self.assertEqual(
+            list(Notification.objects.order_by("id").values_list("message", flat=True)),
+            [f"Rating {i}" for i in range(5)],
+        )
+
+    def test_flush_is_bounded_per_run(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                enqueue_notification(self.user.id, "Rating", f"Rating {i}")
+        self.assertEqual(flush_notifications(batch_size=2, max_batches=1), 2)
+        self.assertEqual(NOTIFICATION_QUEUE.size(), 3)
+
+    @patch("notifications.buffer.publish_notifications")
+    def test_written_notifications_are_published_after_commit(self, mock_publish):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue_notification(self.user.id, "Follow", "alice started following you.")
+        with self.captureOnCommitCallbacks(execute=True):
+            flush_notifications()
+        (published,), _ = mock_publish.call_args
+        self.assertEqual([n.pk for n in published], list(Notification.objects.values_list("pk", flat=True)))
+
+    def test_rolled_back_events_are_not_queued(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            enqueue_notification(self.user.id, "Follow", "Never committed")
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(NOTIFICATION_QUEUE.size(), 0)
+
+    def test_batches_reserved_by_a_dead_flush_are_written_next_time(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                enqueue_notification(self.user.id, "Rating", f"Rating {i}")
+        NOTIFICATION_QUEUE.reserve(2)
+        self.assertEqual(NOTIFICATION_QUEUE.size(), 1)
+        self.assertEqual(flush_notifications(), 3)
+        self.assertEqual(
+            list(Notification.objects.order_by("id").values_list("message", flat=True)),
+            ["Rating 0", "Rating 1", "Rating 2"],
+        )
+
+    @override_settings(NOTIFICATION_MAX_ATTEMPTS=2)
+    def test_failing_items_are_retried_then_dead_lettered(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue_notification(self.user.id, "Rating", "Good")
+            enqueue_notification(self.user.id, "Rating", None)
+        self.assertEqual(flush_notifications(), 1)
+        self.assertEqual(NOTIFICATION_QUEUE.size(), 1)
+        self.assertEqual(flush_notifications(), 0)
+        self.assertEqual(NOTIFICATION_QUEUE.size(), 0)
+        self.assertEqual(NOTIFICATION_QUEUE.dead_size(), 1)
+        self.assertEqual(list(Notification.objects.values_list("message", flat=True)), ["Good"])
+
+    @override_settings(NOTIFICATION_FLUSH_INLINE=True)
+    def test_process_local_queue_is_flushed_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue_notification(self.user.id, "Follow", "alice started following you.")
+            self.assertFalse(Notification.objects.exists())
+        self.assertEqual(NOTIFICATION_QUEUE.size(), 0)
+        self.assertEqual(Notification.objects.get(user=self.user).message, "alice started following you.")
+
+
+@override_settings(NOTIFICATION_FLUSH_INLINE=False)
+class NotificationBufferCommitTests(TransactionTestCase):
+    """Buffered writes against real commits, where foreign keys are checked."""
+
+    def setUp(self):
+        cache.clear()
+        reset_local_structures()
+        self.user = User.objects.create_user(email="kept@example.com", password="testpass123", is_active=True)
+        self.gone = User.objects.create_user(email="gone@example.com", password="testpass123", is_active=True)
+
+    def test_events_for_deleted_recipients_are_dropped(self):
+        enqueue_notification(self.user.id, "Follow", "Kept")
+        enqueue_notification(self.gone.id, "Follow", "Dropped")
+        self.gone.delete()
+        self.assertEqual(flush_notifications(), 1)
+        self.assertEqual(list(Notification.objects.values_list("message", flat=True)), ["Kept"])
+        self.assertEqual(NOTIFICATION_QUEUE.size(), 0)
+        self.assertEqual(NOTIFICATION_QUEUE.dead_size(), 0)
+
+
+class NotificationGroupingTests(TestCase):
+    """Tests for merging same-target events into one notification."""
+
+    def setUp(self):
+        reset_local_structures()
+        self.author = User.objects.create_user(email="grouped@example.com", password="testpass123", is_active=True)
+        self.actor_ids = {}
+
+    def _rate(self, *actors, target="post:1"):
+        with self.captureOnCommitCallbacks(execute=True):
+            for actor in actors:
+                actor_id = self.actor_ids.setdefault(actor, len(self.actor_ids) + 1)
+                enqueue_grouped_notification(
+                    self.author.id, "Rating", target, actor_id, actor, "{actors} rated your post '{post_title}'",
+                    post_title="Hello",
+                )
+        flush_notifications()
+
+    def test_events_in_one_batch_share_a_row(self):
+        self._rate("alice", "bob", "carol")
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.latest_actors, ["carol", "bob", "alice"])
+        self.assertEqual(notification.message, "carol and 2 others rated your post 'Hello'")
+
+    def test_later_events_update_the_open_row_in_place(self):
+        self._rate("alice")
+        self._rate("bob")
+        notification = Notification.objects.get()
+        self.assertEqual(notification.message, "bob and alice rated your post 'Hello'")
+        self._rate(*[f"fan{i}" for i in range(41)])
+        notification.refresh_from_db()
+        self.assertEqual(notification.actor_count, 43)
+        self.assertEqual(len(notification.latest_actors), 3)
+        self.assertEqual(notification.message, "fan40 and 42 others rated your post 'Hello'")
+
+    def test_repeat_actors_are_recognised_beyond_the_named_ones(self):
+        self._rate("alice", "bob", "carol", "dave")
+        self._rate("alice")
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 4)
+        self.assertEqual(notification.latest_actors, ["alice", "dave", "carol"])
+        self.assertEqual(notification.message, "alice and 3 others rated your post 'Hello'")
+
+    def test_titles_with_braces_are_not_format_strings(self):
+        rater = User.objects.create_user(email="braces@example.com", password="testpass123", is_active=True)
+        Profile.objects.create(user=rater, profile_name="braces")
+        post = Post.objects.create(author=self.author, title="Sets like {a, b} and {actors}", content="Content")
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(post=post, user=rater, value=5)
+        self.assertEqual(
+            Notification.objects.get(user=self.author).message,
+            "braces rated your post 'Sets like {a, b} and {actors}'",
+        )
+
+    def test_read_rows_and_other_targets_start_new_groups(self):
+        self._rate("alice")
+        Notification.objects.update(is_read=True)
+        self._rate("bob")
+        self._rate("carol", target="post:2")
+        self.assertEqual(Notification.objects.count(), 3)
+
+    @override_settings(NOTIFICATION_GROUP_WINDOW=60)
+    def test_expired_groups_are_not_extended(self):
+        self._rate("alice")
+        Notification.objects.update(created_at=timezone.now() - timezone.timedelta(minutes=5))
+        self._rate("bob")
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+@override_settings(NOTIFICATION_BROKER="notifications.delivery.LocalBroker", NOTIFICATION_STREAM_HEARTBEAT=1)
+class NotificationStreamTests(TestCase):
+    """Tests for server-sent notification delivery."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="streamer@example.com", password="testpass123", is_active=True)
+        self.client = AsyncClient()
+        self.client.cookies["access_token"] = str(AccessToken.for_user(self.user))
+
+    async def test_requires_authentication(self):
+        response = await AsyncClient().get(reverse("notification-stream"))
+        self.assertEqual(response.status_code, 401)
+
+    def test_refused_under_wsgi(self):
+        response = Client().get(reverse("notification-stream"))
+        self.assertEqual(response.status_code, 503)
+
+    async def test_written_notifications_are_pushed_to_the_recipient(self):
+        response = await self.client.get(reverse("notification-stream"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b"retry:"))
+
+        notification = await sync_to_async(Notification.objects.create)(
+            user=self.user, notification_type="Follow", message="alice started following you."
+        )
+        other = await sync_to_async(User.objects.create_user)(email="quiet@example.com", password="testpass123")
+        await sync_to_async(publish_notifications)([
+            Notification(id=0, user=other, notification_type="Follow", message="Not for you"),
+            notification,
+        ])
+        event = (await asyncio.wait_for(anext(stream), 2)).decode()
+        self.assertIn(f"id: {notification.id}\nevent: notification\n", event)
+        self.assertIn("alice started following you.", event)
+
+        self.assertEqual(await asyncio.wait_for(anext(stream), 2), b": keep-alive\n\n")
+        await stream.aclose()
+
+
+class UnreadNotificationCountTests(TestCase):
+    """Tests for the cached unread-count endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        reset_local_structures()
+        self.user = User.objects.create_user(email="badge@example.com", password="testpass123", is_active=True)
+        self.client = APIClient()
+        self.client.cookies["access_token"] = str(AccessToken.for_user(self.user))
+        self.url = reverse("notification-unread-count")
+        for i in range(3):
+            Notification.objects.create(user=self.user, notification_type="Follow", message=f"Follower {i}")
+
+    def test_count_is_rebuilt_once_then_served_from_cache(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data, {"unread_count": 3})
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data, {"unread_count": 3})
+
+    def test_rebuilt_count_expires_to_heal_a_lost_increment(self):
+        get_unread_count(self.user.id)
+        # A write whose increment raced the rebuild and found no counter
+        Notification.objects.create(user=self.user, notification_type="Follow", message="Follower 3")
+        self.assertEqual(get_unread_count(self.user.id), 3)
+        later = time.time() + UNREAD_COUNT_TIMEOUT + 1
+        with patch("django.core.cache.backends.locmem.time.time", return_value=later):
+            self.assertEqual(get_unread_count(self.user.id), 4)
+
+    def test_writer_increments_only_for_new_rows(self):
+        get_unread_count(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue_notification(self.user.id, "Follow", "Follower 3")
+            for actor_id, actor in enumerate(("alice", "bob"), start=1):
+                enqueue_grouped_notification(self.user.id, "Rating", "post:1", actor_id, actor, "{actors} rated your post")
+        with self.captureOnCommitCallbacks(execute=True):
+            flush_notifications()
+        self.assertEqual(get_unread_count(self.user.id), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue_grouped_notification(self.user.id, "Rating", "post:1", 3, "carol", "{actors} rated your post")
+        with self.captureOnCommitCallbacks(execute=True):
+            flush_notifications()
+        self.assertEqual(get_unread_count(self.user.id), 5)
+
+    def test_mark_read_and_delete_decrement(self):
+        get_unread_count(self.user.id)
+        first, second, third = Notification.objects.order_by("id")
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse("mark-notification-read", kwargs={"pk": first.pk}))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse("mark-notification-read", kwargs={"pk": first.pk}))
+        self.assertEqual(get_unread_count(self.user.id), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("delete-notification", kwargs={"pk": second.pk}))
+        self.assertEqual(get_unread_count(self.user.id), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse("mark-all-notifications-read"))
+        self.assertEqual(get_unread_count(self.user.id), 0)
+
+
+class NotificationKeysetPaginationTests(TestCase):
+    """Tests for cursor pages and ?since= deltas on the notification list."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="pager@example.com", password="testpass123", is_active=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("notification-list")
+        for i in range(15):
+            Notification.objects.create(user=self.user, notification_type="Follow", message=f"Follower {i}")
+
+    def test_pages_walk_history_without_counting(self):
+        with CaptureQueriesContext(connection) as queries:
+            first = self.client.get(self.url)
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries.captured_queries))
+        second = self.client.get(first.data["next"])
+        messages = [row["message"] for row in first.data["results"] + second.data["results"]]
+        self.assertEqual(messages, [f"Follower {i}" for i in range(14, -1, -1)])
+        self.assertIsNone(second.data["next"])
+
+    def test_since_returns_only_newer_or_regrouped_rows(self):
+        since = self.client.get(self.url).data["since"]
+        response = self.client.get(self.url, {"since": since})
+        self.assertEqual(response.data["results"], [])
+        self.assertEqual(response.data["since"], since)
+
+        oldest = Notification.objects.order_by("id").first()
+        Notification.objects.filter(pk=oldest.pk).update(message="Regrouped", updated_at=timezone.now())
+        Notification.objects.create(user=self.user, notification_type="Follow", message="Follower 15")
+        response = self.client.get(self.url, {"since": since})
+        self.assertEqual([row["message"] for row in response.data["results"]], ["Regrouped", "Follower 15"])
+
+        response = self.client.get(self.url, {"since": response.data["since"]})
+        self.assertEqual(response.data["results"], [])
+
+    def test_since_pages_through_large_deltas(self):
+        since = self.client.get(self.url).data["since"]
+        for i in range(15, 30):
+            Notification.objects.create(user=self.user, notification_type="Follow", message=f"Follower {i}")
+        first = self.client.get(self.url, {"since": since})
+        second = self.client.get(first.data["next"])
+        messages = [row["message"] for row in first.data["results"] + second.data["results"]]
+        self.assertEqual(messages, [f"Follower {i}" for i in range(15, 30)])
+        self.assertEqual(second.data["since"], self.client.get(self.url).data["since"])
+
+    def test_invalid_since_is_rejected(self):
+        response = self.client.get(self.url, {"since": "garbage"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(NOTIFICATION_RETENTION_DAYS={
+    "default": {"read": 30, "unread": 180},
+    "Rating": {"read": 7, "unread": 60},
+})
+class NotificationRetentionTests(TestCase):
+    """Tests for the per-type retention job."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="retained@example.com", password="testpass123", is_active=True)
+
+    def _notification(self, notification_type, is_read, age_days):
+        notification = Notification.objects.create(
+            user=self.user, notification_type=notification_type, message=f"{notification_type} {age_days}d",
+            is_read=is_read,
+        )
+        Notification.objects.filter(pk=notification.pk).update(
+            updated_at=timezone.now() - timezone.timedelta(days=age_days)
+        )
+        return notification
+
+    def test_ttls_depend_on_type_and_read_state(self):
+        keep = [
+            self._notification("Follow", True, 20),
+            self._notification("Follow", False, 100),
+            self._notification("Rating", True, 5),
+            self._notification("Rating", False, 50),
+        ]
+        for args in [("Follow", True, 40), ("Follow", False, 200), ("Rating", True, 10), ("Rating", False, 70)]:
+            self._notification(*args)
+
+        report = purge_expired_notifications(batch_size=3, archive_dir="")
+        self.assertEqual(report["deleted"], 4)
+        self.assertEqual(report["deleted_by_type"], {"Follow": 2, "Rating": 2})
+        self.assertEqual(set(Notification.objects.values_list("pk", flat=True)), {n.pk for n in keep})
+        self.assertEqual(get_retention_report()["deleted"], 4)
+
+    def test_expired_rows_are_archived_before_deletion(self):
+        expired = self._notification("Follow", True, 40)
+        self._notification("Follow", True, 1)
+        with tempfile.TemporaryDirectory() as archive_dir:
+            report = purge_expired_notifications(archive_dir=archive_dir)
+            with gzip.open(report["archive"], "rt") as archive:
+                rows = [json.loads(line) for line in archive]
+        self.assertEqual([row["id"] for row in rows], [expired.pk])
+        self.assertEqual(rows[0]["message"], "Follow 40d")
+
+    def test_unread_deletions_drop_cached_counters(self):
+        self._notification("Follow", False, 200)
+        self.assertEqual(get_unread_count(self.user.id), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            purge_expired_notifications(archive_dir="")
+        self.assertIsNone(cache.get(unread_count_key(self.user.id)))
+        self.assertEqual(get_unread_count(self.user.id), 0)
+
+
+class BulkNotificationActionTests(TestCase):
+    """Tests for bulk mark-read and delete."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="bulkreader@example.com", password="testpass123", is_active=True)
+        self.other = User.objects.create_user(email="bystander@example.com", password="testpass123", is_active=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("bulk-notification-action")
+        self.follows = [
+            Notification.objects.create(user=self.user, notification_type="Follow", message=f"Follow {i}")
+            for i in range(3)
+        ]
+        self.ratings = [
+            Notification.objects.create(user=self.user, notification_type="Rating", message=f"Rating {i}")
+            for i in range(2)
+        ]
+        self.foreign = Notification.objects.create(user=self.other, notification_type="Follow", message="Not mine")
+
+    def test_mark_read_by_type_is_one_update(self):
+        get_unread_count(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, {"action": "mark_read", "notification_type": "Follow"}, format="json")
+        self.assertEqual(response.data, {"updated": 3})
+        self.assertEqual(sum(query["sql"].startswith("UPDATE") for query in queries.captured_queries), 1)
+        self.assertEqual(get_unread_count(self.user.id), 2)
+        self.assertFalse(Notification.objects.get(pk=self.foreign.pk).is_read)
+
+    def test_ids_are_scoped_to_the_caller(self):
+        ids = [self.follows[0].pk, self.ratings[0].pk, self.foreign.pk]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {"action": "mark_read", "ids": ids}, format="json")
+        self.assertEqual(response.data, {"updated": 2})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {"action": "delete", "ids": ids}, format="json")
+        self.assertEqual(response.data, {"deleted": 2})
+        self.assertTrue(Notification.objects.filter(pk=self.foreign.pk).exists())
+
+    def test_delete_by_ids_and_type_keeps_counter_consistent(self):
+        self.assertEqual(get_unread_count(self.user.id), 5)
+        ids = [self.follows[0].pk, self.ratings[0].pk]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url, {"action": "delete", "ids": ids, "notification_type": "Rating"}, format="json"
+            )
+        self.assertEqual(response.data, {"deleted": 1})
+        self.assertEqual(get_unread_count(self.user.id), 4)
+
+    def test_requires_a_target(self):
+        response = self.client.post(self.url, {"action": "delete"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
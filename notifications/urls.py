@@ -1,9 +1,12 @@
 from django.urls import path
-from .views import NotificationListView, MarkNotificationAsReadView, BulkMarkNotificationsAsReadView, DeleteNotificationView
+from .views import NotificationListView, MarkNotificationAsReadView, BulkMarkNotificationsAsReadView, BulkNotificationActionView, DeleteNotificationView, UnreadNotificationCountView, notification_stream
 
 urlpatterns = [
     path("notifications/", NotificationListView.as_view(), name="notification-list"),
     path("notifications/<int:pk>/mark-read/", MarkNotificationAsReadView.as_view(), name="mark-notification-read"),
     path("notifications/mark-all-read/", BulkMarkNotificationsAsReadView.as_view(), name="mark-all-notifications-read"),
+    path("notifications/bulk/", BulkNotificationActionView.as_view(), name="bulk-notification-action"),
     path("notifications/<int:pk>/delete/", DeleteNotificationView.as_view(), name="delete-notification"),
+    path("notifications/stream/", notification_stream, name="notification-stream"),
+    path("notifications/unread-count/", UnreadNotificationCountView.as_view(), name="notification-unread-count"),
 ]
\ No newline at end of file
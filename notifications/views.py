@@ -1,37 +1,93 @@
+import json
 import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
-from rest_framework import generics, status
-from rest_framework.pagination import PageNumberPagination
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import never_cache
+from rest_framework import exceptions, generics, status
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.request import Request
+from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.settings import api_settings
 from rest_framework.exceptions import PermissionDenied
 from .models import Notification
-from .serializers import NotificationSerializer
+from .serializers import NotificationBulkActionSerializer, NotificationSerializer
 from rest_framework.permissions import IsAuthenticated
+from accounts.authentication import CookieJWTStatelessAuthentication
+from backend.pagination import KeysetPagination
 from backend.permissions import IsOwnerOrAdmin
+from .counters import adjust_unread_count_on_commit, forget_unread_counts, get_unread_count
+from .delivery import get_broker
 
 logger = logging.getLogger(__name__)
 
-class CustomPagination(PageNumberPagination):
+class NotificationPagination(KeysetPagination):
+    """
+    Keyset pagination over a user's notifications, most recently active first.
+
+    `?since=<cursor>` switches to delta mode: only notifications created or
+    regrouped after the cursor, oldest first, so a polling client fetches
+    just what changed. Every response carries a `since` cursor for the next
+    poll; no page ever counts the user's history.
+    """
     page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+    orderings = {"-updated_at": ("-updated_at", "-id")}
+    default_ordering = "-updated_at"
+    since_query_param = "since"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        token = request.query_params.get(self.since_query_param)
+        self.delta = bool(token)
+        if not self.delta:
+            page = super().paginate_queryset(queryset, request, view)
+            self.since = self.encode_cursor(self.get_position(page[0])) if page else None
+            return page
+
+        self.request = request
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.default_ordering
+        self.fields = self.orderings[self.ordering]
+        position = self.decode_token(token)
+        self.fields = tuple(field.lstrip("-") for field in self.fields)
+        results = list(queryset.filter(self.get_seek_filter(position)).order_by(*self.fields)[: self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        self.since = self.encode_cursor(self.get_position(self.page[-1])) if self.page else token
+        return self.page
+
+    def get_next_link(self):
+        if not self.delta:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.since_query_param, self.since)
 
     def get_paginated_response(self, data):
         return Response({
-            'count': self.page.paginator.count,
-            'next': self.get_next_link(),
-            'previous': self.get_previous_link(),
-            'results': data            
+            "next": self.get_next_link(),
+            "since": self.since,
+            "results": data,
         })
-        
+
 
 class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = CustomPagination
+    pagination_class = NotificationPagination
+
+    @method_decorator(never_cache)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user).order_by('-created_at')
+        return Notification.objects.filter(user=self.request.user).order_by('-updated_at', '-id')
 
 class MarkNotificationAsReadView(generics.UpdateAPIView):
     queryset = Notification.objects.all()
@@ -40,7 +96,9 @@ class MarkNotificationAsReadView(generics.UpdateAPIView):
 
     def update(self, request, *args, **kwargs):
         notification = self.get_object()
-        notification.mark_as_read()
+        if not notification.is_read:
+            notification.mark_as_read()
+            adjust_unread_count_on_commit(notification.user_id, -1)
         logger.info(f"Notification {notification.id} marked as read.")
         return Response({"message": "Notification marked as read"}, status=status.HTTP_200_OK)
 
@@ -48,10 +106,38 @@ class BulkMarkNotificationsAsReadView(generics.UpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def patch(self, request, *args, **kwargs):
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True, read_at=timezone.now())
+        updated = Notification.objects.filter(user=request.user, is_read=False).update(is_read=True, read_at=timezone.now())
+        adjust_unread_count_on_commit(request.user.id, -updated)
         logger.info(f"All notifications for user {request.user.id} marked as read.")
         return Response({"message": "All notifications marked as read"}, status=status.HTTP_200_OK)
 
+class BulkNotificationActionView(generics.GenericAPIView):
+    """Mark read or delete the caller's notifications matching ids and/or a type, in one statement."""
+    serializer_class = NotificationBulkActionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        notifications = Notification.objects.filter(user=request.user)
+        if "ids" in data:
+            notifications = notifications.filter(id__in=data["ids"])
+        if "notification_type" in data:
+            notifications = notifications.filter(notification_type=data["notification_type"])
+
+        if data["action"] == "mark_read":
+            updated = notifications.filter(is_read=False).update(is_read=True, read_at=timezone.now())
+            adjust_unread_count_on_commit(request.user.id, -updated)
+            return Response({"updated": updated}, status=status.HTTP_200_OK)
+
+        deleted, _ = notifications.delete()
+        if deleted:
+            # The DELETE does not say how many rows were unread; recount on next read
+            user_id = request.user.id
+            transaction.on_commit(lambda: forget_unread_counts([user_id]))
+        return Response({"deleted": deleted}, status=status.HTTP_200_OK)
+
 class DeleteNotificationView(generics.DestroyAPIView):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
@@ -61,4 +147,58 @@ class DeleteNotificationView(generics.DestroyAPIView):
         obj = super().get_object()
         if obj.user != self.request.user:
             raise PermissionDenied("You do not have permission to delete this notification.")
-        return obj
\ No newline at end of file
+        return obj
+
+    def perform_destroy(self, instance):
+        if not instance.is_read:
+            adjust_unread_count_on_commit(instance.user_id, -1)
+        instance.delete()
+
+class UnreadNotificationCountView(APIView):
+    """Badge count of unread notifications, served from the cache."""
+    # Stateless token auth: the user id comes from the token, not a query
+    authentication_classes = [CookieJWTStatelessAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "notification_count"
+
+    @method_decorator(never_cache)
+    def get(self, request):
+        return Response({"unread_count": get_unread_count(request.user.id)})
+
+def _authenticate(request):
+    """Resolve the user with the API's authentication classes, or None."""
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        user = drf_request.user
+    except exceptions.APIException:
+        return None
+    return user if user.is_authenticated else None
+
+
+async def _event_stream(user_id):
+    subscription = await get_broker().subscribe(user_id)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            payload = await subscription.get(settings.NOTIFICATION_STREAM_HEARTBEAT)
+            if payload is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"id: {payload['id']}\nevent: notification\ndata: {json.dumps(payload)}\n\n"
+    finally:
+        await subscription.close()
+
+
+@never_cache
+async def notification_stream(request):
+    """Server-sent events carrying the user's notifications as they are written."""
+    if not isinstance(request, ASGIRequest):
+        # WSGI would buffer the endless stream and hold a worker for good
+        return JsonResponse({"detail": "Notification streaming requires an ASGI server."}, status=503)
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    response = StreamingHttpResponse(_event_stream(user.id), content_type="text/event-stream")
+    response["X-Accel-Buffering"] = "no"
+    return response
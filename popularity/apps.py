@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PopularityConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "popularity"
+
+    def ready(self):
+        import popularity.signals
@@ -0,0 +1,148 @@
+"""
+Set-based popularity recomputation.
+
+Instead of aggregating one author at a time, `recompute_popularity` computes
+the metrics of a whole batch of users with one grouped query over posts and
+writes them back with `bulk_update`. `recompute_all_popularity` walks every
+user by primary-key range so memory stays bounded by the batch size.
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Avg, Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from backend.cache import bump_generation_on_commit
+from .leaderboard import ENGAGEMENT
+from .models import PopularityMetrics
+
+logger = logging.getLogger(__name__)
+
+METRIC_FIELDS = [
+    "total_posts",
+    "total_ratings_received",
+    "average_rating",
+    "engagement_score",
+    "last_updated",
+]
+
+
+def iter_user_id_batches(batch_size, start_after=0):
+    """Yield ascending lists of user ids, `batch_size` at a time."""
+    User = get_user_model()
+    last_id = start_after
+    while True:
+        ids = list(
+            User.objects.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def iter_pk_ranges(batch_size, start_after=0):
+    """
+    Yield `(start_after, end_id)` user primary-key ranges of at most
+    `batch_size` users, using one indexed lookup per boundary.
+    """
+    User = get_user_model()
+    while True:
+        remaining = User.objects.filter(pk__gt=start_after).order_by("pk").values_list("pk", flat=True)
+        boundary = list(remaining[batch_size - 1:batch_size])
+        if boundary:
+            yield start_after, boundary[0]
+            start_after = boundary[0]
+            continue
+        last_id = remaining.aggregate(last_id=Max("pk"))["last_id"]
+        if last_id is not None:
+            yield start_after, last_id
+        return
+
+
+def recompute_popularity_range(start_after, end_id, chunk_size=None):
+    """Recompute popularity for users with `start_after < pk <= end_id`."""
+    User = get_user_model()
+    user_ids = User.objects.filter(pk__gt=start_after, pk__lte=end_id).values_list("pk", flat=True)
+    return recompute_popularity(user_ids, chunk_size=chunk_size)
+
+
+def recompute_popularity(user_ids, chunk_size=None):
+    """
+    Recompute popularity metrics for `user_ids` in a few grouped queries.
+
+    Authors without a metrics row get one; users whose posts are all gone
+    are reset to zero. Returns the number of rows written.
+    """
+    from posts.models import Post  # Import here to avoid circular import
+
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    chunk_size = chunk_size or settings.POPULARITY_BULK_CHUNK_SIZE
+
+    stats = {
+        row["author_id"]: row
+        for row in Post.objects.filter(author_id__in=user_ids)
+        .order_by()
+        .values("author_id")
+        .annotate(
+            post_total=Count("id"),
+            rating_total=Sum("total_ratings"),
+            rating_average=Avg("average_rating"),
+        )
+    }
+
+    existing = set(
+        PopularityMetrics.objects.filter(user_id__in=stats.keys()).values_list("user_id", flat=True)
+    )
+    PopularityMetrics.objects.bulk_create(
+        [PopularityMetrics(user_id=user_id) for user_id in stats.keys() - existing],
+        batch_size=chunk_size,
+        ignore_conflicts=True,
+    )
+
+    now = timezone.now()
+    metrics = list(
+        PopularityMetrics.objects.filter(user_id__in=user_ids).only("id", "user_id")
+    )
+    for metric in metrics:
+        row = stats.get(metric.user_id)
+        metric.total_posts = row["post_total"] if row else 0
+        metric.total_ratings_received = (row["rating_total"] or 0) if row else 0
+        metric.average_rating = (row["rating_average"] or 0.0) if row else 0.0
+        metric.engagement_score = PopularityMetrics.calculate_engagement_score(
+            metric.average_rating, metric.total_posts, metric.total_ratings_received
+        )
+        metric.last_updated = now
+    PopularityMetrics.objects.bulk_update(metrics, METRIC_FIELDS, batch_size=chunk_size)
+    sync_profile_scores(user_ids)
+    scores = {metric.user_id: metric.engagement_score for metric in metrics}
+    transaction.on_commit(lambda: ENGAGEMENT.update_many(scores))
+    return len(metrics)
+
+
+def sync_profile_scores(user_ids):
+    """Copy engagement scores onto `Profile.popularity_score` in one UPDATE."""
+    from profiles.models import Profile  # Import here to avoid circular import
+
+    score = PopularityMetrics.objects.filter(user_id=OuterRef("user_id")).values("engagement_score")[:1]
+    Profile.objects.filter(user_id__in=user_ids).update(
+        popularity_score=Coalesce(Subquery(score), 0.0)
+    )
+    bump_generation_on_commit("profiles")
+
+
+def recompute_all_popularity(batch_size=None):
+    """Recompute popularity for every user, one primary-key batch at a time."""
+    batch_size = batch_size or settings.POPULARITY_BATCH_SIZE
+    updated = 0
+    for user_ids in iter_user_id_batches(batch_size):
+        updated += recompute_popularity(user_ids)
+        logger.debug(f"Recomputed popularity up to user {user_ids[-1]}")
+    return updated
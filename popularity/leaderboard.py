@@ -0,0 +1,146 @@
+"""
+Ranked leaderboards kept in sorted sets.
+
+Signals push score changes as they happen, so top-K, rank and neighbourhood
+reads are answered from the sorted set instead of ordering a SQL table.
+Boards are built outside the request path, by the `rebuild_missing_leaderboards`
+beat task or `manage.py rebuild_leaderboards`; until a board exists its
+reads fall back to an ordered query on the source table. The followers
+board only receives deltas, so `rebuild_follower_leaderboard` also rebuilds
+it on a schedule to repair any delta lost to a concurrent rebuild.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from backend.structures import SortedSet
+
+
+class Leaderboard:
+    """A named ranking of ids by score, highest first. Ranks are 1-based."""
+
+    def __init__(self, name, source, id_field, score_field, labels):
+        self.name = name
+        self.source = source
+        self.id_field = id_field
+        self.score_field = score_field
+        self.labels = labels
+        self.entries = SortedSet(f"leaderboard:{name}")
+
+    def update(self, member_id, score):
+        self.update_many({member_id: score})
+
+    def update_many(self, scores):
+        # An unbuilt board is served from the database until it is rebuilt,
+        # so writing a partial set here would hide everyone else.
+        if self.entries.exists():
+            self.entries.add_many(scores)
+
+    def update_on_commit(self, member_id, score):
+        transaction.on_commit(lambda: self.update(member_id, score))
+
+    def increment_on_commit(self, member_id, delta):
+        self.increment_many_on_commit({member_id: delta})
+
+    def increment_many_on_commit(self, deltas):
+        def increment():
+            if self.entries.exists():
+                self.entries.increment_many(deltas)
+        transaction.on_commit(increment)
+
+    def remove(self, member_id):
+        self.entries.remove(member_id)
+
+    def rebuild(self):
+        rows = self.source().values_list(self.id_field, self.score_field)
+        self.entries.replace(rows.iterator(chunk_size=2000))
+
+    def _range(self, start, stop):
+        """`(id, score)` pairs for zero-based ranks `start` to `stop` inclusive."""
+        if self.entries.exists():
+            return self.entries.range(start, stop)
+        rows = (
+            self.source()
+            .order_by(f"-{self.score_field}", self.id_field)
+            .values_list(self.id_field, self.score_field)[start:stop + 1]
+        )
+        return [(member_id, float(score)) for member_id, score in rows]
+
+    def _rank(self, member_id):
+        """Zero-based `(rank, score)` of `member_id`, or None when unranked."""
+        if self.entries.exists():
+            rank = self.entries.rank(member_id)
+            return None if rank is None else (rank, self.entries.score(member_id))
+        source = self.source()
+        score = source.filter(**{self.id_field: member_id}).values_list(self.score_field, flat=True).first()
+        if score is None:
+            return None
+        ahead = source.filter(
+            Q(**{f"{self.score_field}__gt": score})
+            | Q(**{self.score_field: score, f"{self.id_field}__lt": member_id})
+        ).count()
+        return ahead, float(score)
+
+    def top(self, limit):
+        """Return the `limit` best entries as `(rank, id, score)` tuples."""
+        return [
+            (rank, member_id, score)
+            for rank, (member_id, score) in enumerate(self._range(0, limit - 1), start=1)
+        ]
+
+    def rank(self, member_id):
+        """Return `(rank, score)` for `member_id`, or None when unranked."""
+        ranked = self._rank(member_id)
+        if ranked is None:
+            return None
+        rank, score = ranked
+        return rank + 1, score
+
+    def around(self, member_id, radius):
+        """Return up to `radius` entries either side of `member_id`, including it."""
+        ranked = self._rank(member_id)
+        if ranked is None:
+            return []
+        start = max(ranked[0] - radius, 0)
+        return [
+            (position, entry_id, score)
+            for position, (entry_id, score) in enumerate(
+                self._range(start, ranked[0] + radius), start=start + 1
+            )
+        ]
+
+
+def _profile_names(user_ids):
+    from profiles.models import Profile
+    return dict(Profile.objects.filter(user_id__in=user_ids).values_list("user_id", "profile_name"))
+
+
+def _post_titles(post_ids):
+    from posts.models import Post
+    return dict(Post.objects.filter(id__in=post_ids).values_list("id", "title"))
+
+
+def _profiles():
+    from profiles.models import Profile
+    return Profile.objects.all()
+
+
+def _rated_posts():
+    from posts.models import Post
+    return Post.objects.filter(is_approved=True, total_ratings__gt=0)
+
+
+def refresh_post_rating(post_id):
+    """Re-rank one post from its stored rating statistics."""
+    from posts.models import Post
+    row = Post.objects.filter(pk=post_id).values("is_approved", "total_ratings", "average_rating").first()
+    if row and row["is_approved"] and row["total_ratings"]:
+        POST_RATING.update(post_id, row["average_rating"])
+    else:
+        POST_RATING.remove(post_id)
+
+
+ENGAGEMENT = Leaderboard("engagement", _profiles, "user_id", "popularity_score", _profile_names)
+FOLLOWERS = Leaderboard("followers", _profiles, "user_id", "follower_count", _profile_names)
+POST_RATING = Leaderboard("post_rating", _rated_posts, "id", "average_rating", _post_titles)
+
+LEADERBOARDS = {board.name: board for board in (ENGAGEMENT, FOLLOWERS, POST_RATING)}
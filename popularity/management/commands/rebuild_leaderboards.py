@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from popularity.leaderboard import LEADERBOARDS
+
+
+class Command(BaseCommand):
+    """Rebuild leaderboard sorted sets from the database."""
+
+    help = "Rebuild the engagement, followers and post_rating leaderboards."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "boards",
+            nargs="*",
+            help=f"Boards to rebuild (default: all of {', '.join(LEADERBOARDS)}).",
+        )
+
+    def handle(self, *args, **options):
+        names = options["boards"] or list(LEADERBOARDS)
+        unknown = set(names) - set(LEADERBOARDS)
+        if unknown:
+            raise CommandError(f"Unknown leaderboards: {', '.join(sorted(unknown))}")
+        for name in names:
+            board = LEADERBOARDS[name]
+            board.rebuild()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {name} with {board.entries.size()} entries."))
@@ -1,6 +1,6 @@
 from django.db import models
 from django.conf import settings
-from django.db.models import Avg, Count
+from django.db.models import Avg, Count, Sum
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,26 +28,35 @@ class PopularityMetrics(models.Model):
     def __str__(self):
         return f"Metrics for {self.user.email}"
 
+    @staticmethod
+    def calculate_engagement_score(average_rating, total_posts, total_ratings_received):
+        """Weighted engagement score shared by per-user and bulk recomputation."""
+        return (
+            (average_rating * 0.6) +
+            (total_posts * 0.2) +
+            (total_ratings_received * 0.2)
+        )
+
     def update_metrics(self):
         """Efficient method to update all metrics at once."""
         from posts.models import Post  # Import here to avoid circular import
+        from profiles.models import Profile
+        from .leaderboard import ENGAGEMENT
         
         try:
             posts = Post.objects.filter(author=self.user)
             post_stats = posts.aggregate(
                 total_posts=Count('id'),
-                total_ratings=Count('ratings'),
+                total_ratings=Sum('total_ratings'),
                 avg_rating=Avg('average_rating')
             )
 
             self.total_posts = post_stats['total_posts']
-            self.total_ratings_received = post_stats['total_ratings']
+            self.total_ratings_received = post_stats['total_ratings'] or 0
             self.average_rating = post_stats['avg_rating'] or 0.0
             
-            self.engagement_score = (
-                (self.average_rating * 0.6) +
-                (self.total_posts * 0.2) +
-                (self.total_ratings_received * 0.2)
+            self.engagement_score = self.calculate_engagement_score(
+                self.average_rating, self.total_posts, self.total_ratings_received
             )
             self.save(update_fields=[
                 'total_posts',
@@ -56,6 +65,8 @@ class PopularityMetrics(models.Model):
                 'engagement_score',
                 'last_updated'
             ])
+            Profile.objects.filter(user_id=self.user_id).update(popularity_score=self.engagement_score)
+            ENGAGEMENT.update_on_commit(self.user_id, self.engagement_score)
             logger.info(f"Updated metrics for user {self.user.id}: score={self.engagement_score}")
             
         except Exception as e:
@@ -0,0 +1,93 @@
+"""
+Debounced scheduling of popularity recomputation.
+
+Rating, post and follow events only mark ids as dirty, once their
+transaction commits so a flush never reads the pre-event rows. A single
+periodic `flush_dirty_popularity` task drains the sets and recomputes each
+affected author once, however many events arrived since the previous flush.
+"""
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from backend.structures import DirtySet
+
+logger = logging.getLogger(__name__)
+
+DIRTY_POSTS = DirtySet("popularity:posts")
+DIRTY_AUTHORS = DirtySet("popularity:authors")
+
+EVENTS_KEY = "popularity:scheduler:events"
+FLUSHES_KEY = "popularity:scheduler:flushes"
+FIRST_PENDING_KEY = "popularity:scheduler:first_pending_at"
+LAST_LAG_KEY = "popularity:scheduler:last_flush_lag"
+
+
+def _incr(key, delta=1):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, delta, None)
+
+
+def _mark_on_commit(dirty_set, ids):
+    def mark():
+        dirty_set.add(*ids)
+        _incr(EVENTS_KEY)
+        cache.add(FIRST_PENDING_KEY, time.time(), None)
+
+    transaction.on_commit(mark)
+
+
+def mark_post_dirty(post_id):
+    """Schedule a popularity refresh for the author of `post_id`."""
+    _mark_on_commit(DIRTY_POSTS, [post_id])
+
+
+def mark_author_dirty(user_id):
+    """Schedule a popularity refresh for `user_id`."""
+    _mark_on_commit(DIRTY_AUTHORS, [user_id])
+
+
+def mark_authors_dirty(user_ids):
+    """Schedule a popularity refresh for every id in `user_ids` as one event."""
+    _mark_on_commit(DIRTY_AUTHORS, list(user_ids))
+
+
+def drain_dirty_authors():
+    """Drain both dirty sets and resolve them into a set of author ids."""
+    from posts.models import Post  # Import here to avoid circular import
+
+    post_ids = DIRTY_POSTS.drain()
+    author_ids = DIRTY_AUTHORS.drain()
+    first_pending_at = cache.get(FIRST_PENDING_KEY)
+    cache.delete(FIRST_PENDING_KEY)
+    if DIRTY_POSTS.size() or DIRTY_AUTHORS.size():
+        # Marks that landed between the drain and the delete are still pending
+        cache.add(FIRST_PENDING_KEY, time.time(), None)
+    if post_ids:
+        author_ids.update(
+            Post.objects.filter(id__in=post_ids).values_list("author_id", flat=True).distinct()
+        )
+    lag = time.time() - first_pending_at if first_pending_at else 0.0
+    cache.set(LAST_LAG_KEY, lag, None)
+    _incr(FLUSHES_KEY)
+    return author_ids, lag
+
+
+def get_scheduler_metrics():
+    """Return coalescing counters for monitoring."""
+    events = cache.get(EVENTS_KEY, 0)
+    flushes = cache.get(FLUSHES_KEY, 0)
+    first_pending_at = cache.get(FIRST_PENDING_KEY)
+    return {
+        "pending_posts": DIRTY_POSTS.size(),
+        "pending_authors": DIRTY_AUTHORS.size(),
+        "events": events,
+        "flushes": flushes,
+        "messages_saved": max(events - flushes, 0),
+        "current_lag_seconds": time.time() - first_pending_at if first_pending_at else 0.0,
+        "last_flush_lag_seconds": cache.get(LAST_LAG_KEY, 0.0),
+    }
@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from posts.models import Post
+from profiles.models import Profile
+from .leaderboard import ENGAGEMENT, FOLLOWERS, POST_RATING
+
+
+@receiver(post_save, sender=Post)
+def rerank_post_on_save(sender, instance, **kwargs):
+    """Keep approved, rated posts on the rating leaderboard."""
+    post_id, score = instance.id, instance.average_rating
+    if instance.is_approved and instance.total_ratings:
+        transaction.on_commit(lambda: POST_RATING.update(post_id, score))
+    else:
+        transaction.on_commit(lambda: POST_RATING.remove(post_id))
+
+
+@receiver(post_delete, sender=Post)
+def unrank_deleted_post(sender, instance, **kwargs):
+    post_id = instance.id
+    transaction.on_commit(lambda: POST_RATING.remove(post_id))
+
+
+@receiver(post_save, sender=Profile)
+def rank_new_profile(sender, instance, created, **kwargs):
+    if created:
+        user_id = instance.user_id
+        transaction.on_commit(lambda: (ENGAGEMENT.update(user_id, 0.0), FOLLOWERS.update(user_id, 0.0)))
+
+
+@receiver(post_delete, sender=Profile)
+def unrank_deleted_profile(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: (ENGAGEMENT.remove(user_id), FOLLOWERS.remove(user_id)))
@@ -1,10 +1,45 @@
-from celery import shared_task
+from uuid import uuid4
+from celery import chord, shared_task
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
-from posts.models import Post
+from django.utils import timezone
 import logging
 
 logger = logging.getLogger(__name__)
 
+RECOMPUTE_RUN_KEY = "popularity:recompute:run"
+RECOMPUTE_RUN_TIMEOUT = 60 * 60 * 24
+# A run whose chunks have shown no sign of life for this long is presumed dead
+RECOMPUTE_HEARTBEAT_TIMEOUT = 60 * 15
+
+
+def _chunk_done_key(run_id, end_id):
+    return f"popularity:recompute:{run_id}:done:{end_id}"
+
+
+def _heartbeat_key(run_id):
+    return f"popularity:recompute:{run_id}:heartbeat"
+
+
+def _beat(run_id):
+    cache.set(_heartbeat_key(run_id), timezone.now().isoformat(), RECOMPUTE_HEARTBEAT_TIMEOUT)
+
+
+def get_recompute_progress():
+    """Return progress of the current full recompute, or None when idle."""
+    run = cache.get(RECOMPUTE_RUN_KEY)
+    if run is None:
+        return None
+    done = cache.get_many([_chunk_done_key(run["run_id"], end_id) for _, end_id in run["chunks"]])
+    return {
+        "run_id": run["run_id"],
+        "started_at": run["started_at"],
+        "total_chunks": len(run["chunks"]),
+        "completed_chunks": len(done),
+        "updated_users": sum(done.values()),
+    }
+
 @shared_task
 def aggregate_popularity_score(user_id: int) -> str:
     """Aggregate and update the popularity score for a given user."""
@@ -24,17 +59,112 @@ def aggregate_popularity_score(user_id: int) -> str:
         raise
 
 @shared_task
-def update_all_popularity_scores() -> str:
-    """Batch task to update popularity scores for all users."""
+def update_all_popularity_scores(batch_size=None) -> str:
+    """
+    Recompute popularity for all users as a chord of primary-key range chunks.
+
+    The chunk boundaries and completed chunks are checkpointed in the cache.
+    Chunks refresh a heartbeat while the run is alive; a call made during a
+    live run does nothing, and one made after the heartbeat lapsed (a worker
+    died) only dispatches the chunks that have not finished yet.
+    """
+    from .engine import iter_pk_ranges
+
     try:
-        user_ids = Post.objects.values_list('author_id', flat=True).distinct()
-        logger.info(f"Starting batch update for {len(user_ids)} users")
-        
-        for user_id in user_ids:
-            aggregate_popularity_score.delay(user_id)
-            
-        return f"Queued updates for {len(user_ids)} users"
-        
+        run = cache.get(RECOMPUTE_RUN_KEY)
+        if run is None:
+            batch_size = batch_size or settings.POPULARITY_BATCH_SIZE
+            run = {
+                "run_id": uuid4().hex,
+                "started_at": timezone.now().isoformat(),
+                "chunks": list(iter_pk_ranges(batch_size)),
+            }
+            if not cache.add(RECOMPUTE_RUN_KEY, run, RECOMPUTE_RUN_TIMEOUT):
+                return "Popularity recompute already running"
+            _beat(run["run_id"])
+        elif cache.add(_heartbeat_key(run["run_id"]), timezone.now().isoformat(), RECOMPUTE_HEARTBEAT_TIMEOUT):
+            # The add only succeeds once the owner's heartbeat has expired
+            logger.info(f"Resuming popularity recompute {run['run_id']}")
+        else:
+            return f"Popularity recompute {run['run_id']} is still running"
+
+        done = cache.get_many([_chunk_done_key(run["run_id"], end_id) for _, end_id in run["chunks"]])
+        pending = [
+            (start_after, end_id) for start_after, end_id in run["chunks"]
+            if _chunk_done_key(run["run_id"], end_id) not in done
+        ]
+        if not pending:
+            return finalize_popularity_recompute(run["run_id"])
+
+        chord(
+            recompute_popularity_chunk.si(run["run_id"], start_after, end_id)
+            for start_after, end_id in pending
+        )(finalize_popularity_recompute.si(run["run_id"]))
+        logger.info(f"Dispatched {len(pending)} of {len(run['chunks'])} popularity chunks")
+        return f"Dispatched {len(pending)} of {len(run['chunks'])} popularity chunks"
+
     except Exception as e:
         logger.error(f"Error in batch popularity update: {str(e)}", exc_info=True)
         raise
+
+
+@shared_task
+def recompute_popularity_chunk(run_id: str, start_after: int, end_id: int) -> int:
+    """Recompute one primary-key range and checkpoint it as completed."""
+    from .engine import recompute_popularity_range
+
+    _beat(run_id)
+    updated = recompute_popularity_range(start_after, end_id)
+    cache.set(_chunk_done_key(run_id, end_id), updated, RECOMPUTE_RUN_TIMEOUT)
+    _beat(run_id)
+    return updated
+
+
+@shared_task
+def finalize_popularity_recompute(run_id: str) -> str:
+    """Clear the checkpoint once every chunk of a run has completed."""
+    run = cache.get(RECOMPUTE_RUN_KEY)
+    if run is None or run["run_id"] != run_id:
+        return f"Popularity recompute {run_id} already finalized"
+    progress = get_recompute_progress()
+    cache.delete_many([_chunk_done_key(run_id, end_id) for _, end_id in run["chunks"]])
+    cache.delete_many([RECOMPUTE_RUN_KEY, _heartbeat_key(run_id)])
+    logger.info(f"Recomputed popularity metrics for {progress['updated_users']} users")
+    return f"Recomputed popularity metrics for {progress['updated_users']} users"
+
+@shared_task
+def flush_dirty_popularity() -> str:
+    """Recompute popularity once for every author marked dirty since the last flush."""
+    from .engine import recompute_popularity
+    from .scheduler import drain_dirty_authors
+
+    author_ids, lag = drain_dirty_authors()
+    recompute_popularity(author_ids)
+    logger.info(f"Flushed popularity for {len(author_ids)} authors (lag {lag:.1f}s)")
+    return f"Flushed popularity for {len(author_ids)} authors"
+
+
+@shared_task
+def rebuild_missing_leaderboards() -> str:
+    """Build every leaderboard whose sorted set does not exist (cold or evicted cache)."""
+    from .leaderboard import LEADERBOARDS
+
+    rebuilt = [name for name, board in LEADERBOARDS.items() if not board.entries.exists()]
+    for name in rebuilt:
+        LEADERBOARDS[name].rebuild()
+    return f"Rebuilt leaderboards: {', '.join(rebuilt) or 'none'}"
+
+
+@shared_task
+def rebuild_follower_leaderboard() -> str:
+    """
+    Rebuild the followers board from follower_count on a schedule.
+
+    Follow signals increment the live set, so a follow committed while a
+    rebuild is reading profiles is lost when the rebuilt set replaces it.
+    Rebuilding periodically bounds that drift to one interval.
+    """
+    from .leaderboard import FOLLOWERS
+
+    FOLLOWERS.rebuild()
+    return f"Rebuilt followers leaderboard with {FOLLOWERS.entries.size()} entries"
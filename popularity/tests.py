@@ -6,7 +6,28 @@ from popularity.models import PopularityMetrics
 from posts.models import Post
 from profiles.models import Profile
 from followers.models import Follow
-from popularity.tasks import aggregate_popularity_score
+from popularity.tasks import (
+    _heartbeat_key,
+    aggregate_popularity_score,
+    finalize_popularity_recompute,
+    flush_dirty_popularity,
+    get_recompute_progress,
+    rebuild_follower_leaderboard,
+    rebuild_missing_leaderboards,
+    recompute_popularity_chunk,
+    update_all_popularity_scores,
+)
+from popularity.scheduler import get_scheduler_metrics
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from popularity.leaderboard import FOLLOWERS, POST_RATING
+from popularity.engine import recompute_popularity, recompute_all_popularity
+from ratings.models import Rating
+from backend.structures import reset_local_structures
+from backend.testing import UserFixturesMixin
+from django.core.cache import cache
 
 User = get_user_model()
 
@@ -104,7 +125,7 @@ class AggregatePopularityScoreTaskTests(TestCase):
         mock_warning.assert_called_once_with(f"Profile not found for user {self.user.id}. Setting follower count to 0.")
         self.assertEqual(result, f"Updated popularity score for user {self.user.id}")
 
-    @patch('popularity.tasks.Post.objects.filter')
+    @patch('posts.models.Post.objects.filter')
     def test_aggregate_popularity_score_database_error(self, mock_post_filter):
         """Test handling database error."""
         mock_post_filter.side_effect = Exception("Database error")
@@ -186,3 +207,227 @@ class PopularityMetricsQueryTests(TestCase):
         self.assertEqual(avg_score, 20)
         self.assertEqual(max_score, 40)
         self.assertEqual(min_score, 0)
+
+
+class PopularitySchedulerTests(UserFixturesMixin, TestCase):
+    """Tests for the debounced popularity scheduler."""
+
+    def setUp(self):
+        cache.clear()
+        reset_local_structures()
+        self.author = self._create_user("author@example.com", "author")
+        self.voters = [self._create_user(f"voter{i}@example.com", f"voter{i}") for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = Post.objects.create(author=self.author, title="Rated", content="Content", is_approved=True)
+
+    def _rate(self, voters, value):
+        with self.captureOnCommitCallbacks(execute=True):
+            for voter in voters:
+                Rating.objects.create(user=voter, post=self.post, value=value)
+
+    def test_burst_of_ratings_is_aggregated_once(self):
+        self._rate(self.voters, 4)
+        with patch("popularity.engine.recompute_popularity") as mock_recompute:
+            flush_dirty_popularity()
+        mock_recompute.assert_called_once_with({self.author.id})
+
+    def test_flush_updates_metrics_and_drains(self):
+        self._rate(self.voters[:1], 5)
+        flush_dirty_popularity()
+        metrics = PopularityMetrics.objects.get(user=self.author)
+        self.assertEqual(metrics.total_posts, 1)
+        self.assertEqual(metrics.total_ratings_received, 1)
+        self.assertEqual(metrics.average_rating, 5.0)
+        self.assertEqual(flush_dirty_popularity(), "Flushed popularity for 0 authors")
+
+    def test_marks_wait_for_commit(self):
+        flush_dirty_popularity()
+        Rating.objects.create(user=self.voters[0], post=self.post, value=5)
+        self.assertEqual(flush_dirty_popularity(), "Flushed popularity for 0 authors")
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(user=self.voters[1], post=self.post, value=5)
+        self.assertEqual(get_scheduler_metrics()["pending_posts"], 1)
+
+    def test_metrics_report_messages_saved(self):
+        self._rate(self.voters, 3)
+        metrics = get_scheduler_metrics()
+        self.assertEqual(metrics["pending_posts"], 1)
+        self.assertEqual(metrics["pending_authors"], 1)
+        flush_dirty_popularity()
+        metrics = get_scheduler_metrics()
+        # One post creation and three ratings coalesced into a single flush.
+        self.assertEqual(metrics["events"], 4)
+        self.assertEqual(metrics["flushes"], 1)
+        self.assertEqual(metrics["messages_saved"], 3)
+        self.assertEqual(metrics["pending_posts"], 0)
+        self.assertEqual(metrics["current_lag_seconds"], 0.0)
+
+
+class BulkPopularityEngineTests(UserFixturesMixin, TestCase):
+    """Tests for set-based popularity recomputation."""
+
+    def setUp(self):
+        self.authors = [self._create_user(f"author{i}@example.com", f"author{i}") for i in range(3)]
+        self.voter = self._create_user("voter@example.com", "voter")
+        for author, value in zip(self.authors[:2], (4, 2)):
+            post = Post.objects.create(author=author, title=f"Rated {value}", content="Content", is_approved=True)
+            Post.objects.create(author=author, title=f"Unrated {value}", content="Content", is_approved=True)
+            Rating.objects.create(user=self.voter, post=post, value=value)
+
+    def test_matches_per_user_aggregation(self):
+        recompute_popularity([user.id for user in self.authors])
+        bulk = {m.user_id: m for m in PopularityMetrics.objects.all()}
+        for author in self.authors[:2]:
+            aggregate_popularity_score(author.id)
+            single = PopularityMetrics.objects.get(user=author)
+            self.assertEqual(bulk[author.id].total_posts, single.total_posts)
+            self.assertEqual(bulk[author.id].total_ratings_received, single.total_ratings_received)
+            self.assertAlmostEqual(bulk[author.id].engagement_score, single.engagement_score)
+        self.assertEqual(bulk[self.authors[0].id].total_posts, 2)
+        self.assertEqual(bulk[self.authors[0].id].average_rating, 2.0)
+        self.assertEqual(bulk[self.authors[2].id].total_posts, 0)
+
+    def test_resets_authors_without_posts(self):
+        recompute_all_popularity(batch_size=2)
+        Post.objects.filter(author=self.authors[1]).delete()
+        recompute_all_popularity(batch_size=2)
+        metrics = PopularityMetrics.objects.get(user=self.authors[1])
+        self.assertEqual(metrics.total_posts, 0)
+        self.assertEqual(metrics.engagement_score, 0.0)
+
+    def test_query_count_is_independent_of_batch_size(self):
+        user_ids = [user.id for user in self.authors]
+        recompute_popularity(user_ids)
+        # grouped stats, existing rows, metric rows, bulk_update, profile scores
+        with self.assertNumQueries(5):
+            recompute_popularity(user_ids)
+
+
+class ChunkedPopularityDispatchTests(TestCase):
+    """Tests for the resumable, chunked full popularity recompute."""
+
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(email=f"user{i}@example.com", password="testpass123", is_active=True)
+            for i in range(5)
+        ]
+        for user in self.users[:3]:
+            Post.objects.create(author=user, title=f"Post by {user.id}", content="Content", is_approved=True)
+
+    @patch("popularity.tasks.chord")
+    def test_full_run_recomputes_everyone_and_clears_checkpoint(self, mock_chord):
+        update_all_popularity_scores(batch_size=2)
+        header = list(mock_chord.call_args.args[0])
+        self.assertEqual(len(header), 3)
+        for task in header:
+            recompute_popularity_chunk(*task.args)
+        callback = mock_chord.return_value.call_args.args[0]
+        self.assertEqual(callback.task, finalize_popularity_recompute.name)
+        self.assertEqual(finalize_popularity_recompute(*callback.args), "Recomputed popularity metrics for 5 users")
+        self.assertEqual(PopularityMetrics.objects.filter(total_posts=1).count(), 3)
+        self.assertIsNone(get_recompute_progress())
+
+    @patch("popularity.tasks.chord")
+    def test_resume_dispatches_only_pending_chunks(self, mock_chord):
+        update_all_popularity_scores(batch_size=2)
+        first_chunk = list(mock_chord.call_args.args[0])[0]
+        recompute_popularity_chunk(*first_chunk.args)
+        progress = get_recompute_progress()
+        self.assertEqual(progress["total_chunks"], 3)
+        self.assertEqual(progress["completed_chunks"], 1)
+
+        # A beat tick during the live run does not dispatch anything again
+        mock_chord.reset_mock()
+        run_id = progress["run_id"]
+        self.assertEqual(update_all_popularity_scores(), f"Popularity recompute {run_id} is still running")
+        mock_chord.assert_not_called()
+
+        # The worker died and its heartbeat lapsed: running again resumes.
+        cache.delete(_heartbeat_key(run_id))
+        self.assertEqual(update_all_popularity_scores(), "Dispatched 2 of 3 popularity chunks")
+        resumed = [task.args for task in mock_chord.call_args.args[0]]
+        self.assertNotIn(first_chunk.args, resumed)
+
+
+class LeaderboardTests(UserFixturesMixin, APITestCase):
+    """Tests for sorted-set leaderboards and their endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        reset_local_structures()
+        self.users = [self._create_user(f"user{i}@example.com", f"user{i}") for i in range(4)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for follower in self.users[1:]:
+                Follow.objects.create(follower=follower, followed=self.users[0])
+            Follow.objects.create(follower=self.users[0], followed=self.users[1])
+        self.client.force_authenticate(user=self.users[0])
+
+    def test_follow_signals_update_follower_board(self):
+        self.assertEqual(FOLLOWERS.top(2), [(1, self.users[0].id, 3.0), (2, self.users[1].id, 1.0)])
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.filter(follower=self.users[0], followed=self.users[1]).delete()
+        self.assertEqual(FOLLOWERS.rank(self.users[1].id), (2, 0.0))
+
+    def test_ratings_update_post_board(self):
+        posts = [
+            Post.objects.create(author=self.users[0], title=f"Post {i}", content="Content", is_approved=True)
+            for i in range(2)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(user=self.users[1], post=posts[0], value=2)
+            Rating.objects.create(user=self.users[1], post=posts[1], value=5)
+        self.assertEqual([entry[1] for entry in POST_RATING.top(10)], [posts[1].id, posts[0].id])
+
+    def test_around_returns_neighbours(self):
+        around = FOLLOWERS.around(self.users[1].id, 1)
+        self.assertEqual([entry[0] for entry in around], [1, 2, 3])
+        self.assertEqual(around[1][1], self.users[1].id)
+
+    def test_endpoints(self):
+        response = self.client.get(reverse("leaderboard_top", kwargs={"board": "followers"}), {"limit": 1})
+        self.assertEqual(response.data["results"], [
+            {"rank": 1, "id": self.users[0].id, "name": "user0", "score": 3.0},
+        ])
+        response = self.client.get(
+            reverse("leaderboard_rank", kwargs={"board": "followers", "member_id": self.users[1].id})
+        )
+        self.assertEqual(response.data["rank"], 2)
+        response = self.client.get(
+            reverse("leaderboard_around", kwargs={"board": "followers", "member_id": self.users[1].id}),
+            {"radius": 1},
+        )
+        self.assertEqual(len(response.data["results"]), 3)
+        response = self.client.get(reverse("leaderboard_top", kwargs={"board": "unknown"}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_top_reads_do_not_scan_profiles_once_built(self):
+        self.assertEqual(rebuild_missing_leaderboards(), "Rebuilt leaderboards: engagement, followers, post_rating")
+        with self.assertNumQueries(0):
+            FOLLOWERS.top(10)
+        # Nothing is rated yet, so the empty post board leaves no set behind
+        self.assertEqual(rebuild_missing_leaderboards(), "Rebuilt leaderboards: post_rating")
+
+    def test_cold_board_is_read_from_the_database_without_building(self):
+        self.assertEqual(FOLLOWERS.top(2), [(1, self.users[0].id, 3.0), (2, self.users[1].id, 1.0)])
+        self.assertEqual(FOLLOWERS.rank(self.users[2].id), (3, 0.0))
+        self.assertFalse(FOLLOWERS.entries.exists())
+
+    def test_scheduled_rebuild_repairs_lost_follow_deltas(self):
+        FOLLOWERS.rebuild()
+        # A follow committed mid-rebuild whose increment the rebuilt set overwrote
+        Profile.objects.filter(user=self.users[2]).update(follower_count=5)
+        rebuild_missing_leaderboards()
+        self.assertEqual(FOLLOWERS.rank(self.users[2].id), (3, 0.0))
+        self.assertEqual(rebuild_follower_leaderboard(), "Rebuilt followers leaderboard with 4 entries")
+        self.assertEqual(FOLLOWERS.rank(self.users[2].id), (1, 5.0))
+
+    def test_rebuild_command_restores_cold_boards(self):
+        reset_local_structures()
+        call_command("rebuild_leaderboards", "followers", stdout=StringIO())
+        self.assertEqual(FOLLOWERS.rank(self.users[0].id), (1, 3.0))
+
+    def test_popular_followers_view_reads_leaderboard(self):
+        response = self.client.get(reverse("popular_followers", kwargs={"user_id": self.users[0].id}))
+        names = [row["profile_name"] for row in response.data["results"]]
+        self.assertEqual(names[:2], ["user0", "user1"])
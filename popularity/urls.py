@@ -0,0 +1,16 @@
+from django.urls import path
+from .views import (
+    LeaderboardAroundView,
+    LeaderboardRankView,
+    LeaderboardTopView,
+    RecomputeProgressView,
+    SchedulerMetricsView,
+)
+
+urlpatterns = [
+    path('scheduler-metrics/', SchedulerMetricsView.as_view(), name='popularity_scheduler_metrics'),
+    path('recompute-progress/', RecomputeProgressView.as_view(), name='popularity_recompute_progress'),
+    path('leaderboards/<str:board>/', LeaderboardTopView.as_view(), name='leaderboard_top'),
+    path('leaderboards/<str:board>/rank/<int:member_id>/', LeaderboardRankView.as_view(), name='leaderboard_rank'),
+    path('leaderboards/<str:board>/around/<int:member_id>/', LeaderboardAroundView.as_view(), name='leaderboard_around'),
+]
@@ -1,3 +1,81 @@
-from django.shortcuts import render
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from backend.permissions import IsAdminOrSuperUser
+from .leaderboard import LEADERBOARDS
+from .scheduler import get_scheduler_metrics
+from .tasks import get_recompute_progress
 
-# Create your views here.
+
+class SchedulerMetricsView(APIView):
+    """Expose coalescing metrics of the popularity scheduler to staff."""
+    permission_classes = [IsAdminOrSuperUser]
+
+    def get(self, request):
+        return Response(get_scheduler_metrics())
+
+
+class RecomputeProgressView(APIView):
+    """Report progress of the running full popularity recompute, if any."""
+    permission_classes = [IsAdminOrSuperUser]
+
+    def get(self, request):
+        return Response({"progress": get_recompute_progress()})
+
+
+class LeaderboardMixin:
+    """Resolve the board named in the URL and serialize ranked entries."""
+    permission_classes = [IsAuthenticated]
+
+    def get_board(self):
+        board = LEADERBOARDS.get(self.kwargs["board"])
+        if board is None:
+            raise NotFound("Unknown leaderboard.")
+        return board
+
+    def get_int_param(self, name, default, maximum):
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: "Must be an integer."})
+        return min(max(value, 1), maximum)
+
+    def serialize(self, board, entries):
+        labels = board.labels([member_id for _, member_id, _ in entries])
+        return [
+            {"rank": rank, "id": member_id, "name": labels.get(member_id), "score": score}
+            for rank, member_id, score in entries
+        ]
+
+
+class LeaderboardTopView(LeaderboardMixin, APIView):
+    """Top entries of a leaderboard, `?limit=` up to 100."""
+
+    def get(self, request, board):
+        board = self.get_board()
+        entries = board.top(self.get_int_param("limit", 10, 100))
+        return Response({"board": board.name, "results": self.serialize(board, entries)})
+
+
+class LeaderboardRankView(LeaderboardMixin, APIView):
+    """Rank and score of one entry."""
+
+    def get(self, request, board, member_id):
+        board = self.get_board()
+        ranked = board.rank(member_id)
+        if ranked is None:
+            raise NotFound("Not ranked on this leaderboard.")
+        rank, score = ranked
+        return Response({"board": board.name, "id": member_id, "rank": rank, "score": score})
+
+
+class LeaderboardAroundView(LeaderboardMixin, APIView):
+    """Entries ranked around one entry, `?radius=` up to 50 either side."""
+
+    def get(self, request, board, member_id):
+        board = self.get_board()
+        entries = board.around(member_id, self.get_int_param("radius", 5, 50))
+        if not entries:
+            raise NotFound("Not ranked on this leaderboard.")
+        return Response({"board": board.name, "results": self.serialize(board, entries)})
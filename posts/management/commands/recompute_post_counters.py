@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    """Backfill the denormalized post counters from the source tables."""
+
+    help = "Recompute comments_count, total_ratings and average_rating for all posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of post IDs to update per statement.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        max_id = Post.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+        updated = 0
+        for start in range(0, max_id, batch_size):
+            updated += Post.objects.filter(
+                id__gt=start, id__lte=start + batch_size
+            ).recompute_counters()
+        self.stdout.write(self.style.SUCCESS(f"Recomputed counters for {updated} posts."))
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.2 on 2026-10-17 06:07
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_sum(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    Rating = apps.get_model("ratings", "Rating")
+    totals = (
+        Rating.objects.filter(post=OuterRef("pk"))
+        .order_by()
+        .values("post")
+        .annotate(total=Sum("value"))
+        .values("total")
+    )
+    Post.objects.update(rating_sum=Coalesce(Subquery(totals), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0002_post_comments_count"),
+        ("ratings", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_sum, migrations.RunPython.noop),
+    ]
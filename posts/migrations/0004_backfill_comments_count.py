@@ -0,0 +1,28 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comments_count(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("comments", "Comment")
+    totals = (
+        Comment.objects.filter(post=OuterRef("pk"), is_approved=True)
+        .order_by()
+        .values("post")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    Post.objects.update(comments_count=Coalesce(Subquery(totals), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0003_post_rating_sum"),
+        ("comments", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_comments_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2026-10-17 07:31
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_approved_at(apps, schema_editor):
+    # The approval time of existing posts is unknown; creation is the best guess
+    Post = apps.get_model("posts", "Post")
+    Post.objects.filter(is_approved=True).update(approved_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0004_backfill_comments_count"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="approved_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_approved_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["author", "-approved_at"], name="posts_post_author__e78da3_idx"
+            ),
+        ),
+    ]
@@ -2,7 +2,65 @@ from django.conf import settings
 from django.db import models
 from django.db.models import Q
 from cloudinary.models import CloudinaryField
-from django.db.models import Avg, Count
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.utils import timezone
+from backend.cache import bump_generation_on_commit
+
+
+class PostQuerySet(models.QuerySet):
+    """Query helpers shared by the post views."""
+
+    def for_list(self, user=None):
+        """Annotate only the aggregates the list serializers need.
+
+        Comment and rating counts are denormalized columns, so the only
+        annotation left is the viewer's own rating, resolved as a correlated
+        subquery. No Rating or Comment rows are loaded into memory.
+        """
+        from ratings.models import Rating  # Import here to avoid circular import
+
+        queryset = self.select_related("author", "author__profile")
+        if user is not None and user.is_authenticated:
+            user_rating = Rating.objects.filter(
+                post=OuterRef("pk"), user=user
+            ).values("value")[:1]
+            queryset = queryset.annotate(user_rating=Subquery(user_rating))
+        return queryset
+
+    def recompute_counters(self) -> int:
+        """Recompute the denormalized counters of every post in the queryset.
+
+        Runs as a single UPDATE with correlated subqueries, so callers can
+        backfill large tables by slicing the queryset into primary-key ranges.
+
+        Returns:
+            int: The number of posts updated.
+        """
+        from comments.models import Comment  # Import here to avoid circular import
+        from ratings.models import Rating
+
+        comments = (
+            Comment.objects.filter(post=OuterRef("pk"), is_approved=True)
+            .order_by()
+            .values("post")
+        )
+        ratings = Rating.objects.filter(post=OuterRef("pk")).order_by().values("post")
+        return self.update(
+            comments_count=Coalesce(
+                Subquery(comments.annotate(total=Count("id")).values("total")), 0
+            ),
+            total_ratings=Coalesce(
+                Subquery(ratings.annotate(total=Count("id")).values("total")), 0
+            ),
+            rating_sum=Coalesce(
+                Subquery(ratings.annotate(total=Sum("value")).values("total")), 0
+            ),
+            average_rating=Coalesce(
+                Subquery(ratings.annotate(avg=Avg("value")).values("avg")), 0.0
+            ),
+        )
+
 
 class Post(models.Model):
     """Represents a user's post with optimized fields and methods.
@@ -14,8 +72,11 @@ class Post(models.Model):
         created_at (DateTimeField): The timestamp when the post was created.
         updated_at (DateTimeField): The timestamp when the post was last updated.
         is_approved (BooleanField): Indicates if the post is approved.
+        approved_at (DateTimeField): When the post was first approved; orders home timelines.
         average_rating (FloatField): The average rating of the post.
         total_ratings (PositiveIntegerField): The total number of ratings the post has received.
+        rating_sum (PositiveIntegerField): The sum of all rating values, kept for incremental averages.
+        comments_count (PositiveIntegerField): The number of approved comments on the post.
     """
     def __str__(self) -> str:
         """Returns a string representation of the post.
@@ -53,13 +114,19 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_approved = models.BooleanField(default=False, db_index=True)
+    approved_at = models.DateTimeField(null=True, blank=True)
     average_rating = models.FloatField(default=0)
     total_ratings = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         indexes = [
             models.Index(fields=['-created_at']),
             models.Index(fields=['author', 'is_approved']),
+            models.Index(fields=['author', '-approved_at']),
             models.Index(fields=['average_rating', '-created_at']),
             models.Index(fields=['title']),
         ]
@@ -75,12 +142,60 @@ class Post(models.Model):
     def __str__(self):
         return f"Post by {self.author.profile_name}: {self.title}"
 
+    def save(self, *args, **kwargs):
+        """Stamp `approved_at` the first time the post is saved as approved."""
+        if self.is_approved and self.approved_at is None:
+            self.approved_at = timezone.now()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'approved_at'}
+        super().save(*args, **kwargs)
+
     def update_rating_statistics(self):
-        """Updates rating statistics using optimized aggregation."""
+        """Recompute rating statistics from scratch.
+
+        This is the fallback path used by reconciliation; individual votes
+        go through `apply_rating_delta`.
+        """
         stats = self.ratings.aggregate(
             avg=Avg('value'),
-            total=Count('id')
+            total=Count('id'),
+            value_sum=Sum('value')
         )
         self.average_rating = stats['avg'] or 0
         self.total_ratings = stats['total']
-        self.save(update_fields=['average_rating', 'total_ratings'])
\ No newline at end of file
+        self.rating_sum = stats['value_sum'] or 0
+        self.save(update_fields=['average_rating', 'total_ratings', 'rating_sum'])
+
+    @classmethod
+    def apply_rating_delta(cls, post_id: int, value_delta: int, count_delta: int) -> None:
+        """Apply one vote to the rating statistics with a single atomic UPDATE.
+
+        Args:
+            post_id (int): The rated post.
+            value_delta (int): Change in the sum of rating values.
+            count_delta (int): Change in the number of ratings (-1, 0 or 1).
+        """
+        # Clamped like the other counters, so a drifted row cannot go negative
+        rating_sum = Greatest(F('rating_sum') + value_delta, 0)
+        total_ratings = Greatest(F('total_ratings') + count_delta, 0)
+        cls.objects.filter(pk=post_id).update(
+            rating_sum=rating_sum,
+            total_ratings=total_ratings,
+            average_rating=Case(
+                When(
+                    total_ratings__gt=-count_delta,
+                    then=Cast(rating_sum, FloatField()) / total_ratings,
+                ),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+        )
+
+    @classmethod
+    def adjust_comments_count(cls, post_id: int, delta: int) -> None:
+        """Atomically shift the denormalized comment counter of a post."""
+        cls.objects.filter(pk=post_id).update(
+            comments_count=Greatest(F('comments_count') + delta, 0)
+        )
+        bump_generation_on_commit("posts")
\ No newline at end of file
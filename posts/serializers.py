@@ -2,12 +2,15 @@ from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from .models import Post
 from backend.utils import validate_image
+from followers.cache import get_viewer_following_ids
 
 class PostListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for post listings."""
 
     author = serializers.CharField(source="author.profile_name", read_only=True)
     is_owner = serializers.SerializerMethodField()
+    user_rating = serializers.SerializerMethodField()
+    is_following = serializers.SerializerMethodField()
 
     class Meta:
         model: type = Post
@@ -20,9 +23,12 @@ class PostListSerializer(serializers.ModelSerializer):
             "is_owner", 
             "image",
             "average_rating",
-            "total_ratings"
+            "total_ratings",
+            "comments_count",
+            "user_rating",
+            "is_following",
         ]
-        read_only_fields: list = ["id", "author", "created_at", "average_rating", "total_ratings"]
+        read_only_fields: list = ["id", "author", "created_at", "average_rating", "total_ratings", "comments_count"]
 
     def get_is_owner(self, obj: Post) -> bool:
         """
@@ -37,13 +43,37 @@ class PostListSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         return request and request.user.is_authenticated and request.user == obj.author
 
+    def get_user_rating(self, obj: Post) -> int | None:
+        """
+        Return the viewer's own rating annotated by `Post.objects.for_list`.
+
+        Args:
+            obj (Post): The post instance.
+
+        Returns:
+            int | None: The rating value, or None if the viewer has not rated the post.
+        """
+        return getattr(obj, "user_rating", None)
+
+    def get_is_following(self, obj: Post) -> bool:
+        """
+        Determine if the current user follows the post's author.
+
+        Args:
+            obj (Post): The post instance.
+
+        Returns:
+            bool: True if the author is in the viewer's cached following set.
+        """
+        return obj.author_id in get_viewer_following_ids(self.context)
+
 class PostSerializer(serializers.ModelSerializer):
     """Detailed serializer for single post view."""
 
     author = serializers.CharField(source="author.profile_name", read_only=True)
     is_owner = serializers.SerializerMethodField()
-    comments_count = serializers.IntegerField(source='comments.count', read_only=True)
-    ratings_count = serializers.IntegerField(source='ratings.count', read_only=True)
+    ratings_count = serializers.IntegerField(source="total_ratings", read_only=True)
+    is_following = serializers.SerializerMethodField()
 
     class Meta:
         model: type = Post
@@ -60,7 +90,8 @@ class PostSerializer(serializers.ModelSerializer):
             "is_owner",
             "comments_count",
             "ratings_count",
-            "is_approved"
+            "is_approved",
+            "is_following",
         ]
         read_only_fields: list = [
             "id", 
@@ -68,7 +99,8 @@ class PostSerializer(serializers.ModelSerializer):
             "created_at", 
             "updated_at", 
             "average_rating", 
-            "total_ratings"
+            "total_ratings",
+            "comments_count"
         ]
 
     def get_is_owner(self, obj: Post) -> bool:
@@ -84,6 +116,18 @@ class PostSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         return request and request.user.is_authenticated and request.user == obj.author
 
+    def get_is_following(self, obj: Post) -> bool:
+        """
+        Determine if the current user follows the post's author.
+
+        Args:
+            obj (Post): The post instance.
+
+        Returns:
+            bool: True if the author is in the viewer's cached following set.
+        """
+        return obj.author_id in get_viewer_following_ids(self.context)
+
     def validate_image(self, value: str) -> str:
         """
         Validate the image field.
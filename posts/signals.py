@@ -1,10 +1,17 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from .models import Post
-from popularity.tasks import aggregate_popularity_score
+from popularity.scheduler import mark_author_dirty
+from backend.cache import bump_generation_on_commit
 
 @receiver(post_save, sender=Post)
 def update_popularity_on_post_change(sender, instance, created, **kwargs):
     """Trigger popularity score update when post statistics are updated."""
     if created:  
-        aggregate_popularity_score.delay(instance.author.id)
\ No newline at end of file
+        mark_author_dirty(instance.author_id)
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_list_cache(sender, instance, **kwargs):
+    """Expire cached post listings when a post is created, edited, approved or deleted."""
+    bump_generation_on_commit("posts")
@@ -7,4 +7,21 @@ def send_email_task(subject, message, recipient_list):
     """
     Send an email with the given subject, message, and recipient list.
     """
-    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, recipient_list)
\ No newline at end of file
+    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, recipient_list)
+
+
+@shared_task
+def fan_out_post_task(post_id):
+    """Push a newly approved post onto its author's followers' timelines."""
+    from profiles.models import Profile
+    from .models import Post
+    from .timeline import fan_out_post
+
+    post = Post.objects.filter(pk=post_id, is_approved=True).values("author_id", "approved_at").first()
+    if post is None:
+        return f"Post {post_id} is not approved."
+    follower_count = Profile.objects.filter(user_id=post["author_id"]).values_list("follower_count", flat=True).first() or 0
+    if follower_count > settings.TIMELINE_FANOUT_LIMIT:
+        return f"Post {post_id} is served by fan-out-on-read."
+    pushed = fan_out_post(post_id, post["author_id"], post["approved_at"])
+    return f"Pushed post {post_id} to {pushed} timelines."
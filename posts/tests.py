@@ -1,12 +1,15 @@
 from datetime import timedelta
+from io import StringIO
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.core import mail
+from django.core.management import call_command
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.db import connection
-from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 
@@ -20,7 +23,11 @@ from posts.models import Post
 from posts.serializers import PostListSerializer, PostSerializer
 from ratings.tasks import update_post_stats
 
-from .tasks import send_email_task
+from backend.structures import reset_local_structures
+from backend.testing import UserFixturesMixin
+from followers.models import Follow
+from .tasks import fan_out_post_task, send_email_task
+from .timeline import get_timeline
 from .messages import STANDARD_MESSAGES
 
 User = get_user_model()
@@ -304,16 +311,308 @@ class PostTests(APITestCase):
         cache.clear()
         super().tearDownClass()
 
+class PostFixturesMixin(UserFixturesMixin):
+    """Shared fixtures for post list tests."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = self._create_user("reader@example.com", "reader")
+        self.author = self._create_user("author@example.com", "author")
+        self.post_list_url = reverse("post-list")
+        self.client.force_authenticate(user=self.user)
+
+    def _create_posts(self, count):
+        """Create approved posts, each with a comment and a rating."""
+        start = getattr(self, "_posts_created", 0)
+        self._posts_created = start + count
+        for i in range(start, start + count):
+            post = Post.objects.create(
+                author=self.author, title=f"Post {i}", content="Content", is_approved=True,
+                comments_count=1, total_ratings=1, average_rating=4,
+            )
+            Comment.objects.create(post=post, author=self.user, content="Comment")
+            Rating.objects.bulk_create([Rating(post=post, user=self.user, value=4)])
+
+class PostListQueryTests(PostFixturesMixin, APITestCase):
+    """Query-count tests for the post list endpoint."""
+
+    def _list_query_count(self, page_size):
+        """Return the number of queries used to render one page of the list."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{self.post_list_url}?page_size={page_size}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_list_query_count_is_constant(self):
+        """Listing posts does not scale queries with page size."""
+        self._create_posts(2)
+        small_page = self._list_query_count(2)
+        self._create_posts(18)
+        self.assertEqual(self._list_query_count(20), small_page)
+        # count, page, and the viewer's following set on a cold cache
+        self.assertEqual(small_page, 3)
+
+    def test_list_includes_annotated_aggregates(self):
+        """List rows carry comment count and the viewer's own rating."""
+        self._create_posts(1)
+        response = self.client.get(self.post_list_url)
+        result = response.data["results"][0]
+        self.assertEqual(result["comments_count"], 1)
+        self.assertEqual(result["user_rating"], 4)
+
+    def test_recompute_post_counters_command(self):
+        """The backfill command restores drifted counters."""
+        self._create_posts(3)
+        Post.objects.update(comments_count=0, total_ratings=0, average_rating=0)
+        call_command("recompute_post_counters", "--batch-size", "2", stdout=StringIO())
+        for post in Post.objects.all():
+            self.assertEqual(post.comments_count, 1)
+            self.assertEqual(post.total_ratings, 1)
+            self.assertEqual(post.average_rating, 4)
+
+class PostCursorPaginationTests(PostFixturesMixin, APITestCase):
+    """Tests for the opt-in keyset pagination of the post list."""
+
+    def _walk(self, url):
+        """Follow `next` links and return the ids in the order they were served."""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            ids.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+        return ids
+
+    def test_walks_feed_by_created_at(self):
+        self._create_posts(7)
+        now = timezone.now()
+        Post.objects.update(created_at=now)
+        ids = self._walk(f"{self.post_list_url}?pagination=cursor&page_size=3")
+        self.assertEqual(ids, list(Post.objects.order_by("-created_at", "-id").values_list("id", flat=True)))
+
+    def test_walks_feed_by_rating(self):
+        self._create_posts(6)
+        for index, post in enumerate(Post.objects.order_by("id")):
+            Post.objects.filter(pk=post.pk).update(average_rating=index % 3)
+        ids = self._walk(f"{self.post_list_url}?pagination=cursor&ordering=-average_rating&page_size=4")
+        expected = Post.objects.order_by("-average_rating", "created_at", "id").values_list("id", flat=True)
+        self.assertEqual(ids, list(expected))
+
+    def test_page_does_not_count(self):
+        self._create_posts(4)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f"{self.post_list_url}?pagination=cursor&page_size=2")
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries.captured_queries))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f"{self.post_list_url}?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unsupported_ordering(self):
+        response = self.client.get(f"{self.post_list_url}?pagination=cursor&ordering=updated_at")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class PostListCacheTests(PostFixturesMixin, APITestCase):
+    """Tests for the versioned, per-viewer post list cache."""
+
+    def test_repeat_request_is_served_from_cache(self):
+        self._create_posts(2)
+        self.client.get(self.post_list_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.post_list_url)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_viewers_do_not_share_entries(self):
+        Post.objects.create(author=self.author, title="Draft", content="Pending", is_approved=False)
+        self.client.force_authenticate(user=self.author)
+        self.assertEqual(len(self.client.get(self.post_list_url).data["results"]), 1)
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(len(self.client.get(self.post_list_url).data["results"]), 0)
+
+    def test_post_write_invalidates_cache(self):
+        self._create_posts(1)
+        self.client.get(self.post_list_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(author=self.author, title="Fresh", content="New", is_approved=True)
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_rating_invalidates_every_viewers_entries(self):
+        self._create_posts(1)
+        post = Post.objects.get()
+        self.client.get(self.post_list_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(post=post, user=self.author, value=2)
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(response.data["results"][0]["total_ratings"], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.filter(post=post, user=self.user).get().delete()
+        response = self.client.get(self.post_list_url)
+        self.assertIsNone(response.data["results"][0]["user_rating"])
+
+class PostDetailCommentsTests(PostFixturesMixin, APITestCase):
+    """Tests for embedding comments in the post detail response."""
+
+    def setUp(self):
+        super().setUp()
+        self.post = Post.objects.create(author=self.author, title="Discussed", content="Content", is_approved=True)
+        self.detail_url = reverse("post-detail", kwargs={"pk": self.post.pk})
+        self.client.force_authenticate(user=self.author)
+
+    def _add_comments(self, count):
+        for i in range(count):
+            root = Comment.objects.create(post=self.post, author=self.user, content=f"Comment {i}")
+            Comment.objects.create(post=self.post, author=self.author, content="Reply", parent=root)
+
+    def _detail_query_count(self, query=""):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{self.detail_url}{query}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_comments_are_opt_in(self):
+        self._add_comments(1)
+        response = self.client.get(self.detail_url)
+        self.assertNotIn("comments", response.data["data"])
+
+    def test_include_embeds_first_page_with_cursor(self):
+        self._add_comments(12)
+        Comment.objects.create(post=self.post, author=self.user, content="Hidden", is_approved=False)
+        response = self.client.get(f"{self.detail_url}?include=comments")
+        comments = response.data["data"]["comments"]
+        self.assertEqual(len(comments["results"]), 10)
+        self.assertEqual(comments["results"][0]["content"], "Comment 11")
+        self.assertEqual(comments["results"][0]["replies"][0]["content"], "Reply")
+        self.assertIn(reverse("comment-list", kwargs={"post_id": self.post.pk}), comments["next"])
+
+        cache.clear()
+        rest = self.client.get(comments["next"]).data
+        self.assertEqual([comment["content"] for comment in rest["results"]], ["Comment 1", "Comment 0"])
+        self.assertIsNone(rest["next"])
+
+    def test_query_count_does_not_grow_with_comments(self):
+        self._add_comments(2)
+        few = self._detail_query_count("?include=comments")
+        self._add_comments(30)
+        self.assertEqual(self._detail_query_count("?include=comments"), few)
+
+
+class FeedTests(PostFixturesMixin, APITestCase):
+    """Tests for the fan-out home timeline."""
+
+    def setUp(self):
+        super().setUp()
+        reset_local_structures()
+        patcher = patch("posts.views.fan_out_post_task.delay", side_effect=fan_out_post_task)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.admin = User.objects.create_superuser(email="admin@example.com", password="adminpass123")
+        self.celebrity = self._create_user("celebrity@example.com", "celebrity")
+        self.stranger = self._create_user("stranger@example.com", "stranger")
+        Follow.objects.create(follower=self.user, followed=self.author)
+        Follow.objects.create(follower=self.user, followed=self.celebrity)
+        Follow.objects.create(follower=self.stranger, followed=self.celebrity)
+        self.feed_url = reverse("feed")
+
+    def _approve(self, author, title):
+        post = Post.objects.create(author=author, title=title, content="Content")
+        self.client.force_authenticate(user=self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse("approve-post", kwargs={"pk": post.pk}))
+        self.client.force_authenticate(user=self.user)
+        return post
+
+    def _feed_titles(self, url=None):
+        response = self.client.get(url or self.feed_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["title"] for row in response.data["results"]], response.data["next"]
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_feed_merges_pushed_and_pulled_posts(self):
+        self._approve(self.author, "Before first read")
+        self.assertEqual(self._feed_titles()[0], ["Before first read"])
+        self._approve(self.author, "Pushed")
+        self._approve(self.celebrity, "Pulled")
+        self._approve(self.stranger, "Not followed")
+        self.assertEqual(self._feed_titles()[0], ["Pulled", "Pushed", "Before first read"])
+        # The two pushed posts and the marker kept by every rebuilt timeline
+        self.assertEqual(get_timeline(self.user.id).size(), 3)
+
+    def test_cursor_walks_the_timeline(self):
+        for i in range(3):
+            self._approve(self.author, f"Post {i}")
+        titles, next_url = self._feed_titles(f"{self.feed_url}?page_size=2")
+        self.assertEqual(titles, ["Post 2", "Post 1"])
+        titles, next_url = self._feed_titles(next_url)
+        self.assertEqual(titles, ["Post 0"])
+        self.assertIsNone(next_url)
+
+    def test_posts_approved_in_the_same_microsecond_are_not_skipped(self):
+        for i in range(3):
+            self._approve(self.author, f"Post {i}")
+        Post.objects.update(approved_at=timezone.now())
+        self._approve(self.celebrity, "Rebuild")
+        get_timeline(self.user.id).delete()
+        titles, next_url = self._feed_titles(f"{self.feed_url}?page_size=2")
+        while next_url:
+            page, next_url = self._feed_titles(next_url)
+            titles += page
+        self.assertEqual(titles, ["Rebuild", "Post 2", "Post 1", "Post 0"])
+
+    def test_empty_timeline_is_built_once(self):
+        self.client.force_authenticate(user=self.admin)
+        with CaptureQueriesContext(connection) as first:
+            self.assertEqual(self._feed_titles()[0], [])
+        with CaptureQueriesContext(connection) as second:
+            self.assertEqual(self._feed_titles()[0], [])
+        # The second read skips the rebuild query
+        self.assertEqual(len(second), len(first) - 1)
+
+    def test_late_approval_ranks_by_approval_time(self):
+        old = Post.objects.create(author=self.author, title="Written first", content="Content")
+        self._approve(self.author, "Approved first")
+        self._feed_titles()
+        self.client.force_authenticate(user=self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse("approve-post", kwargs={"pk": old.pk}))
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self._feed_titles()[0], ["Written first", "Approved first"])
+
+    def test_unfollow_rebuilds_timeline(self):
+        self._approve(self.author, "Soon hidden")
+        self._feed_titles()
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.filter(follower=self.user, followed=self.author).delete()
+        self.assertFalse(get_timeline(self.user.id).exists())
+        self.assertEqual(self._feed_titles()[0], [])
+
+    def test_hydration_query_count_is_constant(self):
+        for i in range(2):
+            self._approve(self.author, f"Post {i}")
+        self._feed_titles()
+        with CaptureQueriesContext(connection) as small:
+            self._feed_titles()
+        for i in range(2, 6):
+            self._approve(self.author, f"Post {i}")
+        with CaptureQueriesContext(connection) as large:
+            self._feed_titles()
+        self.assertEqual(len(small), len(large))
+
+
 class SignalTests(TestCase):
     """Test signals on post save."""
 
-    @patch('popularity.tasks.aggregate_popularity_score.delay')
-    def test_post_save_triggers_signal(self, mock_aggregate_task):
+    @patch('posts.signals.mark_author_dirty')
+    def test_post_save_triggers_signal(self, mock_mark_dirty):
         """Saving Post triggers popularity score update."""
         user = User.objects.create_user(email="user@example.com", profile_name="user", password="testpass")
         post = Post.objects.create(author=user, title="Test Post", content="Test Content")
         post.save()
-        mock_aggregate_task.assert_called_once_with(post.author.id)
+        mock_mark_dirty.assert_called_once_with(post.author_id)
 
 class TaskTests(TestCase):
     """Test Celery tasks."""
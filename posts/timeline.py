@@ -0,0 +1,107 @@
+"""
+Home timelines of followed authors' posts.
+
+Approved posts are pushed (fan-out-on-write) into a bounded sorted set per
+follower, scored by approval time so a post approved late still lands at
+the top. Authors with more than `TIMELINE_FANOUT_LIMIT` followers are not
+pushed; their posts are merged in at read time (fan-out-on-read). A
+timeline that does not exist yet, or was dropped after a follow change,
+is rebuilt from the database on its next read. Posts are ordered by
+approval time, then id, so equal timestamps still page deterministically.
+"""
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from backend.structures import SortedSet
+from followers.models import Follow
+from .models import Post
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+# Kept in every rebuilt timeline so one without posts still exists and is
+# not rebuilt on each read. Post ids start at 1 and it scores lowest.
+EMPTY_MARKER = 0
+
+
+def get_timeline(user_id):
+    return SortedSet(f"timeline:{user_id}")
+
+
+def timeline_score(approved_at):
+    """Integer microseconds since the epoch, exact in a sorted-set double."""
+    return (approved_at - EPOCH) // MICROSECOND
+
+
+def score_to_datetime(score):
+    return EPOCH + int(score) * MICROSECOND
+
+
+def invalidate_timelines(user_ids):
+    """Drop timelines whose set of followed authors changed, once the change commits."""
+    user_ids = list(user_ids)
+
+    def invalidate():
+        for user_id in user_ids:
+            get_timeline(user_id).delete()
+
+    transaction.on_commit(invalidate)
+
+
+def fan_out_post(post_id, author_id, approved_at, chunk_size=1000):
+    """Push `post_id` onto the timelines of every follower of `author_id`."""
+    score = timeline_score(approved_at)
+    follower_ids = Follow.objects.filter(followed_id=author_id).values_list("follower_id", flat=True)
+    chunk, pushed = [], 0
+    for follower_id in follower_ids.iterator(chunk_size=chunk_size):
+        chunk.append(f"timeline:{follower_id}")
+        if len(chunk) >= chunk_size:
+            pushed += SortedSet.add_to_existing(chunk, post_id, score, settings.TIMELINE_MAX_LENGTH)
+            chunk = []
+    pushed += SortedSet.add_to_existing(chunk, post_id, score, settings.TIMELINE_MAX_LENGTH)
+    return pushed
+
+
+def _followed_posts(user_id):
+    return Post.objects.filter(is_approved=True, author__followers__follower_id=user_id)
+
+
+def rebuild_timeline(user_id):
+    """Refill a timeline with the latest posts of its fanned-out authors."""
+    posts = (
+        _followed_posts(user_id)
+        .filter(author__profile__follower_count__lte=settings.TIMELINE_FANOUT_LIMIT)
+        .order_by("-approved_at")
+        .values_list("id", "approved_at")[:settings.TIMELINE_MAX_LENGTH]
+    )
+    entries = [(EMPTY_MARKER, 0)]
+    entries.extend((post_id, timeline_score(approved_at)) for post_id, approved_at in posts)
+    get_timeline(user_id).replace(entries)
+
+
+def read_timeline(user_id, before, limit):
+    """
+    Return up to `limit` `(post_id, score)` pairs below the `(score, post_id)`
+    cursor `before` (newest first, or from the top when it is None), merging
+    the stored timeline with posts of high-follower authors.
+    """
+    timeline = get_timeline(user_id)
+    if not timeline.exists():
+        rebuild_timeline(user_id)
+    before_score, before_id = before or (None, None)
+    # One extra entry in case the empty marker is among them
+    pushed = timeline.members_below(before_score, limit + 1, before_id)
+
+    pulled = _followed_posts(user_id).filter(
+        author__profile__follower_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    )
+    if before is not None:
+        before_at = score_to_datetime(before_score)
+        pulled = pulled.filter(Q(approved_at__lt=before_at) | Q(approved_at=before_at, id__lt=before_id))
+    pulled = pulled.order_by("-approved_at", "-id").values_list("id", "approved_at")[:limit]
+
+    entries = {post_id: int(score) for post_id, score in pushed if post_id != EMPTY_MARKER}
+    entries.update((post_id, timeline_score(approved_at)) for post_id, approved_at in pulled)
+    return sorted(entries.items(), key=lambda entry: (entry[1], entry[0]), reverse=True)[:limit]
@@ -5,6 +5,7 @@ from .views import (
     ApprovePost,
     DisapprovePost,
     UnapprovedPostList,
+    FeedView,
 )
 
 urlpatterns = [
@@ -13,4 +14,5 @@ urlpatterns = [
     path("posts/<int:pk>/approve/", ApprovePost.as_view(), name="approve-post"),
     path("posts/<int:pk>/disapprove/", DisapprovePost.as_view(), name="disapprove-post"),
     path("posts/unapproved/", UnapprovedPostList.as_view(), name="unapproved-posts"),
+    path("feed/", FeedView.as_view(), name="feed"),
 ]
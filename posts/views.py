@@ -1,35 +1,93 @@
 import logging
 from django.core.cache import cache
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import never_cache
 from django.db.models import Q
+from django.urls import reverse
 from rest_framework import generics, status
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from backend.cache import cache_list_response
+from backend.pagination import KeysetPagination
 from backend.permissions import IsOwnerOrAdmin, IsAdminOrSuperUser
-from comments.serializers import CommentSerializer
+from comments.models import Comment
+from comments.threads import serialize_threads
+from comments.views import CommentPagination
 from .models import Post
 from .serializers import PostListSerializer, PostSerializer
 from .messages import STANDARD_MESSAGES
+from .tasks import fan_out_post_task
+from .timeline import read_timeline, score_to_datetime, timeline_score
 
 logger = logging.getLogger(__name__)
 
-class PostCursorPagination(PageNumberPagination):
+class PostPagination(PageNumberPagination):
     """Pagination class for posts."""
     page_size = 5
     page_size_query_param = 'page_size'
     max_page_size = 100
 
+class PostCursorPagination(KeysetPagination):
+    """
+    Keyset pagination for the post feed.
+
+    Each ordering walks one of the `Post.Meta.indexes` in its natural
+    direction (forwards or backwards), with `id` as the tie-breaker, so deep
+    pages cost the same as the first one.
+    """
+    page_size = 5
+    orderings = {
+        "-created_at": ("-created_at", "-id"),
+        "created_at": ("created_at", "id"),
+        "average_rating": ("average_rating", "-created_at", "-id"),
+        "-average_rating": ("-average_rating", "created_at", "id"),
+    }
+    default_ordering = "-created_at"
+
+class TimelinePagination(KeysetPagination):
+    """Keyset pagination over a home timeline, most recently approved first."""
+    page_size = 10
+    orderings = {"-approved_at": ("-approved_at", "-id")}
+    default_ordering = "-approved_at"
+
+    def paginate_timeline(self, request):
+        self.request = request
+        self.model = Post
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.default_ordering
+        self.fields = self.orderings[self.ordering]
+
+        position = self.decode_cursor(request)
+        before = (timeline_score(position[0]), position[1]) if position else None
+        entries = read_timeline(request.user.id, before, self.page_size + 1)
+        self.has_next = len(entries) > self.page_size
+        post_ids = [post_id for post_id, _ in entries[: self.page_size]]
+        posts = Post.objects.for_list(request.user).filter(is_approved=True).in_bulk(post_ids)
+        self.page = [posts[post_id] for post_id in post_ids if post_id in posts]
+        self.last_entry = entries[len(post_ids) - 1] if post_ids else None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or self.last_entry is None:
+            return None
+        url = self.request.build_absolute_uri()
+        post_id, score = self.last_entry
+        position = [score_to_datetime(score).isoformat(), post_id]
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position))
+
+
 class PostList(generics.ListCreateAPIView):
     """View for listing and creating posts."""
-    pagination_class = PostCursorPagination
+    pagination_class = PostPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ["is_approved"]
     search_fields = ["title", "content", "author__profile__profile_name"]
@@ -37,6 +95,17 @@ class PostList(generics.ListCreateAPIView):
     ordering = ["-created_at"]
     permission_classes = [IsAuthenticated, IsOwnerOrAdmin]
 
+    @property
+    def paginator(self):
+        """Use keyset pagination when the client opts in with `?pagination=cursor`."""
+        if not hasattr(self, "_paginator"):
+            params = self.request.query_params
+            if params.get("pagination") == "cursor" or "cursor" in params:
+                self._paginator = PostCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_serializer_class(self):
         """Return appropriate serializer class based on user authentication and query params."""
         if self.request.user.is_authenticated and self.request.query_params.get('detail') == 'true':
@@ -45,8 +114,8 @@ class PostList(generics.ListCreateAPIView):
 
     def get_queryset(self):
         """Return queryset based on user role and authentication."""
-        queryset = Post.objects.select_related("author", "author__profile").prefetch_related("ratings", "comments")
         user = self.request.user
+        queryset = Post.objects.for_list(user)
         if not user.is_authenticated:
             return queryset.filter(is_approved=True)
         if user.has_permission_to(self.request, 'manage_content'):
@@ -55,9 +124,9 @@ class PostList(generics.ListCreateAPIView):
             return queryset.filter(author=user)
         return queryset.filter(Q(is_approved=True) | Q(author=user))
 
-    @method_decorator(cache_page(60 * 15))
+    @cache_list_response("posts", 60 * 15)
     def list(self, request, *args, **kwargs):
-        """List posts with caching."""
+        """List posts with per-viewer, versioned caching."""
         response = super().list(request, *args, **kwargs)
         response.data.update({
             "message": STANDARD_MESSAGES.get("POSTS_RETRIEVED_SUCCESS"),
@@ -71,17 +140,31 @@ class PostList(generics.ListCreateAPIView):
 
 class PostDetail(generics.RetrieveUpdateDestroyAPIView):
     """View for retrieving, updating, and deleting a post."""
-    queryset = Post.objects.all()
+    queryset = Post.objects.select_related("author", "author__profile")
     serializer_class = PostSerializer
     permission_classes = [IsOwnerOrAdmin]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
+    def get_includes(self):
+        return set(filter(None, self.request.query_params.get("include", "").split(",")))
+
+    def get_comments(self, instance):
+        """The first page of comment threads, as the comment listing serves it."""
+        paginator = CommentPagination()
+        url = self.request.build_absolute_uri(reverse("comment-list", kwargs={"post_id": instance.pk}))
+        page = paginator.paginate_first_page(Comment.objects.for_list(instance.pk), self.request, url)
+        return {
+            "next": paginator.get_next_link(),
+            "results": serialize_threads(page, self.get_serializer_context()),
+        }
+
     def retrieve(self, request, *args, **kwargs):
-        """Retrieve a post along with its comments."""
+        """Retrieve a post; `?include=comments` embeds the first page of its comments."""
         instance = self.get_object()
         serializer = self.get_serializer(instance)
         data = serializer.data
-        data["comments"] = CommentSerializer(instance.comments.all(), many=True).data
+        if "comments" in self.get_includes():
+            data["comments"] = self.get_comments(instance)
         return Response({
             "data": data,
             "message": STANDARD_MESSAGES.get("POST_RETRIEVED_SUCCESS"),
@@ -122,8 +205,12 @@ class ApprovePost(generics.UpdateAPIView):
     def update(self, request, *args, **kwargs):
         """Approve a post."""
         instance = self.get_object()
-        instance.is_approved = True
-        instance.save(update_fields=["is_approved"])
+        newly_approved = not instance.is_approved
+        with transaction.atomic():
+            instance.is_approved = True
+            instance.save(update_fields=["is_approved"])
+            if newly_approved:
+                transaction.on_commit(lambda: fan_out_post_task.delay(instance.id))
         serializer = self.get_serializer(instance)
         return Response({
             "data": serializer.data,
@@ -132,6 +219,19 @@ class ApprovePost(generics.UpdateAPIView):
         })
 
 
+class FeedView(generics.GenericAPIView):
+    """Home timeline: approved posts by the authors the user follows."""
+    serializer_class = PostListSerializer
+    pagination_class = TimelinePagination
+    permission_classes = [IsAuthenticated]
+
+    @method_decorator(never_cache)
+    def get(self, request, *args, **kwargs):
+        page = self.paginator.paginate_timeline(request)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
 class UnapprovedPostList(generics.ListAPIView):
     """View for listing unapproved posts."""
     serializer_class = PostListSerializer
@@ -139,7 +239,7 @@ class UnapprovedPostList(generics.ListAPIView):
 
     def get_queryset(self):
         """Return queryset of unapproved posts."""
-        return Post.objects.filter(is_approved=False).select_related("author").distinct()
+        return Post.objects.for_list(self.request.user).filter(is_approved=False)
 
 
 class DisapprovePost(APIView):
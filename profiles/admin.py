@@ -1,7 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import Profile
-from popularity.models import PopularityMetrics
 
 class ProfileInline(admin.StackedInline):
     """Inline admin for Profile model."""
@@ -14,16 +13,16 @@ class ProfileInline(admin.StackedInline):
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
-    list_display = ["user", "profile_name", "get_popularity_score", "profile_image", "follower_count", "following_count"]
+    list_display = ["user", "profile_name", "popularity_score", "profile_image", "follower_count", "following_count"]
     list_filter = ["user__is_active"]
     search_fields = ["profile_name", "user__email", "bio"]
-    readonly_fields = ["get_popularity_score", "follower_count", "following_count"]
+    readonly_fields = ["popularity_score", "follower_count", "following_count"]
     
     fieldsets = [
         ("User Information", {"fields": ["user", "profile_name", "bio"]}),
         ("Profile Image", {"fields": ["image"]}),
         ("Statistics", {
-            "fields": ["get_popularity_score", "follower_count", "following_count"], 
+            "fields": ["popularity_score", "follower_count", "following_count"], 
             "classes": ["collapse"]
         }),
     ]
@@ -34,12 +33,5 @@ class ProfileAdmin(admin.ModelAdmin):
         return "No Image"
     profile_image.short_description = "Profile Image"
 
-    def get_popularity_score(self, obj):
-        try:
-            return obj.user.popularity_metrics.popularity_score
-        except PopularityMetrics.DoesNotExist:
-            return 0.0
-    get_popularity_score.short_description = "Popularity Score"
-
     def get_queryset(self, request):
         return super().get_queryset(request).select_related("user")
\ No newline at end of file
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.2 on 2026-10-17 06:15
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_popularity_score(apps, schema_editor):
+    Profile = apps.get_model("profiles", "Profile")
+    PopularityMetrics = apps.get_model("popularity", "PopularityMetrics")
+    score = PopularityMetrics.objects.filter(user_id=OuterRef("user_id")).values(
+        "engagement_score"
+    )[:1]
+    Profile.objects.update(popularity_score=Coalesce(Subquery(score), 0.0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profiles", "0001_initial"),
+        ("popularity", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="popularity_score",
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddIndex(
+            model_name="profile",
+            index=models.Index(
+                fields=["-popularity_score", "profile_name"],
+                name="profiles_pr_popular_b77f3e_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_popularity_score, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
 from cloudinary.models import CloudinaryField
 
 class Profile(models.Model):
@@ -25,9 +27,70 @@ class Profile(models.Model):
     )    
     follower_count = models.PositiveIntegerField(default=0)
     following_count = models.PositiveIntegerField(default=0)
+    popularity_score = models.FloatField(default=0.0)
 
     class Meta:
         indexes = [
             models.Index(fields=['profile_name']),
             models.Index(fields=['user', 'profile_name']),
-        ]
\ No newline at end of file
+            models.Index(fields=['-popularity_score', 'profile_name']),
+        ]
+
+    @classmethod
+    def adjust_follow_counts(cls, follower_id: int, followed_id: int, delta: int) -> None:
+        """Atomically shift the counters on both sides of a follow relationship."""
+        cls.objects.filter(user_id=followed_id).update(
+            follower_count=Greatest(F('follower_count') + delta, 0)
+        )
+        cls.objects.filter(user_id=follower_id).update(
+            following_count=Greatest(F('following_count') + delta, 0)
+        )
+
+    @classmethod
+    def lock_follows_of(cls, follower_id: int) -> None:
+        """
+        Lock the follower's profile row for the rest of the transaction.
+
+        Follow writes by one follower take this lock first, so a batch sees
+        every committed follow of that user and counts only rows it inserts.
+        """
+        list(cls.objects.select_for_update().filter(user_id=follower_id).values_list('pk', flat=True))
+
+    @classmethod
+    def bulk_adjust_follow_counts(cls, follower_id: int, followed_ids, delta: int) -> None:
+        """Shift counters for one follower and many followed users at once."""
+        cls.objects.filter(user_id__in=followed_ids).update(
+            follower_count=Greatest(F('follower_count') + delta, 0)
+        )
+        cls.objects.filter(user_id=follower_id).update(
+            following_count=Greatest(F('following_count') + delta * len(followed_ids), 0)
+        )
+
+    @classmethod
+    def repair_follow_counts(cls, start_after: int, end_id: int) -> list:
+        """
+        Recompute follower/following counts for users with
+        `start_after < id <= end_id` from grouped counts over Follow and
+        save only the profiles that drifted.
+        """
+        from followers.models import Follow  # Import here to avoid circular import
+
+        followers = dict(
+            Follow.objects.filter(followed_id__gt=start_after, followed_id__lte=end_id).order_by()
+            .values_list('followed_id').annotate(total=Count('id'))
+        )
+        following = dict(
+            Follow.objects.filter(follower_id__gt=start_after, follower_id__lte=end_id).order_by()
+            .values_list('follower_id').annotate(total=Count('id'))
+        )
+        drifted = []
+        profiles = cls.objects.filter(user_id__gt=start_after, user_id__lte=end_id).only(
+            'id', 'user_id', 'follower_count', 'following_count'
+        )
+        for profile in profiles:
+            expected = (followers.get(profile.user_id, 0), following.get(profile.user_id, 0))
+            if (profile.follower_count, profile.following_count) != expected:
+                profile.follower_count, profile.following_count = expected
+                drifted.append(profile)
+        cls.objects.bulk_update(drifted, ['follower_count', 'following_count'], batch_size=500)
+        return drifted
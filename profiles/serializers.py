@@ -1,8 +1,8 @@
 from rest_framework import serializers
 from cloudinary.forms import CloudinaryFileField
 from .models import Profile
-from popularity.models import PopularityMetrics
 from backend.utils import validate_image
+from followers.cache import get_viewer_following_ids
 
 class ProfileSerializer(serializers.ModelSerializer):
     image = CloudinaryFileField(
@@ -17,8 +17,8 @@ class ProfileSerializer(serializers.ModelSerializer):
         required=False,
     )
     profile_name = serializers.CharField(read_only=True)
-    popularity_score = serializers.SerializerMethodField()
-    
+    is_following = serializers.SerializerMethodField()
+
     class Meta:
         model = Profile
         fields = [
@@ -28,6 +28,7 @@ class ProfileSerializer(serializers.ModelSerializer):
             "popularity_score",
             "follower_count",
             "following_count",
+            "is_following",
         ]
         read_only_fields = [
             "popularity_score",
@@ -36,11 +37,8 @@ class ProfileSerializer(serializers.ModelSerializer):
             "profile_name",
         ]
 
-    def get_popularity_score(self, obj):
-        try:
-            return obj.user.popularity_metrics.popularity_score
-        except (AttributeError, PopularityMetrics.DoesNotExist):
-            return 0.0
+    def get_is_following(self, obj):
+        return obj.user_id in get_viewer_following_ids(self.context)
 
     def validate_image(self, value):
         return validate_image(value)
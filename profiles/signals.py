@@ -6,7 +6,7 @@ from django.db import transaction
 from followers.models import Follow
 from .models import Profile
 from popularity.models import PopularityMetrics
-from popularity.tasks import aggregate_popularity_score
+from backend.cache import bump_generation_on_commit
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,20 +33,9 @@ def remove_follows_on_profile_delete(sender, instance, **kwargs):
     Follow.objects.filter(followed=instance.user).delete()
     logger.info(f"Follows removed for deleted user: {instance.user.profile_name}")
 
-@receiver(post_save, sender=Follow)
-def update_follower_count_on_follow(sender, instance, created, **kwargs):
-    if created:
-        followed_profile = Profile.objects.get(user=instance.followed)
-        followed_profile.follower_count = Follow.objects.filter(followed=instance.followed).count()
-        followed_profile.save()
-        logger.info(f"Follower count updated for user: {instance.followed.profile_name}")
-        aggregate_popularity_score.delay(instance.followed.id)
-
-@receiver(post_delete, sender=Follow)
-def update_follower_count_on_unfollow(sender, instance, **kwargs):
-    try:
-        followed_profile = Profile.objects.get(user=instance.followed)
-        followed_profile.follower_count = Follow.objects.filter(followed=instance.followed).count()
-        followed_profile.save()
-    except Profile.DoesNotExist:
-        pass
\ No newline at end of file
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+@receiver(post_save, sender=PopularityMetrics)
+def invalidate_profile_list_cache(sender, instance, **kwargs):
+    """Expire cached profile listings when a profile or its popularity changes."""
+    bump_generation_on_commit("profiles")
@@ -1,18 +1,14 @@
-import logging
-from django.db import transaction
 from celery import shared_task
-from .models import Profile
-from popularity.tasks import aggregate_popularity_score
+from popularity import tasks as popularity_tasks
 
-logger = logging.getLogger(__name__)
 
 @shared_task
-def update_all_popularity_scores():
-    profiles = Profile.objects.all().only("id", "user")
-
-    with transaction.atomic():
-        for profile in profiles:
-            aggregate_popularity_score.delay(profile.user_id)
-
-    logger.info(f"Initiated popularity score updates for {profiles.count()} profiles")
-    return f"Initiated popularity score updates for {profiles.count()} profiles"
\ No newline at end of file
+def update_all_popularity_scores(batch_size=None) -> str:
+    """
+    Old name of `popularity.tasks.update_all_popularity_scores`.
+
+    Registered under its previous task name so messages and beat entries
+    that still refer to `profiles.tasks.update_all_popularity_scores` run
+    the chunked recompute.
+    """
+    return popularity_tasks.update_all_popularity_scores(batch_size)
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch
 from django.test import TestCase, override_settings
+from django.core.cache import cache
 from django.urls import reverse
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -12,6 +13,10 @@ from followers.models import Follow
 from popularity.models import PopularityMetrics
 from .tasks import update_all_popularity_scores
 from backend.utils import validate_image
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from posts.models import Post
+from popularity.engine import recompute_popularity
 
 User = get_user_model()
 
@@ -21,9 +26,9 @@ class ProfileListViewTests(TestCase):
         self.user1 = User.objects.create_user(email='user1@example.com', profile_name='user1', password='pass')
         self.user2 = User.objects.create_user(email='user2@example.com', profile_name='user2', password='pass')
         self.user3 = User.objects.create_user(email='user3@example.com', profile_name='user3', password='pass')
-        PopularityMetrics.objects.filter(user=self.user1).update(popularity_score=50)
-        PopularityMetrics.objects.filter(user=self.user2).update(popularity_score=75)
-        PopularityMetrics.objects.filter(user=self.user3).update(popularity_score=25)
+        Profile.objects.filter(user=self.user1).update(popularity_score=50)
+        Profile.objects.filter(user=self.user2).update(popularity_score=75)
+        Profile.objects.filter(user=self.user3).update(popularity_score=25)
         Follow.objects.create(follower=self.user1, followed=self.user2)
         self.profile_list_url = reverse('profile_list')
 
@@ -111,16 +116,16 @@ class ProfileDetailViewTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
 class ProfileTaskTests(TestCase):
-    @patch('profiles.tasks.aggregate_popularity_score.delay')
-    def test_update_all_popularity_scores(self, mock_aggregate_task):
-        """Test updating all popularity scores."""
-        user1 = User.objects.create_user(email='user1@example.com', profile_name='user1', password='pass')
-        user2 = User.objects.create_user(email='user2@example.com', profile_name='user2', password='pass')
-        result = update_all_popularity_scores()
-        self.assertEqual(result, f"Initiated popularity score updates for {Profile.objects.count()} profiles")
-        self.assertEqual(mock_aggregate_task.call_count, 2)
-        mock_aggregate_task.assert_any_call(user1.id)
-        mock_aggregate_task.assert_any_call(user2.id)
+    @patch('popularity.tasks.chord')
+    def test_update_all_popularity_scores(self, mock_chord):
+        """The profiles task name dispatches the chunked popularity recompute."""
+        cache.clear()
+        user1 = User.objects.create_user(email='user1@example.com', password='pass', is_active=True)
+        user2 = User.objects.create_user(email='user2@example.com', password='pass', is_active=True)
+        result = update_all_popularity_scores(batch_size=1)
+        self.assertEqual(result, "Dispatched 2 of 2 popularity chunks")
+        header = list(mock_chord.call_args.args[0])
+        self.assertEqual([task.args[1:] for task in header], [(0, user1.id), (user1.id, user2.id)])
 
 class ProfileSignalTests(TestCase):
     def test_profile_creation_on_user_creation(self):
@@ -178,5 +183,37 @@ class ProfileSignalTests(TestCase):
             validate_image(image)
         self.assertIn("Image dimensions too large", str(context.exception))
 
+class ProfilePopularityOrderingTests(TestCase):
+    """Tests for the materialized popularity_score column."""
+
+    def setUp(self):
+        cache.clear()
+        self.users = []
+        for name, score in (("alpha", 5.0), ("bravo", 9.0), ("charlie", 5.0)):
+            user = User.objects.create_user(email=f"{name}@example.com", password="testpass123", is_active=True)
+            Profile.objects.create(user=user, profile_name=name, popularity_score=score)
+            self.users.append(user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.users[0])
+
+    def test_list_orders_by_score_then_name_without_subquery(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("profile_list"))
+        self.assertEqual(
+            [row["profile_name"] for row in response.data["results"]],
+            ["bravo", "alpha", "charlie"],
+        )
+        self.assertEqual(response.data["results"][0]["popularity_score"], 9.0)
+        list_sql = [q["sql"] for q in ctx.captured_queries if 'FROM "profiles_profile"' in q["sql"]][-1]
+        self.assertNotIn("popularity_popularitymetrics", list_sql)
+
+    def test_recompute_materializes_engagement_score(self):
+        Post.objects.create(author=self.users[2], title="Scored", content="Content", is_approved=True)
+        recompute_popularity([user.id for user in self.users])
+        profile = Profile.objects.get(user=self.users[2])
+        metrics = PopularityMetrics.objects.get(user=self.users[2])
+        self.assertEqual(profile.popularity_score, metrics.engagement_score)
+        self.assertEqual(Profile.objects.get(user=self.users[1]).popularity_score, 0.0)
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
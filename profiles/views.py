@@ -1,7 +1,5 @@
 import logging
-from django.db.models import OuterRef, Subquery, Exists, Q
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from django.db.models import Q
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
@@ -9,7 +7,7 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from .models import Profile
 from .serializers import ProfileSerializer
 from followers.models import Follow
-from popularity.models import PopularityMetrics
+from backend.cache import cache_list_response
 from backend.permissions import IsOwnerOrAdmin
 
 CACHE_TIMEOUT = 60 * 30
@@ -31,17 +29,12 @@ class ProfileListView(generics.ListAPIView):
         """Return filtered and annotated queryset."""
         user = self.request.user
         filter_type = self.request.query_params.get('filter', 'popular')
-        popularity_subquery = PopularityMetrics.objects.filter(
-            user=OuterRef('user')
-        ).values('popularity_score')[:1]
-        queryset = Profile.objects.annotate(
-            popularity_score=Subquery(popularity_subquery)
-        )
+        queryset = Profile.objects.all()
         if not user.is_authenticated:
             queryset = queryset.filter(user__is_active=True)
         elif filter_type == 'followed' and user.is_authenticated:
             queryset = queryset.filter(
-                Exists(Follow.objects.filter(follower=user, followed=OuterRef('user')))
+                user_id__in=Follow.objects.filter(follower=user).values('followed_id')
             )
         elif user.has_permission_to(self.request, 'manage_users'):
             pass
@@ -49,9 +42,9 @@ class ProfileListView(generics.ListAPIView):
             queryset = queryset.filter(
                 Q(user__is_active=True) | Q(user=user)
             )
-        return queryset.order_by('-popularity_score', 'user__profile_name')
+        return queryset.order_by('-popularity_score', 'profile_name')
 
-    @method_decorator(cache_page(CACHE_TIMEOUT))
+    @cache_list_response("profiles", CACHE_TIMEOUT)
     def list(self, request, *args, **kwargs):
         """Cache and paginate profile listings."""
         response = super().list(request, *args, **kwargs)
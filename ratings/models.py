@@ -17,5 +17,12 @@ class Rating(models.Model):
             models.Index(fields=['value']),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored value so saves can apply the old-to-new delta."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_value = instance.__dict__.get("value")
+        return instance
+
     def __str__(self):
         return f"{self.user.profile.profile_name} rated {self.post.title} {self.value} stars"
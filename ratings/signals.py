@@ -1,11 +1,61 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from .models import Rating
-from popularity.tasks import aggregate_popularity_score
+from posts.models import Post
+from django.db import transaction
+from popularity.leaderboard import refresh_post_rating
+from popularity.scheduler import mark_post_dirty
+from backend.cache import bump_generation_on_commit
+
+@receiver(post_save, sender=Rating)
+def apply_rating_to_post_stats(sender, instance, created, **kwargs):
+    """
+    Apply the delta of a new or changed vote to the post's rating statistics.
+    """
+    if created:
+        Post.apply_rating_delta(instance.post_id, instance.value, 1)
+    else:
+        previous = getattr(instance, "_loaded_value", None)
+        if previous is None:
+            Post.objects.get(pk=instance.post_id).update_rating_statistics()
+        elif previous != instance.value:
+            Post.apply_rating_delta(instance.post_id, instance.value - previous, 0)
+    instance._loaded_value = instance.value
+
+
+@receiver(post_delete, sender=Rating)
+def remove_rating_from_post_stats(sender, instance, origin=None, **kwargs):
+    """
+    Subtract a deleted vote, unless the rated post itself is being deleted.
+    """
+    if isinstance(origin, Post) or getattr(origin, "model", None) is Post:
+        return
+    Post.apply_rating_delta(instance.post_id, -instance.value, -1)
+
 
 @receiver(post_save, sender=Rating)
 def update_popularity_on_rating(sender, instance, **kwargs):
     """
-    Update the profile's popularity score when a rating is saved.
+    Schedule a popularity refresh for the post's author when a rating is saved.
+    """
+    mark_post_dirty(instance.post_id)
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def rerank_post_on_rating(sender, instance, origin=None, **kwargs):
+    """Move the post on the rating leaderboard once the vote is committed."""
+    if isinstance(origin, Post) or getattr(origin, "model", None) is Post:
+        return
+    post_id = instance.post_id
+    transaction.on_commit(lambda: refresh_post_rating(post_id))
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def invalidate_post_list_cache(sender, instance, **kwargs):
+    """
+    Expire cached post listings, which show each post's rating statistics
+    and the viewer's own vote, once the vote is committed.
     """
-    aggregate_popularity_score.delay(instance.post.author.id)
+    bump_generation_on_commit("posts")
@@ -1,7 +1,10 @@
 import logging
 from celery import shared_task
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from posts.models import Post
-from popularity.tasks import aggregate_popularity_score
+from .models import Rating
+from popularity.scheduler import mark_author_dirty
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +25,8 @@ def update_post_stats(self, post_id):
         new_rating = post.average_rating
         logger.info(f"Task {self.request.id}: New rating: {new_rating}")
         
-        aggregate_popularity_score.delay(post.author.id)
-        logger.info(f"Task {self.request.id}: Triggered aggregate_popularity_score for user {post.author.id}")
+        mark_author_dirty(post.author_id)
+        logger.info(f"Task {self.request.id}: Marked user {post.author_id} for popularity refresh")
         
         result = f"Updated stats for post {post_id}. New rating: {new_rating}"
         logger.info(f"Task {self.request.id}: Completed. Returning result: {result}")
@@ -34,5 +37,31 @@ def update_post_stats(self, post_id):
     except Exception as e:
         logger.error(f"Task {self.request.id}: Error updating stats for post {post_id}: {str(e)}")
         return f"Error updating stats for post {post_id}: {str(e)}"
-    
-    
+
+
+@shared_task
+def reconcile_post_rating_stats(batch_size=1000):
+    """
+    Repair drift between the incremental rating counters and the Rating table.
+
+    Walks posts in primary-key ranges, compares the stored sum and count with
+    the real aggregates and recomputes only the posts that disagree.
+    """
+    ratings = Rating.objects.filter(post=OuterRef("pk")).order_by().values("post")
+    max_id = Post.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+    repaired = 0
+    for start in range(0, max_id, batch_size):
+        drifted_ids = list(
+            Post.objects.filter(id__gt=start, id__lte=start + batch_size)
+            .annotate(
+                actual_total=Coalesce(Subquery(ratings.annotate(total=Count("id")).values("total")), 0),
+                actual_sum=Coalesce(Subquery(ratings.annotate(total=Sum("value")).values("total")), 0),
+            )
+            .exclude(total_ratings=F("actual_total"), rating_sum=F("actual_sum"))
+            .values_list("id", flat=True)
+        )
+        if drifted_ids:
+            repaired += Post.objects.filter(id__in=drifted_ids).recompute_counters()
+    if repaired:
+        logger.warning(f"Repaired rating statistics drift on {repaired} posts.")
+    return f"Reconciled rating statistics; repaired {repaired} posts."
@@ -5,7 +5,8 @@ from rest_framework.test import APITestCase
 from posts.models import Post
 from .models import Rating
 from unittest.mock import patch, Mock
-from ratings.tasks import update_post_stats
+from ratings.tasks import update_post_stats, reconcile_post_rating_stats
+from backend.testing import UserFixturesMixin
 
 User = get_user_model()
 
@@ -84,8 +85,8 @@ class RatingTests(APITestCase):
         self.assertEqual(response.data["non_field_errors"][0], "You cannot rate your own post.")
 
     @patch('ratings.tasks.Post.objects.get')
-    @patch('ratings.tasks.aggregate_popularity_score.delay')
-    def test_update_post_stats_success(self, mock_aggregate_task, mock_get_post):
+    @patch('ratings.tasks.mark_author_dirty')
+    def test_update_post_stats_success(self, mock_mark_dirty, mock_get_post):
         """Test successful update of post stats."""
         # Setup mock objects
         mock_post = Mock()
@@ -98,8 +99,8 @@ class RatingTests(APITestCase):
         # Assert that the correct result is returned
         self.assertIn("Updated stats for post 1", result)
     
-        # Assert that the Celery task was called once
-        mock_aggregate_task.assert_called_once_with(mock_post.author.id)
+        # Assert that the author was marked for a popularity refresh
+        mock_mark_dirty.assert_called_once_with(mock_post.author_id)
 
 
     @patch('ratings.tasks.Post.objects.get')
@@ -118,4 +119,53 @@ class RatingTests(APITestCase):
         mock_get_post.return_value = mock_post
         update_post_stats(1)
         mock_logger.assert_any_call("Task None: Starting update_post_stats for post 1")
-        mock_logger.assert_any_call("Task None: Updated rating statistics")
\ No newline at end of file
+        mock_logger.assert_any_call("Task None: Updated rating statistics")
+
+
+class IncrementalRatingStatsTests(UserFixturesMixin, APITestCase):
+    """Tests for delta-based post rating statistics."""
+
+    def setUp(self):
+        self.author = self._create_user("author@example.com", "author")
+        self.voters = [self._create_user(f"voter{i}@example.com", f"voter{i}") for i in range(3)]
+        self.post = Post.objects.create(author=self.author, title="Rated", content="Content", is_approved=True)
+
+    def _assert_stats(self, rating_sum, total, average):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.rating_sum, rating_sum)
+        self.assertEqual(self.post.total_ratings, total)
+        self.assertAlmostEqual(self.post.average_rating, average)
+
+    def test_create_update_delete_apply_deltas(self):
+        Rating.objects.create(user=self.voters[0], post=self.post, value=5)
+        rating = Rating.objects.create(user=self.voters[1], post=self.post, value=2)
+        self._assert_stats(7, 2, 3.5)
+        rating = Rating.objects.get(pk=rating.pk)
+        rating.value = 4
+        rating.save()
+        self._assert_stats(9, 2, 4.5)
+        rating.delete()
+        self._assert_stats(5, 1, 5.0)
+        Rating.objects.all().delete()
+        self._assert_stats(0, 0, 0.0)
+
+    def test_view_update_applies_old_to_new_delta(self):
+        self.client.force_authenticate(user=self.voters[0])
+        rating_url = reverse("create-update-rating")
+        self.client.post(rating_url, {"post": self.post.id, "value": 2})
+        self.client.post(rating_url, {"post": self.post.id, "value": 5})
+        self._assert_stats(5, 1, 5.0)
+
+    def test_delta_on_drifted_row_clamps_at_zero(self):
+        rating = Rating.objects.create(user=self.voters[0], post=self.post, value=5)
+        Post.objects.filter(pk=self.post.pk).update(rating_sum=1, total_ratings=1, average_rating=1)
+        rating.delete()
+        self._assert_stats(0, 0, 0.0)
+
+    def test_reconcile_repairs_drift(self):
+        for voter, value in zip(self.voters, (1, 2, 3)):
+            Rating.objects.create(user=voter, post=self.post, value=value)
+        Post.objects.filter(pk=self.post.pk).update(rating_sum=40, total_ratings=9, average_rating=0)
+        result = reconcile_post_rating_stats(batch_size=1)
+        self.assertIn("repaired 1 posts", result)
+        self._assert_stats(6, 3, 2.0)
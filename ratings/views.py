@@ -4,7 +4,6 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import Rating
 from .serializers import RatingSerializer
-from .tasks import update_post_stats
 
 class CreateOrUpdateRatingView(generics.CreateAPIView):
     """Create or update a rating for a post."""
@@ -32,9 +31,7 @@ class CreateOrUpdateRatingView(generics.CreateAPIView):
             post=post,
             defaults={"value": serializer.validated_data["value"]},
         )
-        
-        update_post_stats.delay(post.id)
-        
+
         return Response(
             {
                 "data": self.get_serializer(rating).data,